@@ -7,6 +7,7 @@ from flask_cors import CORS
 from flask_restplus import Api
 
 from mystique.utils import load_od_instance
+from mystique.executors import get_stage_executor
 from . import resources as res
 from mystique import config
 
@@ -47,6 +48,8 @@ else:
 
 # Load the models and cache it for request handling.
 app.od_model = load_od_instance()
+# Long-lived worker processes running the card pipeline stages.
+app.stage_executor = get_stage_executor()
 
 # Include more debug points along with /predict_json api.
 api.add_resource(res.DebugEndpoint, "/predict_json_debug", methods=["POST"])
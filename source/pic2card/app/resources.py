@@ -1,16 +1,13 @@
 """ resources for api """
-import sys
 import os
-import io
-import base64
 import logging
 from urllib.parse import parse_qs, urlparse
 
-from PIL import Image
 from flask import request
 from flask_restplus import Resource
 from flask import current_app
 
+from mystique.ingest import CardImage, ImageRejected
 from mystique.predict_card import PredictCard
 from mystique import config
 from .utils import get_templates
@@ -62,10 +59,10 @@ class PredictJson(Resource):
 
         Make use of the frozen graph for inferencing.
         """
-        imgdata = base64.b64decode(bs64_img)
-        image = Image.open(io.BytesIO(imgdata))
-        predict_card = PredictCard(current_app.od_model)
-        card = predict_card.main(image=image, card_format=card_format)
+        card_image = CardImage.from_base64(bs64_img)
+        predict_card = PredictCard(current_app.od_model,
+                                   current_app.stage_executor)
+        card = predict_card.main(image=card_image, card_format=card_format)
         return card
 
     def post(self):
@@ -73,22 +70,34 @@ class PredictJson(Resource):
         predicts the adaptive card json for the posted image
         :return: adaptive card json
         """
+        upload_size_error = {
+            "error": {
+                "msg": "Upload images of size <="
+                f" {config.IMG_MAX_UPLOAD_SIZE/(1024*1024)} MB.",
+                "code": 1002
+            }
+        }
         try:
             card_format = parse_qs(urlparse(request.url).query).get("format",
                                                                     [None])[0]
+            # Oversize uploads are rejected before the json body is parsed.
+            if (request.content_length or 0) > config.IMG_MAX_REQUEST_SIZE:
+                return upload_size_error
             bs64_img = request.json.get("image", "")
-            if sys.getsizeof(bs64_img) < config.IMG_MAX_UPLOAD_SIZE:
+            # a chunked upload has no content length to check upfront
+            if len(bs64_img) < config.IMG_MAX_UPLOAD_SIZE:
                 response = self._get_card_object(bs64_img, card_format)
             else:
                 # Upload smaller image.
-                response = {
-                    "error": {
-                        "msg": "Upload images of size <="
-                        f" {config.IMG_MAX_UPLOAD_SIZE/(1024*1024)} MB.",
-                        "code": 1002
-                    }
-                }
+                response = upload_size_error
 
+        except ImageRejected as ex:
+            response = {
+                "error": {
+                    "msg": str(ex),
+                    "code": 1002
+                }
+            }
         except Exception as ex:
             error_msg = f"Unhandled Error, failed to process the request: {ex}"
             logger.error(error_msg)
@@ -110,7 +119,8 @@ class TfPredictJson(PredictJson):
 
     def __init__(self, *args, **kwargs):
         self.model_name = config.TF_SERVING_MODEL_NAME
-        self.tf_server = config.TF_SERVING_URL
+        # the client uses the configured url of the configured protocol
+        self.tf_server = None
         super(PredictJson, self).__init__(*args, **kwargs)
 
     def _get_card_object(self, bs64_img: str, card_format: str):
@@ -119,7 +129,7 @@ class TfPredictJson(PredictJson):
 
         Using TF serving to do the object detection.
         """
-        pic2card = PredictCard(None)
+        pic2card = PredictCard(None, current_app.stage_executor)
         card = pic2card.tf_serving_main(bs64_img, self.tf_server,
                                         self.model_name, card_format)
         return card
@@ -158,8 +168,7 @@ class DebugEndpoint(PredictJson):
         """
         from mystique.debug import Debug
 
-        imgdata = base64.b64decode(bs64_img)
-        image = Image.open(io.BytesIO(imgdata))
+        card_image = CardImage.from_base64(bs64_img)
         debug = Debug(current_app.od_model)
-        images = debug.main(pil_image=image, card_format=card_format)
+        images = debug.main(pil_image=card_image, card_format=card_format)
         return images
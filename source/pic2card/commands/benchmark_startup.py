@@ -0,0 +1,127 @@
+"""
+Startup time of the pic2card worker for the detection backends, each run is
+a fresh interpreter so that nothing is cached across the measurements.
+
+    # import and model load time of the default and the onnx backends
+    $ python -m commands.benchmark_startup run -m tf_faster_rcnn \\
+        -m onnx_detr --repeat 3 --report-path startup_report.csv
+
+The phases reported for each backend are,
+    - process: wall time of the whole interpreter run
+    - service_import: importing the service modules [ app.resources ]
+    - backend_import: importing the backend's module from MODEL_REGISTRY
+    - model_load: creating the detection model instance
+and the heavy frameworks found loaded after the model load.
+"""
+import json
+import resource
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+import click
+
+from mystique import config
+
+# frameworks checked in the worker's sys.modules after the model load
+FRAMEWORKS = ("tensorflow", "torch", "onnxruntime", "detr", "pandas",
+              "matplotlib", "sklearn", "pytesseract")
+
+
+def measure_startup(model_name: str, service_modules) -> dict:
+    """
+    Measures the startup phases of the backend in the current process.
+    @param model_name: MODEL_REGISTRY name of the backend
+    @param service_modules: modules imported by the worker before the model
+    @return: phase timings in seconds, loaded frameworks and max RSS in MB
+    """
+    timings = {}
+    start = time.perf_counter()
+    for module in service_modules:
+        import_module(module)
+    timings["service_import"] = time.perf_counter() - start
+
+    class_path = config.MODEL_REGISTRY[model_name]
+    module_path, class_name = class_path.rsplit(".", 1)
+    start = time.perf_counter()
+    od_class = getattr(import_module(module_path), class_name)
+    timings["backend_import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    od_class()
+    timings["model_load"] = time.perf_counter() - start
+
+    timings["frameworks"] = " ".join(
+        name for name in FRAMEWORKS if name in sys.modules)
+    timings["max_rss_mb"] = resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss / 1024
+    return timings
+
+
+def run_worker(model_name: str, service_modules) -> dict:
+    """
+    Measures the startup in a fresh interpreter.
+    """
+    command = [sys.executable, "-m", "commands.benchmark_startup",
+               "measure", model_name]
+    for module in service_modules:
+        command += ["-s", module]
+    start = time.perf_counter()
+    output = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+    result = json.loads(output.stdout.decode().strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+
+@click.group()
+def benchmark_startup():
+    pass
+
+
+@benchmark_startup.command()
+@click.argument("model_name")
+@click.option("-s", "--service-module", "service_modules", multiple=True,
+              default=["app.resources"],
+              help="Modules imported by the worker before the model load")
+def measure(model_name, service_modules):
+    """
+    Prints the startup timings of the current process as json.
+    """
+    click.echo(json.dumps(measure_startup(model_name, service_modules)))
+
+
+@benchmark_startup.command()
+@click.option("-m", "--model-name", "model_names", multiple=True,
+              default=[config.ACTIVE_MODEL_NAME],
+              type=click.Choice(list(config.MODEL_REGISTRY)),
+              help="MODEL_REGISTRY names of the backends")
+@click.option("-s", "--service-module", "service_modules", multiple=True,
+              default=["app.resources"],
+              help="Modules imported by the worker before the model load")
+@click.option("--repeat", default=3, help="Runs per backend")
+@click.option("--report-path", default=None,
+              help="Path of the report csv")
+def run(model_names, service_modules, repeat, report_path):
+    """
+    Reports the median startup timings of the backends.
+    """
+    import pandas as pd
+
+    rows = []
+    for model_name in model_names:
+        runs = pd.DataFrame([run_worker(model_name, service_modules)
+                             for _ in range(repeat)])
+        row = runs.median(numeric_only=True).to_dict()
+        row.update(model=model_name, frameworks=runs["frameworks"].iloc[0])
+        rows.append(row)
+    report_df = pd.DataFrame(rows).set_index("model")[
+        ["process", "service_import", "backend_import", "model_load",
+         "max_rss_mb", "frameworks"]]
+    click.echo(report_df.round(3).to_string())
+    if report_path:
+        report_df.to_csv(report_path)
+
+
+if __name__ == "__main__":
+    benchmark_startup()
@@ -0,0 +1,123 @@
+"""
+Export the detection models to ONNX for the onnx runtime backends
+[ `onnx_detr` and `onnx_faster_rcnn` of the MODEL_REGISTRY ].
+
+    # DETR torchscript model
+    $ python -m commands.export_onnx detr --image tests/test_images/test01.png
+
+    # Faster rcnn frozen graph, needs tensorflow and tf2onnx
+    $ python -m commands.export_onnx frcnn
+
+The export is run once in the training / build environment, the serving
+environment only needs onnxruntime.
+"""
+import os
+import subprocess
+import sys
+
+import click
+import numpy as np
+from PIL import Image
+
+from mystique import config
+
+OPSET_VERSION = 11
+
+
+def _make_dirs(output):
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+
+@click.group()
+def export_onnx():
+    pass
+
+
+@export_onnx.command()
+@click.option(
+    "--model-path",
+    help="DETR torchscript model path",
+    default=config.DETR_MODEL_PATH)
+@click.option(
+    "--output",
+    help="Exported onnx model path",
+    default=config.ONNX_DETR_MODEL_PATH)
+@click.option(
+    "--image",
+    help="Sample card image used for tracing and validating the export",
+    required=True)
+@click.option(
+    "--opset",
+    help="ONNX opset version",
+    default=OPSET_VERSION)
+def detr(model_path, output, image, opset):
+    """
+    Exports the DETR model with dynamic batch and image size axes and
+    validates the onnx runtime outputs against the torchscript model.
+    """
+    import torch
+    from mystique.models.pth.detr.predict import transform
+    from mystique.obj_detect.onnx_objects import create_session
+
+    model = torch.jit.load(model_path)
+    model.eval()
+    image = Image.open(image).convert("RGB")
+    image_tnsr = transform(image).unsqueeze(0)
+    with torch.no_grad():
+        outputs = model(image_tnsr)
+    _make_dirs(output)
+    torch.onnx.export(
+        model, image_tnsr, output,
+        example_outputs=outputs,
+        input_names=["image"],
+        output_names=["pred_logits", "pred_boxes"],
+        dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"},
+                      "pred_logits": {0: "batch"},
+                      "pred_boxes": {0: "batch"}},
+        opset_version=opset)
+
+    session = create_session(output)
+    pred_logits, pred_boxes = session.run(
+        ["pred_logits", "pred_boxes"], {"image": image_tnsr.numpy()})
+    np.testing.assert_allclose(pred_logits,
+                               outputs["pred_logits"].numpy(),
+                               rtol=1e-3, atol=1e-4)
+    np.testing.assert_allclose(pred_boxes,
+                               outputs["pred_boxes"].numpy(),
+                               rtol=1e-3, atol=1e-4)
+    click.echo(f"Exported {model_path} to {output}")
+
+
+@export_onnx.command()
+@click.option(
+    "--model-path",
+    help="Faster rcnn frozen inference graph path",
+    default=config.TF_FROZEN_MODEL_PATH)
+@click.option(
+    "--output",
+    help="Exported onnx model path",
+    default=config.ONNX_FRCNN_MODEL_PATH)
+@click.option(
+    "--opset",
+    help="ONNX opset version",
+    default=OPSET_VERSION)
+def frcnn(model_path, output, opset):
+    """
+    Converts the faster rcnn frozen graph using tf2onnx, the tensorflow
+    tensor names are kept as the onnx input and output names.
+    """
+    _make_dirs(output)
+    subprocess.run([
+        sys.executable, "-m", "tf2onnx.convert",
+        "--graphdef", model_path,
+        "--inputs", "image_tensor:0",
+        "--outputs", ("detection_boxes:0,detection_scores:0,"
+                      "detection_classes:0"),
+        "--opset", str(opset),
+        "--output", output
+    ], check=True)
+    click.echo(f"Exported {model_path} to {output}")
+
+
+if __name__ == "__main__":
+    export_onnx()
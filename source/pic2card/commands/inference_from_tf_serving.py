@@ -9,9 +9,7 @@ import base64
 from PIL import Image
 
 from mystique.utils import timeit
-from mystique.initial_setups import set_graph_and_tensors
 from mystique.predict_card import PredictCard
-from mystique.detect_objects import ObjectDetection
 from mystique import config
 
 # tf.logging.set_verbosity(tf.logging.ERROR)
@@ -20,9 +18,9 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = '3'
 
 @click.command()
 @click.option("-i", "--image", required=True, help="Path to the image")
-@click.option("-t", "--tf_server", required=False,
-              default=config.TF_SERVING_URL,
-              help="TF serving base URL")
+@click.option("-t", "--tf_server", required=False, default=None,
+              help="TF serving base URL, defaults to the configured url of"
+              " the TF_SERVING_PROTOCOL")
 @click.option("-n", "--model_name", required=False,
               default=config.TF_SERVING_MODEL_NAME,
               help="Model name to be used, as we can host multiple models in"
@@ -40,7 +38,9 @@ def inference_graph(tf_server, image, model_name):
     img = Image.open(open(image, "rb"))
     # image_np = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
 
-    object_detection = ObjectDetection(*set_graph_and_tensors())
+    # loads tensorflow, the tf-serving inference above doesn't need it.
+    from mystique.detect_objects import ObjectDetection
+    object_detection = ObjectDetection()
     predict_card = PredictCard(object_detection)
 
     with timeit("frozen-graph"):
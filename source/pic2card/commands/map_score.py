@@ -9,13 +9,90 @@ mAP command.
 NOTE: This project isn't including that command, use it externally.
 """
 import os
+import time
 import click
 import pathlib
+from typing import Callable, List
 import numpy as np
 import pandas as pd
-from mystique.initial_setups import set_graph_and_tensors
-from mystique.detect_objects import ObjectDetection
-from mystique.utils import xml_to_csv
+from PIL import Image
+from mystique import config
+from mystique.utils import xml_to_csv, id_to_label, \
+    load_instance_with_class_path
+
+
+def registry_model_detector(model_name: str) -> Callable:
+    """
+    Returns the detection function of the MODEL_REGISTRY model, which
+    returns the labels, boxes and scores of the image path.
+    """
+    od_model = load_instance_with_class_path(
+        config.MODEL_REGISTRY[model_name])
+
+    def detect(img_path: str, img_pipeline=False):
+        image = Image.open(img_path).convert("RGB")
+        result = od_model.get_objects(image_np=np.asarray(image),
+                                      image=image)
+        classes = [id_to_label(int(i)) for i in result["detection_classes"]]
+        return (classes, np.asarray(result["detection_boxes"]).tolist(),
+                np.asarray(result["detection_scores"]).tolist())
+    return detect
+
+
+def export_detections(get_bboxes: Callable, test_dir: str,
+                      ground_truth_dir: str, pred_truth_dir: str,
+                      bbox_min_score: float,
+                      image_pipeline=False) -> List[float]:
+    """
+    Writes the ground truth and predicted labels of the test images in the
+    mAP tool format.
+
+    @param get_bboxes: detection function returning the labels, boxes and
+                       scores of an image path
+    @param test_dir: labelmg generated test image directory
+    @param ground_truth_dir: ground truth labels directory
+    @param pred_truth_dir: predicted labels directory
+    @param bbox_min_score: minimum bbox score to be considered
+    @param image_pipeline: use the custom image pipeline
+    @return: detection latency of each image in seconds
+    """
+    # columns used: filename, xmin, ymin, xmax, ymax
+    gt_dir = pathlib.Path(ground_truth_dir)
+    pd_dir = pathlib.Path(pred_truth_dir)
+    gt_dir.mkdir(parents=True, exist_ok=True)
+    pd_dir.mkdir(parents=True, exist_ok=True)
+
+    data_df = xml_to_csv(test_dir)
+    images = np.unique(data_df['filename'].tolist())
+
+    latencies = []
+    for img_name in images:
+        img_path = f"{test_dir}/{img_name}"
+        start = time.perf_counter()
+        classes, scores, boxes = get_bboxes(img_path, image_pipeline)
+        latencies.append(time.perf_counter() - start)
+        # import pdb; pdb.set_trace()
+        preds = []
+        pred_iter = zip(classes, scores, boxes)
+        for pred in pred_iter:
+            label, bbox, score = pred
+            if score > bbox_min_score:
+                preds.append(
+                    (label, score, bbox[0], bbox[1], bbox[2], bbox[3])
+                )
+
+        columns = ['class', 'score', 'xmin', 'ymin', 'xmax', 'ymax']
+        fname = img_name.split('.')[0]
+        pd.DataFrame.from_records(preds, columns=columns).to_csv(
+            f"{pd_dir}/{fname}.txt", header=False, sep=" ", index=False
+        )
+        # Save the ground truth labels.
+        columns = ['class', 'xmin', 'ymin', 'xmax', 'ymax']
+        data_df[data_df.filename == img_name][columns].to_csv(
+            f"{gt_dir}/{fname}.txt",
+            header=False, sep=" ", index=False
+        )
+    return latencies
 
 
 @click.command()
@@ -35,7 +112,12 @@ from mystique.utils import xml_to_csv
     "--model-fw",
     type=click.Choice(["tf", "pytorch"], case_sensitive=False),
     help="Model framework tf/pytorch",
-    required=True)
+    required=False)
+@click.option(
+    "--model-name",
+    type=click.Choice(list(config.MODEL_REGISTRY)),
+    help="Use the MODEL_REGISTRY model instead of the model framework",
+    required=False)
 @click.option(
     "--bbox-min-score",
     help="Minimum bbox score from the model to be considered.",
@@ -47,52 +129,28 @@ from mystique.utils import xml_to_csv
     is_flag=True)
 def generate_map(test_dir, ground_truth_dir, pred_truth_dir,
                  model_fw,
+                 model_name,
                  bbox_min_score,
                  image_pipeline):
-    # columns used: filename, xmin, ymin, xmax, ymax
-    gt_dir = pathlib.Path(ground_truth_dir)
-    pd_dir = pathlib.Path(pred_truth_dir)
-    gt_dir.mkdir(parents=True, exist_ok=True)
-    pd_dir.mkdir(parents=True, exist_ok=True)
-
     not os.path.exists(ground_truth_dir) and os.mkdir(ground_truth_dir)
     not os.path.exists(pred_truth_dir) and os.mkdir(pred_truth_dir)
 
-    if model_fw == "tf":
-        object_detection = ObjectDetection(*set_graph_and_tensors())
+    if model_name:
+        get_bboxes = registry_model_detector(model_name)
+    elif model_fw == "tf":
+        from mystique.detect_objects import ObjectDetection
+        object_detection = ObjectDetection()
+        get_bboxes = object_detection.get_bboxes
     elif model_fw == "pytorch":
         from mystique.detect_objects_pth import PtObjectDetection
         object_detection = PtObjectDetection()
+        get_bboxes = object_detection.get_bboxes
+    else:
+        raise click.UsageError("Either --model-fw or --model-name is needed")
 
-    data_df = xml_to_csv(test_dir)
-    images = np.unique(data_df['filename'].tolist())
-
-    for img_name in images:
-        img_path = f"{test_dir}/{img_name}"
-        classes, scores, boxes = object_detection.get_bboxes(img_path,
-                                                             image_pipeline)
-
-        # import pdb; pdb.set_trace()
-        preds = []
-        pred_iter = zip(classes, scores, boxes)
-        for pred in pred_iter:
-            label, bbox, score = pred
-            if score > bbox_min_score:
-                preds.append(
-                    (label, score, bbox[0], bbox[1], bbox[2], bbox[3])
-                )
-
-        columns = ['class', 'score', 'xmin', 'ymin', 'xmax', 'ymax']
-        fname = img_name.split('.')[0]
-        pd.DataFrame.from_records(preds, columns=columns).to_csv(
-            f"{pd_dir}/{fname}.txt", header=False, sep=" ", index=False
-        )
-        # Save the ground truth labels.
-        columns = ['class', 'xmin', 'ymin', 'xmax', 'ymax']
-        data_df[data_df.filename == img_name][columns].to_csv(
-            f"{gt_dir}/{fname}.txt",
-            header=False, sep=" ", index=False
-        )
+    export_detections(get_bboxes, test_dir, ground_truth_dir,
+                      pred_truth_dir, bbox_min_score,
+                      image_pipeline=image_pipeline)
 
 
 if __name__ == "__main__":
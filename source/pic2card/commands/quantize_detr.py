@@ -0,0 +1,208 @@
+"""
+INT8 quantization of the DETR torchscript model and the accuracy / latency
+report of the quantized variants.
+
+    # linear layers with INT8 weights, activations quantized on the fly
+    $ python -m commands.quantize_detr quantize --mode dynamic
+
+    # INT8 weights and activations, calibrated on the training images
+    $ python -m commands.quantize_detr quantize --mode static \\
+        --train-dir data/train
+
+    # mAP, per image latency and RSS of the models on the test images
+    $ python -m commands.quantize_detr report --test-dir data/test \\
+        --report-path quantization_report.csv
+
+The quantized models are served with the `pth_detr_int8_dynamic` and
+`pth_detr_int8_static` MODEL_REGISTRY entries.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+import click
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from mystique import config
+
+QUANTIZED_MODEL_PATHS = {
+    "dynamic": config.DETR_DYNAMIC_INT8_MODEL_PATH,
+    "static": config.DETR_STATIC_INT8_MODEL_PATH
+}
+REPORT_MODELS = ("pth_detr", "pth_detr_int8_dynamic", "pth_detr_int8_static")
+# the training images are labelimg annotated pngs and jpgs
+CALIBRATION_IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg")
+
+
+def _rss_mb() -> float:
+    """
+    Resident set size of the process in MB.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load_calibration_images(train_dir: str, n_images: int):
+    """
+    Returns the transformed training images used to calibrate the
+    activation ranges.
+    """
+    from mystique.models.pth.detr.predict import transform
+    paths = sorted(path for pattern in CALIBRATION_IMAGE_PATTERNS
+                   for path in glob.glob(os.path.join(train_dir, pattern)))
+    paths = paths[:n_images]
+    return [transform(Image.open(path).convert("RGB")).unsqueeze(0)
+            for path in paths]
+
+
+def calibrate(model, images):
+    """
+    Runs the observed model on the calibration images.
+    """
+    import torch
+    with torch.no_grad():
+        for image in images:
+            model(image)
+
+
+@click.group()
+def quantize_detr():
+    pass
+
+
+@quantize_detr.command()
+@click.option(
+    "--mode",
+    type=click.Choice(["dynamic", "static"]),
+    help="dynamic [ linear layers ] or static [ calibrated ] quantization",
+    default="dynamic")
+@click.option(
+    "--model-path",
+    help="DETR torchscript model path",
+    default=config.DETR_MODEL_PATH)
+@click.option(
+    "--output",
+    help="Quantized model path, defaults to the MODEL_REGISTRY model path",
+    default=None)
+@click.option(
+    "--train-dir",
+    help="Calibration image directory for the static quantization",
+    default="data/train")
+@click.option(
+    "--calibration-images",
+    help="Number of the training images used for calibration",
+    default=32)
+def quantize(mode, model_path, output, train_dir, calibration_images):
+    """
+    Quantizes the DETR torchscript model to INT8 with the graph mode
+    quantization.
+    """
+    import torch
+    from torch.quantization import (get_default_qconfig,
+                                    per_channel_dynamic_qconfig,
+                                    quantize_dynamic_jit, quantize_jit)
+
+    output = output or QUANTIZED_MODEL_PATHS[mode]
+    torch.backends.quantized.engine = "fbgemm"
+    model = torch.jit.load(model_path)
+    model.eval()
+    if mode == "dynamic":
+        quantized = quantize_dynamic_jit(model,
+                                         {"": per_channel_dynamic_qconfig})
+    else:
+        images = load_calibration_images(train_dir, calibration_images)
+        if not images:
+            raise click.UsageError(f"No calibration images in {train_dir}")
+        quantized = quantize_jit(model, {"": get_default_qconfig("fbgemm")},
+                                 calibrate, [images])
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    torch.jit.save(quantized, output)
+    size_mb = os.path.getsize(output) / 2 ** 20
+    click.echo(f"Saved the {mode} INT8 model to {output} [ {size_mb:.1f} MB ]")
+
+
+def evaluate_model(model_name: str, test_dir: str, bbox_min_score: float,
+                   iou_threshold: float):
+    """
+    Runs the registry model on the test images and returns its mAP, per
+    image latency and RSS. Runs in a fresh process, so that the RSS is of
+    the single model.
+    """
+    from commands.map_score import registry_model_detector, export_detections
+    from mystique.metrics.average_precision import mean_average_precision
+
+    base_rss = _rss_mb()
+    get_bboxes = registry_model_detector(model_name)
+    model_rss = _rss_mb() - base_rss
+    with tempfile.TemporaryDirectory() as out_dir:
+        gt_dir = os.path.join(out_dir, "ground-truth")
+        pred_dir = os.path.join(out_dir, "predicted")
+        latencies = export_detections(get_bboxes, test_dir, gt_dir, pred_dir,
+                                      bbox_min_score)
+        m_ap, class_aps = mean_average_precision(
+            gt_dir, pred_dir, iou_threshold=iou_threshold)
+    latencies = np.array(latencies) * 1000
+    report = {
+        "model": model_name,
+        "mAP": m_ap,
+        "latency_mean_ms": latencies.mean(),
+        "latency_p50_ms": np.percentile(latencies, 50),
+        "latency_p95_ms": np.percentile(latencies, 95),
+        "model_rss_mb": model_rss,
+        "rss_mb": _rss_mb()
+    }
+    report.update({f"AP_{name}": ap for name, ap in class_aps.items()})
+    return report
+
+
+@quantize_detr.command()
+@click.option(
+    "--test-dir",
+    help="Test image directory, it should be labelmg generated directory",
+    default="data/test")
+@click.option(
+    "--model-name",
+    "model_names",
+    type=click.Choice(list(config.MODEL_REGISTRY)),
+    help="MODEL_REGISTRY models to compare, can be repeated",
+    multiple=True,
+    default=REPORT_MODELS)
+@click.option(
+    "--bbox-min-score",
+    help="Minimum bbox score from the model to be considered.",
+    default=0.8)
+@click.option(
+    "--iou-threshold",
+    help="Minimum IOU of a true positive detection",
+    default=0.5)
+@click.option(
+    "--report-path",
+    help="Write the report as csv",
+    default=None)
+def report(test_dir, model_names, bbox_min_score, iou_threshold,
+           report_path):
+    """
+    Compares the mAP, per image latency and RSS of the models on the test
+    images.
+    """
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for model_name in model_names:
+        with context.Pool(1) as pool:
+            rows.append(pool.apply(evaluate_model,
+                                   (model_name, test_dir, bbox_min_score,
+                                    iou_threshold)))
+    report_df = pd.DataFrame(rows).set_index("model")
+    click.echo(report_df.round(4).to_string())
+    if report_path:
+        report_df.to_csv(report_path)
+
+
+if __name__ == "__main__":
+    quantize_detr()
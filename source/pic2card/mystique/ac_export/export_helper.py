@@ -8,55 +8,51 @@ class AcContainerExport:
     This class is responsible for calling the appropriate design templates
     for the container structure.
     """
-    def __init__(self, design_object, export_object):
-        self.design_object = design_object
+    def __init__(self, layout_tree, node, export_object):
+        self.layout_tree = layout_tree
+        self.node = node
+        self.design_object = node.element
         self.export_object = export_object
         self.object_template = AdaptiveCardTemplate()
 
+    def _export_container(self, body, items_key=None) -> None:
+        """
+        Appends the container's design template and exports the container's
+        items into it, or next to it when the items key is not given.
+        @param body: adaptive card json body
+        @param items_key: key of the template's items list
+        """
+        template_object = getattr(self.object_template, self.node.object)
+        body.append(template_object(self.design_object))
+        if items_key:
+            body = body[-1].get(items_key, [])
+        self.export_object.export_card_body(body, self.layout_tree,
+                                            self.node.index)
+
     def columnset(self, body) -> None:
         """
         Returns the design element template for the column-set container
         @param body: design element's layout structure
         """
-        template_object = getattr(self.object_template,
-                                  self.design_object.get("object", ""))
-        body.append(template_object(self.design_object))
-        body = body[-1].get("columns", [])
-        self.export_object.export_card_body(body,
-                                            self.design_object.get("row", []))
+        self._export_container(body, "columns")
 
     def column(self, body) -> None:
         """
         Returns the design element template for the column container
         @param body: design element's layout structure
         """
-        template_object = getattr(self.object_template,
-                                  self.design_object.get("object", ""))
-        body.append(template_object(self.design_object))
-        body = body[-1].get("items", [])
-        self.export_object.export_card_body(
-            body, self.design_object.get("column", {}).get("items", []))
+        self._export_container(body, "items")
 
     def imageset(self, body) -> None:
         """
         Returns the design element template for the image-set container
         @param body: design element's layout structure
         """
-        template_object = getattr(self.object_template,
-                                  self.design_object.get("object", ""))
-        body.append(template_object(self.design_object))
-        body = body[-1].get("images", [])
-        self.export_object.export_card_body(
-            body, self.design_object.get("imageset", {}).get("items", []))
+        self._export_container(body, "images")
 
     def choiceset(self, body) -> None:
         """
         Returns the design element template for the choice-set container
         @param body: design element's layout structure
         """
-        template_object = getattr(self.object_template,
-                                  self.design_object.get("object", ""))
-        body.append(template_object(self.design_object))
-        # body = body[-1].get("choices", [])
-        self.export_object.export_card_body(
-            body, self.design_object.get("choiceset", {}).get("items", []))
+        self._export_container(body)
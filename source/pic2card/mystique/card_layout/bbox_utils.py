@@ -2,7 +2,9 @@
 - IOU finding
 - nosie objects [ i.e overlapping objects ] removal
 """
-from typing import List, Dict, Union
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
 
 from mystique import config
 
@@ -65,6 +67,36 @@ def find_iou(coord1, coord2, inter_object=False,
     return [False]
 
 
+def find_iou_matrix(boxes: np.ndarray,
+                    inter_object=False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized `find_iou` over all the pairs of the given boxes.
+    @param boxes: n x 4 array of xmin, ymin, xmax, ymax
+    @param inter_object: check for cleaning between different overlapping
+                         objects.
+    @return: n x n intersection matrix [ same as find_iou's first value ],
+             area of each box
+    """
+    iou_width = (np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+                 - np.maximum(boxes[:, None, 0], boxes[None, :, 0]))
+    iou_height = (np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+                  - np.maximum(boxes[:, None, 1], boxes[None, :, 1]))
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intersection_area = iou_width * iou_height
+        union_area = areas[:, None] + areas[None, :] - intersection_area
+        iou = intersection_area / union_area
+        smaller_overlap = (intersection_area
+                           / np.minimum(areas[:, None], areas[None, :]))
+        intersects = ((union_area == 0)
+                      | (iou >= config.IOU_THRESHOLD)
+                      | ((iou <= config.IOU_THRESHOLD)
+                         & (smaller_overlap >= 0.50)))
+        if inter_object:
+            intersects |= iou > 0
+    return (iou_width > 0) & (iou_height > 0) & intersects, areas
+
+
 def remove_actionset_textbox_overlapping(design_object1: Dict,
                                          design_object2: Dict,
                                          box1: List[float],
@@ -108,36 +140,52 @@ def remove_noise_objects(json_objects: Dict):
     """
     Removes all noisy objects by eliminating all smaller and intersecting
             objects within / with the bigger objects.
+    The pairwise intersections are found at once as matrices and only the
+    intersecting pairs are visited in the same order as the pairwise
+    comparison, as the removal of a pair depends on the earlier removals.
     @param json_objects: list of detected objects.
     """
-    points = []
-    for deisgn_object in json_objects["objects"]:
-        points.append(deisgn_object.get("coords"))
-    positions_to_delete = []
-    for ctr, point in enumerate(points):
-        box1 = point
-        for ctr1 in range(ctr + 1, len(points)):
-            box2 = points[ctr1]
-            # check if there's a textbox vs actionset overlap
-            # remove the textbox
-            position = remove_actionset_textbox_overlapping(
-                json_objects["objects"][ctr],
-                json_objects["objects"][ctr1],
-                box1, box2, ctr, ctr1)
-            if position:
-                positions_to_delete.append(position)
-            else:
-                iou = find_iou(box1, box2)
-                if iou[0]:
-                    box1_area = iou[1]
-                    box2_area = iou[2]
-                    if (box1_area > box2_area
-                            and ctr1 not in positions_to_delete):
-                        positions_to_delete.append(ctr1)
-                    elif ctr not in positions_to_delete:
-                        positions_to_delete.append(ctr)
-    points = [p for ctr, p in enumerate(
-        points) if ctr not in positions_to_delete]
+    design_objects = json_objects["objects"]
+    points = [deisgn_object.get("coords") for deisgn_object in design_objects]
+    if len(points) < 2:
+        return
+    boxes = np.asarray(points)
+    object_names = [deisgn_object.get("object", "")
+                    for deisgn_object in design_objects]
+    is_textbox = np.array([name == "textbox" for name in object_names])
+    is_actionset = np.array([name == "actionset" for name in object_names])
+
+    # textbox vs actionset overlap, the textbox is removed if its top-left
+    # lies inside the other object or if both intersects.
+    actionset_textbox_pairs = ((is_textbox[:, None] & is_actionset[None, :])
+                               | (is_actionset[:, None] & is_textbox[None, :]))
+    contains = ((boxes[None, :, 0] <= boxes[:, None, 0])
+                & (boxes[:, None, 0] <= boxes[None, :, 2])
+                & (boxes[None, :, 1] <= boxes[:, None, 1])
+                & (boxes[:, None, 1] <= boxes[None, :, 3]))
+    inter_object_overlap, _ = find_iou_matrix(boxes, inter_object=True)
+    indices = np.arange(len(points))
+    textbox_positions = np.where(is_textbox[:, None], indices[:, None],
+                                 indices[None, :])
+    # textbox at the position 0 is not removed by the actionset check and
+    # falls back to the iou check.
+    textbox_removals = (actionset_textbox_pairs
+                        & (contains | inter_object_overlap)
+                        & (textbox_positions != 0))
+    overlap, areas = find_iou_matrix(boxes)
+
+    positions_to_delete = set()
+    candidates = np.triu(textbox_removals | overlap, k=1)
+    for ctr, ctr1 in zip(*np.nonzero(candidates)):
+        if textbox_removals[ctr, ctr1]:
+            positions_to_delete.add(int(textbox_positions[ctr, ctr1]))
+        elif (areas[ctr] > areas[ctr1]
+                and ctr1 not in positions_to_delete):
+            positions_to_delete.add(int(ctr1))
+        else:
+            positions_to_delete.add(int(ctr))
+    points = {tuple(point) for ctr, point in enumerate(points)
+              if ctr not in positions_to_delete}
     json_objects["objects"] = [deisgn_object for deisgn_object in
-                               json_objects["objects"] if
-                               deisgn_object.get("coords") in points]
+                               design_objects if
+                               tuple(deisgn_object.get("coords")) in points]
@@ -1,11 +1,12 @@
 """Module responsible for merging the same type items into it's respective
 containers like image-set[images], choice-set[radio-buttons]. This merging
 criteria is checked for both root level and column level elements """
-from typing import List, Dict, Union
+from typing import List, Union
 
 from .objects_group import ChoicesetGrouping
-from .objects_group import ImageGrouping
+from .objects_group import ImageGrouping, ObjectIndex
 from .ds_helper import DsHelper, ContainerTemplate
+from .layout_tree import LayoutTree
 
 
 class ContainerGroup:
@@ -14,76 +15,66 @@ class ContainerGroup:
     or in the root level of the card layout design
     """
 
-    def collect_items_for_container(self, card_layout: List[Dict],
+    def collect_items_for_container(self, layout_tree: LayoutTree,
+                                    index: int,
                                     object_class: int) -> [List, List]:
         """
         Gets the list of individual design items of a given type of container
-        from the passed layout structure.
-        @param card_layout: Container of design elements
+        from the children of the passed layout tree node.
+        @param layout_tree: layout tree of the design elements
+        @param index: index of the container node
         @param object_class: type of the design elements to be returned
 
-        @return: The list design elements of given type and the list of
-                 other elements inside the passed container
+        @return: The node indices of the design elements of given type and
+                 of the other elements inside the passed container
         """
         items = []
-        for design_object in card_layout:
-            if design_object.get("class", 0) == object_class:
-                items.append(design_object)
-        remaining_items = [design_object for design_object in card_layout
-                           if design_object not in items]
+        remaining_items = []
+        nodes = layout_tree.nodes
+        for child in nodes[index].children:
+            if nodes[child].element.get("class", 0) == object_class:
+                items.append(child)
+            else:
+                remaining_items.append(child)
         return items, remaining_items
 
-    def add_merged_items(self, design_items: List[Dict],
-                         card_layout: List[Dict],
+    def add_merged_items(self, design_items: List[int],
+                         layout_tree: LayoutTree,
+                         index: int,
                          object_type: str,
                          grouping_object: Union[ImageGrouping,
                                                 ChoicesetGrouping],
-                         grouping_condition: bool) -> List[Dict]:
+                         grouping_condition: bool) -> None:
         """
-        Returns the grouped layout structure for the given grouping object type
-        @param design_items: list of design items to be grouped.
-        @param card_layout: the container structure where the design
-                                 elements needs to be grouped
+        Groups the given design items of the container node into new
+        containers of the given grouping object type
+        @param design_items: node indices of the design items to be grouped.
+        @param layout_tree: layout tree of the design elements
+        @param index: index of the container node where the design
+                      elements needs to be grouped
         @param object_type: type of grouping
         @param grouping_object: grouping logic object
         @param grouping_condition: grouping condition for the given type
-        @param order_key: positional key for the container by which it has to
-                          be sorted [ x-way or y-way ]
-        @return: The new layout structure after grouping
         """
-
-        container_items = grouping_object.object_grouping(design_items,
-                                                          grouping_condition)
+        nodes = layout_tree.nodes
+        container_items = grouping_object.index_grouping(
+            ObjectIndex([nodes[item].element for item in design_items]),
+            range(len(design_items)), grouping_condition)
         ds_template = DsHelper()
         for items in container_items:
             if len(items) > 1:
-                sorted_items = []
+                container = ds_template.add_element_to_ds(
+                    object_type, layout_tree, index)
                 for item in items:
-                    if items.count(item) == 1:
-                        sorted_items.append(item)
-                    elif items.count(item) > 1 and item not in sorted_items:
-                        sorted_items.append(item)
-                items = sorted_items
-                ds_template.add_element_to_ds(object_type, card_layout)
-                coordinates = []
-                key = [key for key, values in
-                       card_layout[-1][object_type].items()
-                       if isinstance(values, list)][0]
-                for item in items:
-                    card_layout[-1][object_type][key].append(item)
-                    coordinates.append(item.get("coordinates", []))
-
+                    layout_tree.move_node(design_items[item], container)
                 container_coords = [c.get("coordinates")
-                                    for c in card_layout[-1][object_type][key]]
-                card_layout[-1][
+                                    for c in nodes[container].items]
+                nodes[container].element[
                     "coordinates"] = ds_template.build_container_coordinates(
                         container_coords)
 
-                card_layout = [item for item in
-                               card_layout if item not in items]
-        return card_layout
-
-    def merge_column_items(self, card_layout: List[Dict],
+    def merge_column_items(self, layout_tree: LayoutTree,
+                           index: int,
                            object_class: int,
                            grouping_type: str,
                            grouping_object: Union[ImageGrouping,
@@ -93,7 +84,8 @@ class ContainerGroup:
         """
         Calls the object grouping for list of design element inside a particular
         column.
-        @param card_layout: the generated layout structure
+        @param layout_tree: the generated layout tree
+        @param index: index of the node whose column-sets are grouped
         @param object_class: The class value of the grouping container
         @param grouping_type: The name of the container type
         @param grouping_object: The object of the respective grouping class
@@ -102,58 +94,37 @@ class ContainerGroup:
         @param order_key:positional key for the container by which it has to
                           be sorted [ x-way or y-way ]
         """
+        nodes = layout_tree.nodes
+        for child in nodes[index].children:
+            if nodes[child].object != "columnset":
+                continue
+            for column in nodes[child].children:
+                items, remaining_items = self.collect_items_for_container(
+                    layout_tree, column, object_class)
+                # order the container elements based on the order_key
+                items = sorted(items, key=lambda item: nodes[
+                    item].element.get("coordinates")[order_key])
+                self.add_merged_items(items, layout_tree, column,
+                                      grouping_type, grouping_object,
+                                      grouping_condition)
+                layout_tree.sort_children(
+                    column, lambda element: element.get("coordinates")[1])
 
-        for row_counter, design_object in enumerate(card_layout):
-            if design_object.get("object") == "columnset":
-                columns = design_object.get("row", [])
-                for column_counter, column_item in enumerate(columns):
-                    items, remaining_items = self.collect_items_for_container(
-                        column_item.get("column", {}).get("items", []),
-                        object_class)
-                    # order the container elements based on the order_key
-                    order = [item.get("coordinates")[order_key] for item in
-                             items]
-                    items = [value for _, value in sorted(
-                        zip(order, items),
-                        key=lambda value: value[0])]
-                    remaining_items = [remaining_item
-                                       for remaining_item in remaining_items
-                                       if design_object.get("object",
-                                                            "") == "columnset"]
-
-                    row_columns = card_layout[row_counter]["row"]
-                    card_layout[row_counter]["row"][column_counter]["column"][
-                        "items"] = self.add_merged_items(
-                            items,
-                            row_columns[column_counter]["column"]["items"],
-                            grouping_type, grouping_object,
-                            grouping_condition)
-                    column_y_minimums = [c.get("coordinates")[1]
-                                         for c in row_columns[column_counter][
-                                             "column"]["items"]]
-                    card_layout[row_counter]["row"][
-                        column_counter]["column"]["items"] = [
-                            value for _, value in sorted(
-                                zip(column_y_minimums,
-                                    row_columns[column_counter]["column"][
-                                        "items"]),
-                                key=lambda value: value[0])]
-
-                    if remaining_items:
-                        self.merge_column_items(
-                            row_columns[column_counter]["column"]["items"],
-                            object_class,
-                            grouping_type,
-                            grouping_object,
-                            grouping_condition,
-                            order_key)
+                if remaining_items:
+                    self.merge_column_items(
+                        layout_tree, column,
+                        object_class,
+                        grouping_type,
+                        grouping_object,
+                        grouping_condition,
+                        order_key)
 
-    def merge_items(self, card_layout: List[Dict]) -> List[Dict]:
+    def merge_items(self, layout_tree: LayoutTree) -> LayoutTree:
         """
         Calls the object grouping for list of design element in the root level
         of the design.
-        @param card_layout: the generated layout structure
-        @return: Grouped layout structure
+        @param layout_tree: the generated layout tree
+        @return: Grouped layout tree
         """
         # get the list of container names for merging the items
         container_items = DsHelper.MERGING_CONTAINERS_LIST
@@ -161,6 +132,6 @@ class ContainerGroup:
         for container_name in container_items:
             container_template_object = getattr(container_template,
                                                 container_name)
-            card_layout = container_template_object(card_layout, self)
+            layout_tree = container_template_object(layout_tree, self)
 
-        return card_layout
+        return layout_tree
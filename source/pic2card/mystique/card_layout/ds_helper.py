@@ -1,10 +1,58 @@
 """Module responsible for all the utilities and template classes needed for
 the layout generation"""
-from typing import List, Tuple, Dict, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple, Union
 
 from .objects_group import ImageGrouping
 from .objects_group import ChoicesetGrouping
 
+if TYPE_CHECKING:
+    from .layout_tree import LayoutTree
+
+
+class ObjectStore:
+    """
+    Per request store of the design objects keyed by their uuid, the
+    layout stages look an object up from the store instead of scanning the
+    whole list of design objects.
+    For a repeated uuid the first design object is kept.
+    """
+
+    def __init__(self, design_objects: Iterable[Dict] = ()):
+        """
+        @param design_objects: design objects with the properties
+        """
+        self.objects = {}
+        for design_object in design_objects:
+            self.add(design_object)
+
+    def add(self, design_object: Dict) -> None:
+        """
+        Adds the design object to the store.
+        @param design_object: design object to be added
+        """
+        self.objects.setdefault(design_object.get("uuid", ""), design_object)
+
+    def get(self, uuid: str, default=None) -> Dict:
+        """
+        Returns the design object of the uuid or the default.
+        @param uuid: uuid of the design object
+        @param default: value returned for an unknown uuid
+        @return: the stored design object
+        """
+        return self.objects.get(uuid, default)
+
+    def __getitem__(self, uuid: str) -> Dict:
+        return self.objects[uuid]
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self.objects
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.objects.values())
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
 
 class DsHelper:
     """
@@ -19,38 +67,6 @@ class DsHelper:
         self.serialized_layout = []
         self.ds_template = DsDesignTemplate()
 
-    def merge_properties(self,
-                         properties: List[Dict],
-                         design_object: List[Dict],
-                         container_details_object: object
-                         ) -> None:
-        """
-        Merges the design objects with properties with the appropriate layout
-        structure with the help of the uuid.
-        @param properties: design objects with properties
-        @param design_object: layout data structure
-        @param container_details_object: ContainerDetailsTemplate object
-        """
-        if (isinstance(design_object, dict) and
-                design_object.get("object", "") not in DsHelper.CONTAINERS):
-            extracted_properties = [prop for prop in properties
-                                    if prop.get("uuid", "") ==
-                                    design_object.get("uuid")][0]
-            extracted_properties.pop("coords")
-            design_object.update(extracted_properties)
-
-        elif isinstance(design_object, list):
-            for design_obj in design_object:
-                self.merge_properties(properties, design_obj,
-                                      container_details_object)
-        else:
-            container_details_template_object = getattr(
-                container_details_object, design_object.get("object", ""))
-            self.merge_properties(
-                properties,
-                container_details_template_object(design_object),
-                container_details_object)
-
     def export_debug_string(self, serialized_layout: List,
                             design_object: Union[List, Dict],
                             card_layout: List[Dict],
@@ -102,21 +118,25 @@ class DsHelper:
                                  indentation=0)
         return self.serialized_layout
 
-    def add_element_to_ds(self, element_type: str, card_layout: List,
-                          element=None) -> None:
+    def add_element_to_ds(self, element_type: str,
+                          layout_tree: "LayoutTree", parent: int,
+                          element=None) -> int:
         """
-        Adds the design element structure to the layout data structure.
+        Adds the design element structure to the layout tree.
         @param element_type: type of passed design element [ individual /
                              any container]
-        @param card_layout: layout structure where the design element
-                                 has to be added
+        @param layout_tree: layout tree where the design element has to be
+                            added
+        @param parent: index of the node the design element is added to
         @param element: design element to be added
+        @return: index of the parent's last child node
         """
         element_structure_object = getattr(self.ds_template,
                                            element_type)
         element_structre = element_structure_object(element)
-        if element_structre not in card_layout:
-            card_layout.append(element_structure_object(element))
+        if element_structre not in layout_tree.nodes[parent].items:
+            layout_tree.add_node(element_structre, parent)
+        return layout_tree.nodes[parent].children[-1]
 
     def build_container_coordinates(self, coordinates: List) -> Tuple:
         """
@@ -294,39 +314,45 @@ class ContainerTemplate:
     - Handles the functionalies needed for different type of container
     groupings.
     """
-    def imageset(self, card_layout: List[Dict],
-                 containers_group_object) -> List[Dict]:
+    def imageset(self, layout_tree: "LayoutTree",
+                 containers_group_object) -> "LayoutTree":
         """
-        Groups and returns the layout structure with the respective image-sets
-        @param card_layout: Un-grouped layout structure.
+        Groups the layout tree's images into the respective image-sets
+        @param layout_tree: Un-grouped layout tree.
         @param containers_group_object: ContainerGroup object
-        @return: Grouped layout structure
+        @return: Grouped layout tree
         """
         image_grouping = ImageGrouping(self)
         condition = image_grouping.imageset_condition
+        root = layout_tree.ROOT
         containers_group_object.merge_column_items(
-            card_layout, 5, "imageset", image_grouping, condition, 0)
+            layout_tree, root, 5, "imageset", image_grouping, condition, 0)
         items, _ = containers_group_object.collect_items_for_container(
-            card_layout, 5)
-        return containers_group_object.add_merged_items(
-            items, card_layout, "imageset", image_grouping, condition)
+            layout_tree, root, 5)
+        containers_group_object.add_merged_items(
+            items, layout_tree, root, "imageset", image_grouping, condition)
+        return layout_tree
 
-    def choiceset(self, card_layout: List[Dict],
-                  containers_group_object) -> List[Dict]:
+    def choiceset(self, layout_tree: "LayoutTree",
+                  containers_group_object) -> "LayoutTree":
         """
-        Groups and returns the layout structure with the respective choice-sets
-        @param card_layout: Un-grouped layout structure.
+        Groups the layout tree's radio buttons into the respective
+        choice-sets
+        @param layout_tree: Un-grouped layout tree.
         @param containers_group_object: ContainerGroup object
-        @return: Grouped layout structure
+        @return: Grouped layout tree
         """
         choice_grouping = ChoicesetGrouping(self)
         condition = choice_grouping.choiceset_condition
+        root = layout_tree.ROOT
         containers_group_object.merge_column_items(
-            card_layout, 2, "choiceset", choice_grouping, condition, 1)
+            layout_tree, root, 2, "choiceset", choice_grouping, condition, 1)
         items, _ = containers_group_object.collect_items_for_container(
-            card_layout, 2)
-        return containers_group_object.add_merged_items(
-            items, card_layout, "choiceset", choice_grouping, condition)
+            layout_tree, root, 2)
+        containers_group_object.add_merged_items(
+            items, layout_tree, root, "choiceset", choice_grouping,
+            condition)
+        return layout_tree
 
 
 class ContainerDetailTemplate:
@@ -0,0 +1,190 @@
+"""Module for the typed layout tree, a flat node model of the hierarchical
+card layout that the post layout passes traverse by the node indices"""
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+from .ds_helper import DsHelper, ObjectStore
+
+
+class LayoutNode:
+    """
+    Node of the layout tree, refers to the parent and the children by their
+    index in the tree.
+    The node's element is the layout structure's own dict, so the
+    properties set on a node are seen by the dict form of the layout. The
+    items of a container [ and of the root ] is the element's list of the
+    children's dicts, kept in the order of the children by the tree.
+    """
+    __slots__ = ("index", "object", "element", "parent", "children",
+                 "items", "is_container")
+
+    def __init__(self, index: int, element: Union[Dict, None],
+                 parent: int, items: List[Dict] = None):
+        """
+        @param index: index of the node in the tree
+        @param element: layout dict of the design element or container
+        @param parent: index of the parent node
+        @param items: dict form of the root's children
+        """
+        self.index = index
+        self.element = element
+        self.parent = parent
+        self.children = []
+        self.object = element.get("object", "") if element else "card"
+        self.is_container = self.object in DsHelper.CONTAINERS
+        self.items = items
+        if self.is_container:
+            if self.object == "columnset":
+                self.items = element.setdefault("row", [])
+            else:
+                self.items = element.setdefault(
+                    self.object, {}).setdefault("items", [])
+
+
+class LayoutTree:
+    """
+    Flat list of the layout nodes, the root node is the card body and its
+    children are the root level elements of the layout.
+    The layout builder adds the nodes directly, the dict form of the layout
+    is kept in step by the node updates and is handed out by `to_layout`.
+    """
+    __slots__ = ("nodes",)
+    ROOT = 0
+
+    def __init__(self, card_layout: List[Dict] = None):
+        """
+        @param card_layout: dict form of the root's children
+        """
+        self.nodes = [LayoutNode(self.ROOT, None, -1,
+                                 [] if card_layout is None else card_layout)]
+
+    @classmethod
+    def from_layout(cls, card_layout: List[Dict]) -> "LayoutTree":
+        """
+        Builds the tree from the dict form of the layout structure, for the
+        callers handing over a dict layout.
+        @param card_layout: generated layout structure
+        @return: layout tree sharing the layout's dicts
+        """
+        tree = cls(card_layout)
+        stack = [cls.ROOT]
+        while stack:
+            parent = stack.pop()
+            for element in tree.nodes[parent].items:
+                index = tree._link_node(element, parent)
+                if tree.nodes[index].is_container:
+                    stack.append(index)
+        return tree
+
+    def _link_node(self, element: Dict, parent: int) -> int:
+        """
+        Adds the node of the element as the last child of the parent node,
+        leaving the parent's items to the caller.
+        @param element: layout dict of the design element or container
+        @param parent: index of the parent node
+        @return: index of the added node
+        """
+        index = len(self.nodes)
+        self.nodes.append(LayoutNode(index, element, parent))
+        self.nodes[parent].children.append(index)
+        return index
+
+    def add_node(self, element: Dict, parent: int) -> int:
+        """
+        Adds the element as the last child of the parent node.
+        @param element: layout dict of the design element or container
+        @param parent: index of the parent node
+        @return: index of the added node
+        """
+        self.nodes[parent].items.append(element)
+        return self._link_node(element, parent)
+
+    def remove_node(self, index: int) -> None:
+        """
+        Removes the node [ and its descendants ] from its parent's
+        children.
+        @param index: index of the node
+        """
+        node = self.nodes[index]
+        parent = self.nodes[node.parent]
+        position = parent.children.index(index)
+        del parent.children[position]
+        del parent.items[position]
+        node.parent = -1
+
+    def move_node(self, index: int, parent: int) -> None:
+        """
+        Moves the node as the last child of the given parent node.
+        @param index: index of the node
+        @param parent: index of the new parent node
+        """
+        self.remove_node(index)
+        node = self.nodes[index]
+        node.parent = parent
+        self.nodes[parent].children.append(index)
+        self.nodes[parent].items.append(node.element)
+
+    def sort_children(self, index: int, key: Callable[[Dict], Any]) -> None:
+        """
+        Stable sort of the node's children by the key of their elements.
+        @param index: index of the node
+        @param key: sort key of a child's layout dict
+        """
+        node = self.nodes[index]
+        order = sorted(range(len(node.children)),
+                       key=lambda position: key(node.items[position]))
+        node.children[:] = [node.children[position] for position in order]
+        node.items[:] = [node.items[position] for position in order]
+
+    def to_layout(self) -> List[Dict]:
+        """
+        Returns the dict form of the layout, for the callers of the dict
+        layout structure.
+        @return: layout structure
+        """
+        return self.nodes[self.ROOT].items
+
+    def child_elements(self, index: int) -> List[Dict]:
+        """
+        Returns the layout dicts of the node's children.
+        @param index: index of the node
+        @return: list of the children's layout dicts
+        """
+        nodes = self.nodes
+        return [nodes[child].element for child in nodes[index].children]
+
+    def walk(self, index: int = ROOT) -> Iterator[LayoutNode]:
+        """
+        Yields the node's descendants in the layout order.
+        @param index: index of the node
+        """
+        nodes = self.nodes
+        stack = list(reversed(nodes[index].children))
+        while stack:
+            node = nodes[stack.pop()]
+            yield node
+            stack.extend(reversed(node.children))
+
+
+def merge_properties(properties: Union[ObjectStore, List[Dict]],
+                     layout_tree: LayoutTree) -> LayoutTree:
+    """
+    Merges the design objects with properties with the appropriate layout
+    structure with the help of the uuid.
+    @param properties: ObjectStore or list of the design objects with
+                       properties
+    @param layout_tree: LayoutTree of the layout structure
+    @return: the merged tree
+    """
+    if not isinstance(properties, ObjectStore):
+        properties = ObjectStore(properties)
+    for node in layout_tree.walk():
+        if node.is_container:
+            continue
+        design_object = node.element
+        uuid = design_object.get("uuid")
+        if uuid not in properties:
+            raise IndexError(f"no properties for the design object {uuid}")
+        extracted_properties = properties[uuid]
+        extracted_properties.pop("coords")
+        design_object.update(extracted_properties)
+    return layout_tree
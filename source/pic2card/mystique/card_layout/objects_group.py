@@ -1,9 +1,37 @@
 """Module for grouping deisgn objects into different containers"""
-from typing import List, Dict, Callable, Tuple
+from typing import List, Dict, Callable, Iterable, Tuple
 
 from mystique import config
 
 
+class ObjectIndex:
+    """
+    Plain coordinate and name arrays of a list of design objects, so that
+    the grouping refers to the objects by their integer index instead of
+    comparing the object dicts.
+    """
+
+    def __init__(self, design_objects: List[Dict]):
+        """
+        @param design_objects: design objects or layout items
+        """
+        self.objects = design_objects
+        self.coords = [tuple(obj.get("coords", obj.get("coordinates")))
+                       for obj in design_objects]
+        self.names = [obj.get("object", "") for obj in design_objects]
+
+    def sort(self, indices: Iterable[int], axis: int) -> List[int]:
+        """
+        Stable sort of the indices by the x minimum [ axis 0 ] or the y
+        minimum [ axis 1 ] of the objects.
+        @param indices: object indices
+        @param axis: 0 for x-way, 1 for y-way
+        @return: sorted indices
+        """
+        coords = self.coords
+        return sorted(indices, key=lambda index: coords[index][axis])
+
+
 class GroupObjects:
     """
     Handles the grouping of given list of objects for any set conditions that
@@ -85,6 +113,43 @@ class GroupObjects:
                     "coords", design_objects.get("coordinates"))
             }
 
+    def index_grouping(self, object_index: "ObjectIndex",
+                       indices: Iterable[int],
+                       condition: Callable[[List, List],
+                                           bool]) -> List[List[int]]:
+        """
+        Groups the design objects of the given indices for the given
+        condition.
+        Sweeps through the x/y based sorted indices and checks each object
+        against the running coordinates of the last group, the object is
+        either added to the last group [ extending its coordinates ] or
+        starts a new group.
+        @param object_index: ObjectIndex of the design objects
+        @param indices: sorted indices of the objects to be grouped
+        @param condition: Grouping condition function
+        @return: Grouped list of object indices.
+        """
+        coords = object_index.coords
+        names = object_index.names
+        groups = []
+        group_coords = None
+        group_tag = None
+        for index in indices:
+            bbox_2 = list(coords[index])
+            bbox_2.append(names[index])
+            if groups:
+                bbox_1 = group_coords + [group_tag]
+                if condition(bbox_1, bbox_2):
+                    groups[-1].append(index)
+                    group_coords = self._update_coords(bbox_1, bbox_2)
+                    if names[index] == "image":
+                        group_tag = "image"
+                    continue
+            groups.append([index])
+            group_coords = bbox_2[:4]
+            group_tag = "image" if names[index] == "image" else "group"
+        return groups
+
     def object_grouping(self, design_objects: List[Dict],
                         condition: Callable[[List, List],
                                             bool]) -> List[List[Dict]]:
@@ -98,37 +163,10 @@ class GroupObjects:
         @param condition: Grouping condition function
         @return: Grouped list of design objects.
         """
-        groups = []
-        for ctr, design_object in enumerate(design_objects):
-            if not groups:
-                groups.append(self.update_group_objects(design_object))
-            if groups:
-                bbox_1 = list(groups[-1].get("coordinates"))
-                bbox_2 = list(design_object.get(
-                    "coords", design_object.get("coordinates")))
-                object_names = [obj.get("object") for obj in
-                                groups[-1].get("objects")]
-                if "image" in object_names:
-                    bbox_1.append("image")
-                else:
-                    bbox_1.append("group")
-                bbox_2.append(design_object.get("object", ""))
-
-                if condition(bbox_1, bbox_2):
-                    objects = groups[-1].get("objects")
-                    if design_object not in objects:
-                        objects.append(design_object)
-                        coordinates = self._update_coords(bbox_1, bbox_2)
-                        groups[-1].update(self.update_group_objects(
-                            objects, coordinates=coordinates))
-                else:
-
-                    if design_object not in groups[-1].get("objects"):
-                        groups.append(self.update_group_objects(design_object))
-        # TODO: this updated coordinates removal will be removed after the
-        #  row-column grouping optimization works
-        groups = [gr.get("objects") for gr in groups]
-        return groups
+        groups = self.index_grouping(ObjectIndex(design_objects),
+                                     range(len(design_objects)), condition)
+        return [[design_objects[index] for index in group]
+                for group in groups]
 
     def _check_intersection_over_range(self, bbox_1: List, bbox_2: List,
                                        axis: str, threshold=0.25,
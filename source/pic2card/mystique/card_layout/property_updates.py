@@ -7,7 +7,8 @@ from PIL import Image
 
 from mystique.extract_properties import BaseExtractProperties
 
-from .ds_helper import DsHelper, ContainerDetailTemplate
+from .ds_helper import ContainerDetailTemplate
+from .layout_tree import LayoutTree
 
 
 class DsAlignment:
@@ -26,20 +27,22 @@ class DsAlignment:
         self.base_property = BaseExtractProperties()
 
     def update_or_set_alignment(
-            self, design_object: Union[List, Dict],
-            container_details_object: ContainerDetailTemplate,
+            self, layout_tree: LayoutTree, index: int,
             parent_object=None,
             image=None) -> None:
         """
-        traverse the card layout ds recursively and set/update the horizontal
-        alignment property based on it's respective parent coordinates.
+        traverse the children of the layout tree node and set/update the
+        horizontal alignment property based on it's respective parent
+        coordinates.
+        @param layout_tree: LayoutTree of the card layout
+        @param index: index of the node whose children are updated
         @param image: input pil image
         @param parent_object: parent container object
-        @param design_object: design element to be set or updated
-        @param container_details_object: ContainerDetailTemplate object to
-        extract the container details from the card layout structure.
         """
-        if isinstance(design_object, dict):
+        nodes = layout_tree.nodes
+        for child in nodes[index].children:
+            node = nodes[child]
+            design_object = node.element
             if not parent_object:
                 parent_width = None
                 pil_image = image
@@ -73,42 +76,21 @@ class DsAlignment:
                 })
 
             # set the container's alignment
-            if design_object.get("object", "") in DsHelper.CONTAINERS:
-                container_details_template_object = getattr(
-                    container_details_object,
-                    design_object.get("object", ""))
-                container_items = container_details_template_object(
-                    design_object)
+            if node.is_container:
                 # if a container has only one element, then extract the
                 # alignment based on the line numbers and top values from
                 # pytesseract data.
-                if len(container_items) == 1:
-                    text_data = container_items[0].get("image_data", [])
+                if len(node.children) == 1:
+                    item = nodes[node.children[0]].element
+                    text_data = item.get("image_data", [])
                     if text_data:
                         if self._get_number_of_lines(text_data) > 1:
                             alignment = self.base_property.get_line_alignment(
                                 text_data)
-                            container_items[0].update(
-                                {"horizontal_alignment": alignment})
+                            item.update({"horizontal_alignment": alignment})
                 else:
                     self.update_or_set_alignment(
-                        container_items,
-                        container_details_object,
-                        parent_object=design_object)
-
-        elif isinstance(design_object, list):
-            for design_obj in design_object:
-                # recursively update the alignment
-                if parent_object:
-                    self.update_or_set_alignment(
-                        design_obj,
-                        container_details_object,
-                        parent_object=parent_object)
-                else:
-                    self.update_or_set_alignment(
-                        design_obj,
-                        container_details_object,
-                        image=image)
+                        layout_tree, child, parent_object=design_object)
 
     def _get_number_of_lines(self, text_data: Dict) -> int:
         """
@@ -124,60 +106,55 @@ class DsAlignment:
         number_of_lines = len(number_of_lines)
         return number_of_lines
 
-    def update_conflicting_alignments(
-            self, card_layout: List,
-            container_details_object: ContainerDetailTemplate) -> None:
+    def update_conflicting_alignments(self, layout_tree: LayoutTree,
+                                      index: int) -> None:
         """
         Update the alignment property for the element's with conflicting values
         based on the previous or next element's property inside the container.
         i.e if any element's alignment inside it's parent container satisfies
         more than one alignment value , the conflicting element's alignment is
         determined by it's next or previous element's alignment property.
-        @param card_layout: card layout ds
-        @param container_details_object: ContainerDetailTemplate object to
-        extract the container details from the card layout structure.
+        @param layout_tree: LayoutTree of the card layout
+        @param index: index of the node whose children are updated
         """
-
-        if (isinstance(card_layout, dict) and
-                card_layout.get("object", "") in DsHelper.CONTAINERS):
-            container_details_template_object = getattr(
-                container_details_object, card_layout.get("object", ""))
-            self.update_conflicting_alignments(
-                container_details_template_object(card_layout),
-                container_details_object)
-
-        elif isinstance(card_layout, list):
-            for ctr, design_obj in enumerate(card_layout):
+        nodes = layout_tree.nodes
+        children = nodes[index].children
+        for ctr, child in enumerate(children):
+            design_obj = nodes[child].element
+            if not design_obj.get("horizontal_alignment"):
+
+                if ctr + 1 < len(children):
+                    design_obj.update(
+                        {"horizontal_alignment": nodes[
+                            children[ctr + 1]].element.get(
+                                "horizontal_alignment")})
+                elif ctr - 1 >= 0:
+                    design_obj.update(
+                        {"horizontal_alignment": nodes[
+                            children[ctr - 1]].element.get(
+                                "horizontal_alignment")})
                 if not design_obj.get("horizontal_alignment"):
-
-                    if ctr + 1 < len(card_layout):
-                        design_obj.update(
-                            {"horizontal_alignment": card_layout[
-                                ctr + 1].get("horizontal_alignment")})
-                    elif ctr - 1 >= 0:
-                        design_obj.update(
-                            {"horizontal_alignment": card_layout[
-                                ctr - 1].get("horizontal_alignment")})
-                    if not design_obj.get("horizontal_alignment"):
-                        design_obj.update({"horizontal_alignment": "Left"})
-                self.update_conflicting_alignments(design_obj,
-                                                   container_details_object)
+                    design_obj.update({"horizontal_alignment": "Left"})
+            if nodes[child].is_container:
+                self.update_conflicting_alignments(layout_tree, child)
 
 
-def update_properties(card_layout: List,
+def update_properties(card_layout: Union[List, LayoutTree],
                       container_detail_object: ContainerDetailTemplate,
                       image: Image):
     """
     Entry method handles the calling of different property updations.
-    @param card_layout: card layout ds
+    @param card_layout: card layout ds or its LayoutTree
     @param container_detail_object: ContainerDetailTemplate object to
     extract the container details from the card layout structure
     @param image: Input PIL image
     @return: card layout with the updated or set properties
     """
+    layout_tree = card_layout
+    if not isinstance(card_layout, LayoutTree):
+        layout_tree = LayoutTree.from_layout(card_layout)
     ds_alignment = DsAlignment()
-    ds_alignment.update_or_set_alignment(card_layout, container_detail_object,
+    ds_alignment.update_or_set_alignment(layout_tree, LayoutTree.ROOT,
                                          image=image)
-    ds_alignment.update_conflicting_alignments(card_layout,
-                                               container_detail_object)
+    ds_alignment.update_conflicting_alignments(layout_tree, LayoutTree.ROOT)
     return card_layout
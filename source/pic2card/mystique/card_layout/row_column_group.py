@@ -1,75 +1,129 @@
 """Module responsible for grouping the related row of elements and to it's
 respective columns"""
-from typing import List, Dict
-from multiprocessing import Process, Queue
+import logging
+from typing import Dict, FrozenSet, Iterator, List, Tuple
+from multiprocessing import Queue
 from PIL import Image
 
+from mystique.executors import StageExecutor, get_stage_executor
 from mystique.extract_properties import CollectProperties
+from mystique.shared_image import (SHAREABLE_MODES, SharedImage,
+                                   SharedImageRef, attach_shared_image)
 from .container_group import ContainerGroup
-from .objects_group import RowColumnGrouping
-from .ds_helper import DsHelper, ContainerDetailTemplate
+from .objects_group import ObjectIndex, RowColumnGrouping
+from .ds_helper import DsHelper, ObjectStore
+from .layout_tree import LayoutTree, merge_properties
 
+logger = logging.getLogger("mysitque")
 
-def get_layout_structure(json_objects: List, queue: Queue) -> None:
+
+def get_layout_structure(json_objects: List,
+                         queue: Queue = None) -> LayoutTree:
     """
     method handles the hierarchical layout generating
     @param json_objects: detected list of design objects from the model
     @param queue: Queue object of the calling process
-    @return: generated hierarchical card layout
+    @return: generated hierarchical card layout tree
     """
-    card_layout = []
+    layout_tree = LayoutTree()
     # group row and columns
     # sorting the design objects y way
+    object_index = ObjectIndex(json_objects)
     column_y_minimums = [design_object.get("ymin")
                          for design_object in json_objects]
-
-    json_objects = [value for _, value in sorted(
-                zip(column_y_minimums, json_objects),
-                key=lambda value: value[0])]
+    indices = sorted(range(len(json_objects)),
+                     key=lambda index: column_y_minimums[index])
     row_column_group = RowColumnGroup()
-    row_column_group.row_column_grouping(json_objects, card_layout)
+    row_column_group.row_column_grouping(indices, layout_tree, object_index)
+    logger.debug(f"layout stats: {row_column_group.stats}")
     # merge items to containers
     container_group = ContainerGroup()
-    card_layout = container_group.merge_items(card_layout)
+    layout_tree = container_group.merge_items(layout_tree)
     if queue:
-        queue.put(card_layout)
+        queue.put(layout_tree)
+    return layout_tree
+
+
+def get_object_properties(predict_card_object, design_objects: List,
+                          image_ref: SharedImageRef) -> List:
+    """
+    Stage worker's entry point for the property extraction, builds the
+    design image from the shared block.
+    @param predict_card_object: PredictCard object
+    @param design_objects: detected list of design objects from the model
+    @param image_ref: shared image reference
+    @return: design objects with the properties
+    """
+    with attach_shared_image(image_ref) as image:
+        design_objects = predict_card_object.get_object_properties(
+            design_objects, image)
+        # releasing the mapped image lets the block be unmapped on exit
+        del image
+    return design_objects
 
 
 def generate_card_layout(json_objects: List,
                          image: Image,
-                         predict_card_object=None) -> RowColumnGrouping:
+                         predict_card_object=None,
+                         stage_executor: StageExecutor = None
+                         ) -> List[Dict]:
+    """
+    Returns the dict form of the card layout generated by the
+    generate_layout_tree.
+    @param json_objects: List of extracted design objects
+    @param image: input design image
+    @param predict_card_object: PredictCard object
+    @param stage_executor: executor running the stages, defaults to the
+                           process wide executor
+    @return: card layout with the primitive properties merged
+    """
+    layout_tree = generate_layout_tree(json_objects, image,
+                                       predict_card_object=predict_card_object,
+                                       stage_executor=stage_executor)
+    return layout_tree.to_layout()
+
+
+def generate_layout_tree(json_objects: List,
+                         image: Image,
+                         predict_card_object=None,
+                         stage_executor: StageExecutor = None
+                         ) -> LayoutTree:
     """
     Performs the property extraction and hierarchical layout structuring
-    in parallel and merges both on completion and returns the card layout
+    in parallel and merges both on completion and returns the layout tree
     with the spatial and property details.
+    Any failure or timeout of the stages is raised to the caller.
     @param json_objects: List of extracted design objects
     @param image: input design image
     @param predict_card_object: PredictCard object
-    @return: card layout with the primitive properties merged
+    @param stage_executor: executor running the stages, defaults to the
+                           process wide executor
+    @return: layout tree with the primitive properties merged, the export
+             walks the same tree
     """
-    queue1 = Queue()
-    queue2 = Queue()
+    stage_executor = stage_executor or get_stage_executor()
+    shared_image = None
     try:
-        process1 = Process(target=predict_card_object.get_object_properties,
-                           args=(json_objects["objects"], image, queue1,))
-        process2 = Process(target=get_layout_structure,
-                           args=(json_objects["objects"], queue2,))
-        process1.start()
-        process2.start()
-
-        properties = queue1.get()
-        card_layout = queue2.get()
-
-        process1.join()
-        process2.join()
-        # merge the card layout and extracted properties
-        ds_helper = DsHelper()
-        container_detail_object = ContainerDetailTemplate()
-        ds_helper.merge_properties(properties, card_layout,
-                                   container_detail_object)
-        return card_layout
-    except Exception:
-        return None
+        if image.mode in SHAREABLE_MODES:
+            # only the shared block's reference is pickled to the worker
+            shared_image = SharedImage(image)
+            properties_future = stage_executor.submit(
+                get_object_properties, predict_card_object,
+                json_objects["objects"], shared_image.ref)
+        else:
+            properties_future = stage_executor.submit(
+                predict_card_object.get_object_properties,
+                json_objects["objects"], image)
+        layout_future = stage_executor.submit(get_layout_structure,
+                                              json_objects["objects"])
+        properties = stage_executor.result("properties", properties_future)
+        layout_tree = stage_executor.result("layout", layout_future)
+    finally:
+        if shared_image:
+            shared_image.close()
+    # merge the card layout and extracted properties, the leaves look up
+    # their properties by uuid from the request's object store.
+    return merge_properties(ObjectStore(properties), layout_tree)
 
 
 class RowColumnGroup:
@@ -77,118 +131,144 @@ class RowColumnGroup:
     Groups the predicted design elements into it's related rows and columns
     and generates a hiearchical data structure of grouped elements
     i.e into a column-set container as per adaptive card's notation
+
+    The columns are laid out iteratively with an explicit stack of layout
+    frames instead of recursion. `stats` counts the work done for
+    profiling.
     """
-    same_iteration = False
 
     def __init__(self):
         self.collect_properties = CollectProperties()
         self.ds_helper = DsHelper()
+        # set when a column re-groups into the same objects, i.e the
+        # grouping stops making progress.
+        self.same_iteration = False
+        self.stats = {"max_depth": 0, "frames": 0, "objects": 0}
 
-    def _check_same_iteration(self, previous: List[Dict],
-                              current: List[Dict]) -> bool:
+    def _check_same_iteration(self, previous: FrozenSet[int],
+                              current: List[int]) -> bool:
         """
         Checks the if the previous and current grouped column have same
         objects or not.
-        @param previous: Previous column objects
-        @param current: Current column objects
+        @param previous: Previous column object indices
+        @param current: Current column object indices
         @return: Boolean value of the check
         """
         if not previous:
             return False
-        same = True
-        for item in current:
-            if item not in previous:
-                same = False
-                break
-        return same
-
-    def row_column_grouping(self, design_objects,
-                            card_layout:
-                            List[Dict],
+        return previous.issuperset(current)
+
+    def row_column_grouping(self, design_objects: List[int],
+                            layout_tree: LayoutTree,
+                            object_index: ObjectIndex,
                             previous_column=None
                             ) -> None:
         """
-        Group the detected design elements recursively
-        into columns and column_sets and individual objects, considering each
-        columns as smallest unit [i.e. a separate card hierarchy].
-        @param design_objects: list of detected design objects
-        @param card_layout: layout data structure
-        @param previous_column: previous grouped column objects to check for
-                                same grouping happening repeatedly
+        Group the detected design elements into columns and column_sets and
+        individual objects, considering each columns as smallest unit [i.e.
+        a separate card hierarchy].
+        Each multi-element column is laid out by a frame pushed on the
+        stack.
+        @param design_objects: y-way sorted indices of the detected design
+                               objects
+        @param layout_tree: layout tree the root level elements are added to
+        @param object_index: ObjectIndex of the detected design objects
+        @param previous_column: previous grouped column object indices to
+                                check for same grouping happening repeatedly
+        """
+        previous_column = frozenset(previous_column or ())
+        stack = [self._layout_frame(design_objects, layout_tree,
+                                    LayoutTree.ROOT, object_index,
+                                    previous_column)]
+        while stack:
+            self.stats["max_depth"] = max(self.stats["max_depth"],
+                                          len(stack))
+            try:
+                column, column_node = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                continue
+            stack.append(self._layout_frame(column, layout_tree,
+                                            column_node, object_index,
+                                            frozenset(column)))
+
+    def _layout_frame(self, design_objects: List[int],
+                      layout_tree: LayoutTree,
+                      parent: int,
+                      object_index: ObjectIndex,
+                      previous_column: FrozenSet[int]
+                      ) -> Iterator[Tuple[List[int], int]]:
         """
+        Lays out the design objects under the parent node, yields the
+        multi-element columns [ y-way sorted column indices and the
+        column's node ] to be laid out and resumes once the column is
+        laid out.
+        @param design_objects: y-way sorted indices of the design objects
+        @param layout_tree: layout tree the elements are added to
+        @param parent: index of the node the elements are added to
+        @param object_index: ObjectIndex of the detected design objects
+        @param previous_column: object indices of the column being laid out
+        """
+        self.stats["frames"] += 1
+        self.stats["objects"] += len(design_objects)
+        objects = object_index.objects
+        nodes = layout_tree.nodes
         columns_grouping = RowColumnGrouping()
-        column_sets = columns_grouping.object_grouping(
-            design_objects, columns_grouping.row_condition)
+        column_sets = columns_grouping.index_grouping(
+            object_index, design_objects, columns_grouping.row_condition)
         ds_template = DsHelper()
         for column_set in column_sets:
             if len(column_set) == 1:
-                ds_template.add_element_to_ds("item", card_layout,
-                                              element=column_set[0])
+                ds_template.add_element_to_ds("item", layout_tree, parent,
+                                              element=objects[column_set[0]])
             if len(column_set) > 1:
                 # sort x wise for columns grouping
-                x_mins = [obj.get("coords", obj.get("coordinates"))[0]
-                          for obj in column_set]
-                column_set = [value for _, value in sorted(
-                    zip(x_mins, column_set),
-                    key=lambda value: value[0])]
-
-                columns = columns_grouping.object_grouping(
-                    column_set, columns_grouping.column_condition)
+                column_set = object_index.sort(column_set, 0)
+
+                columns = columns_grouping.index_grouping(
+                    object_index, column_set,
+                    columns_grouping.column_condition)
                 if len(columns) == 1:
                     for element in columns[0]:
-                        ds_template.add_element_to_ds("item", card_layout,
-                                                      element=element)
+                        ds_template.add_element_to_ds(
+                            "item", layout_tree, parent,
+                            element=objects[element])
                 else:
-                    ds_template.add_element_to_ds("row", card_layout)
-                    row_counter = len(card_layout) - 1
+                    row = ds_template.add_element_to_ds("row", layout_tree,
+                                                        parent)
                     for column in columns:
                         if len(column) == 1:
-                            row_columns = card_layout[row_counter]["row"]
-                            ds_template.add_element_to_ds("column", row_columns)
+                            column_node = ds_template.add_element_to_ds(
+                                "column", layout_tree, row)
                             ds_template.add_element_to_ds(
-                                "item",
-                                row_columns[-1]["column"]["items"],
-                                element=column[0])
-                            card_layout[row_counter]["row"][-1][
-                                "coordinates"] = column[0].get("coords")
+                                "item", layout_tree, column_node,
+                                element=objects[column[0]])
+                            nodes[column_node].element[
+                                "coordinates"] = objects[column[0]].get(
+                                    "coords")
                         else:
-                            row_columns = card_layout[row_counter]["row"]
                             if not self._check_same_iteration(previous_column,
                                                               column):
-                                ds_template.add_element_to_ds("column",
-                                                              row_columns)
-                                column_counter = len(row_columns) - 1
-                                y_mins = [obj.get("coords",
-                                                  obj.get("coordinates"))[1]
-                                          for obj in column]
-                                column = [value for _, value in sorted(
-                                    zip(y_mins, column),
-                                    key=lambda value: value[0])]
-                                self.row_column_grouping(
-                                    column,
-                                    row_columns[column_counter]["column"][
-                                        "items"],
-                                    previous_column=column)
+                                column_node = ds_template.add_element_to_ds(
+                                    "column", layout_tree, row)
+                                column = object_index.sort(column, 1)
+                                yield column, column_node
                                 if self.same_iteration:
-                                    card_layout[row_counter][
-                                        "row"
-                                    ][column_counter]["column"][
-                                        "items"] = row_columns[column_counter][
-                                            "column"]["items"][:-1]
+                                    column_items = nodes[column_node].children
+                                    if column_items:
+                                        layout_tree.remove_node(
+                                            column_items[-1])
                                     for item in column:
                                         ds_template.add_element_to_ds(
-                                            "item",
-                                            row_columns[column_counter]
-                                            ["column"].get("items", []),
-                                            element=item)
+                                            "item", layout_tree, column_node,
+                                            element=objects[item])
 
                                     self.same_iteration = False
 
                                 coordinates = [c.get("coordinates")
-                                               for c in row_columns[
-                                                   column_counter]["column"]
-                                               ["items"]]
-                                card_layout[row_counter]["row"][column_counter][
+                                               for c in nodes[
+                                                   column_node].items]
+                                nodes[column_node].element[
                                     "coordinates"] = \
                                     ds_template.build_container_coordinates(
                                         coordinates)
@@ -197,8 +277,7 @@ class RowColumnGroup:
 
                         if not self.same_iteration:
                             coordinates = [c.get("coordinates") for c in
-                                           card_layout[row_counter]["row"]]
-                            card_layout[row_counter]["coordinates"] = \
+                                           nodes[row].items]
+                            nodes[row].element["coordinates"] = \
                                 ds_template.build_container_coordinates(
                                     coordinates)
-                            row_counter = len(card_layout) - 1
@@ -0,0 +1,157 @@
+"""Module for classifying the dominant colors of the design objects into the
+adaptive card's named colors.
+
+The named color tables are built into palette matrices once at import and
+the colors of all the design objects of a card are classified together.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Maximum RGB distance for a color to be matched with a named color
+COLOR_DISTANCE_THRESHOLD = 150
+
+FONT_COLORS = {
+    "Attention": [
+        (255, 0, 0),
+        (180, 8, 0),
+        (220, 54, 45),
+        (194, 25, 18),
+        (143, 7, 0)
+    ],
+    "Accent": [
+        (0, 0, 255),
+        (7, 47, 95),
+        (18, 97, 160),
+        (56, 149, 211)
+    ],
+    "Good": [
+        (0, 128, 0),
+        (145, 255, 0),
+        (30, 86, 49),
+        (164, 222, 2),
+        (118, 186, 27),
+        (76, 154, 42),
+        (104, 187, 89)
+    ],
+    "Dark": [
+        (0, 0, 0),
+        (76, 76, 76),
+        (51, 51, 51),
+        (102, 102, 102),
+        (153, 153, 153)
+    ],
+    "Light": [
+        (255, 255, 255)
+    ],
+    "Warning": [
+        (255, 255, 0),
+        (255, 170, 0),
+        (184, 134, 11),
+        (218, 165, 32),
+        (234, 186, 61),
+        (234, 162, 33)
+    ]
+}
+
+ACTIONSET_COLORS = {
+    "destructive": [
+        (255, 0, 0),
+        (180, 8, 0),
+        (220, 54, 45),
+        (194, 25, 18),
+        (143, 7, 0)
+    ],
+    "positive": [
+        (0, 0, 255),
+        (7, 47, 95),
+        (18, 97, 160),
+        (56, 149, 211)
+    ]
+}
+
+
+class ColorPalette:
+    """
+    Palette matrix of the named colors, each row is a color value labelled
+    with its name.
+    """
+
+    def __init__(self, named_colors: Dict[str, List[Tuple]],
+                 default: str):
+        self.default = default
+        self.names = np.array([name for name, values in named_colors.items()
+                               for _ in values] + [default])
+        self.matrix = np.array([value for values in named_colors.values()
+                                for value in values], dtype=np.int64)
+
+    def classify(self, colors: np.ndarray) -> np.ndarray:
+        """
+        Returns the name of the closest palette color of each color, the
+        default name if none of the palette colors is within the
+        threshold distance. Ties are resolved to the first palette color.
+        @param colors: n x 3 array of RGB colors
+        @return: array of color names
+        """
+        colors = np.asarray(colors, dtype=np.int64).reshape(-1, 3)
+        distances = np.sqrt(np.sum(
+            (colors[:, None, :] - self.matrix[None, :, :]) ** 2, axis=2))
+        closest = np.argmin(distances, axis=1)
+        found = (distances[np.arange(len(colors)), closest]
+                 <= COLOR_DISTANCE_THRESHOLD)
+        return self.names[np.where(found, closest, len(self.names) - 1)]
+
+
+FONT_PALETTE = ColorPalette(FONT_COLORS, "Default")
+ACTIONSET_PALETTE = ColorPalette(ACTIONSET_COLORS, "default")
+
+
+def classify_font_colors(palettes: np.ndarray) -> List[str]:
+    """
+    Returns the font color names from the 2 dominant colors of each text.
+    If the foreground is predicted as Light, checks for the false cases
+    where both the dominant colors are white.
+    @param palettes: n x 6 array of background and foreground RGB colors
+    @return: list of font color names
+    """
+    palettes = np.asarray(palettes, dtype=np.int64).reshape(-1, 6)
+    background, foreground = palettes[:, :3], palettes[:, 3:]
+    colors = FONT_PALETTE.classify(foreground)
+    distances = np.sqrt(np.sum((background - foreground) ** 2, axis=1))
+    colors[(colors == "Light")
+           & (distances < COLOR_DISTANCE_THRESHOLD)] = FONT_PALETTE.default
+    return colors.tolist()
+
+
+def classify_actionset_styles(backgrounds: np.ndarray) -> List[str]:
+    """
+    Returns the actionset styles from the background color of each button.
+    @param backgrounds: n x 3 array of background RGB colors
+    @return: list of actionset styles
+    """
+    return ACTIONSET_PALETTE.classify(backgrounds).tolist()
+
+
+def classify_colors(design_objects: List[Dict]) -> List[Dict]:
+    """
+    Replaces the dominant colors collected for the textboxes and actionsets
+    of the card with their color names, all the objects are classified in
+    a single batch.
+    @param design_objects: input design objects
+    @return: design objects with the color and style names
+    """
+    textboxes = [design_object for design_object in design_objects
+                 if design_object.get("object") == "textbox"]
+    actionsets = [design_object for design_object in design_objects
+                  if design_object.get("object") == "actionset"]
+    if textboxes:
+        colors = classify_font_colors(
+            [design_object["color"] for design_object in textboxes])
+        for design_object, color in zip(textboxes, colors):
+            design_object["color"] = color
+    if actionsets:
+        styles = classify_actionset_styles(
+            [design_object["style"] for design_object in actionsets])
+        for design_object, style in zip(actionsets, styles):
+            design_object["style"] = style
+    return design_objects
@@ -5,6 +5,17 @@ import os
 
 # max 2mb
 IMG_MAX_UPLOAD_SIZE = 2e+6
+# request body limit checked before the json is parsed [ the upload and the
+# json envelope ]
+IMG_MAX_REQUEST_SIZE = IMG_MAX_UPLOAD_SIZE + 1024
+
+# uploads larger than these dimensions are rejected from the image header,
+# before the image is decoded
+IMG_MAX_DIMENSION = int(os.environ.get("IMG_MAX_DIMENSION", 10000))
+IMG_MAX_PIXELS = int(os.environ.get("IMG_MAX_PIXELS", 25e+6))
+# images with a longer side are downscaled to it at decode time [ 0 keeps the
+# image resolution ]
+IMG_MAX_DECODE_SIDE = int(os.environ.get("IMG_MAX_DECODE_SIDE", 4096))
 
 # tf-serving url
 TF_SERVING_URL = os.environ.get("TF_SERVING_URL",
@@ -12,6 +23,22 @@ TF_SERVING_URL = os.environ.get("TF_SERVING_URL",
 TF_SERVING_MODEL_NAME = "mystique"
 ENABLE_TF_SERVING = os.environ.get("ENABLE_TF_SERVING",
                                    False)
+# tf-serving object detection backend [ tfs_faster_rcnn ]
+# protocol rest or grpc, the grpc PredictionService sends the image as a
+# binary tensor
+TF_SERVING_PROTOCOL = os.environ.get("TF_SERVING_PROTOCOL", "rest")
+TF_SERVING_GRPC_URL = os.environ.get("TF_SERVING_GRPC_URL",
+                                     "172.17.0.5:8500")
+TF_SERVING_SIGNATURE_NAME = "serving_default"
+# input of the exported model's signature, encoded_image_string_tensor [ png /
+# jpeg bytes ] or image_tensor [ uint8 HxWx3 tensor ]
+TF_SERVING_INPUT_TYPE = os.environ.get("TF_SERVING_INPUT_TYPE",
+                                       "encoded_image_string_tensor")
+# request timeout in seconds, retries of the failed requests [ connection
+# errors and unavailable service ] and the kept-alive connections per host
+TF_SERVING_TIMEOUT = float(os.environ.get("TF_SERVING_TIMEOUT", 10))
+TF_SERVING_RETRIES = int(os.environ.get("TF_SERVING_RETRIES", 2))
+TF_SERVING_POOL_SIZE = int(os.environ.get("TF_SERVING_POOL_SIZE", 8))
 TF_FROZEN_MODEL_PATH = os.path.join(os.path.dirname(__file__),
                                     "../model/frozen_inference_graph.pb")
 TF_LABEL_PATH = os.path.join(os.path.dirname(__file__),
@@ -26,6 +53,30 @@ DETR_MODEL_PATH = os.path.join(
     os.path.dirname(__file__),
     "../model/pth_models/detr_trace.pt")
 
+# INT8 quantized DETR models [ python -m commands.quantize_detr quantize ]
+DETR_DYNAMIC_INT8_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../model/pth_models/detr_trace_int8_dynamic.pt")
+DETR_STATIC_INT8_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../model/pth_models/detr_trace_int8_static.pt")
+
+# ONNX exports of the models [ python -m commands.export_onnx ]
+ONNX_DETR_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../model/onnx_models/detr.onnx")
+ONNX_FRCNN_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../model/onnx_models/frozen_inference_graph.onnx")
+
+# onnx runtime session settings, threads within an operator and across the
+# independent operators [ > 1 runs the graph in parallel mode ] and the graph
+# optimization level [ disable, basic, extended or all ]
+ONNX_INTRA_OP_THREADS = int(os.environ.get("ONNX_INTRA_OP_THREADS",
+                                           os.cpu_count() or 1))
+ONNX_INTER_OP_THREADS = int(os.environ.get("ONNX_INTER_OP_THREADS", 1))
+ONNX_GRAPH_OPTIMIZATION_LEVEL = os.environ.get(
+    "ONNX_GRAPH_OPTIMIZATION_LEVEL", "all")
 
 # image hosting max size and default image url
 IMG_MAX_HOSTING_SIZE = 1000000
@@ -57,10 +108,12 @@ PROPERTY_EXTRACTOR_FUNC = {
 # Font size and weight property class registry
 FONT_SPEC_REGISTRY = {
     "font_morph": "mystique.font_properties.FontPropMorph",
-    "font_bbox": "mystique.font_properties.FontPropBoundingBox"
+    "font_bbox": "mystique.font_properties.FontPropBoundingBox",
+    # same weights as font_morph, using the distance transform
+    "font_distance": "mystique.font_properties.FontPropDistance"
 }
 # active font prop pipelne
-ACTIVE_FONTSPEC_NAME = "font_morph"
+ACTIVE_FONTSPEC_NAME = "font_distance"
 
 # image detection swtiching paramater
 # On True [ uses custom image pipeline for image objects]
@@ -74,16 +127,81 @@ MODEL_CONFIDENCE = 80.0
 # Extra textbox padding - 5px
 TEXTBOX_PADDING = 5
 
+# OCR strategy registry
+# per_crop [ tesseract runs on each of the text object's crop ]
+# page [ tesseract runs once on the card and words are mapped back to the
+# objects using a spatial word index ]
+# montage [ text crops are stacked into one image and tesseract runs once on
+# it, words are mapped back using the crop offsets ]
+OCR_STRATEGY_REGISTRY = {
+    "per_crop": "mystique.ocr.CropOcr",
+    "page": "mystique.ocr.PageOcr",
+    "montage": "mystique.ocr.MontageOcr"
+}
+ACTIVE_OCR_STRATEGY = os.environ.get("ACTIVE_OCR_STRATEGY", "per_crop")
+
+# tesseract page segmentation mode for the page level OCR [ automatic page
+# segmentation ]
+PAGE_OCR_PSM = 3
+
+# montage OCR - white space between the stacked crops, maximum height of a
+# montage image and the tesseract page segmentation mode
+MONTAGE_OCR_PADDING = 20
+MONTAGE_OCR_MAX_HEIGHT = 8000
+MONTAGE_OCR_PSM = 6
+
+# OCR engine registry
+# tesseract_cli [ pytesseract, spawns the tesseract binary on each call ]
+# tesserocr [ pool of in-process tesseract api handles, loaded once per
+# worker process ]
+OCR_ENGINE_REGISTRY = {
+    "tesseract_cli": "mystique.ocr_engine.TesseractCliEngine",
+    "tesserocr": "mystique.ocr_engine.TesserocrEngine"
+}
+ACTIVE_OCR_ENGINE = os.environ.get("ACTIVE_OCR_ENGINE", "tesseract_cli")
+
+# Number of threads extracting the design object's properties in parallel
+# [ 0 or 1 extracts the objects serially, the default; deployments opt in ]
+PROPERTY_EXTRACTION_WORKERS = int(
+    os.environ.get("PROPERTY_EXTRACTION_WORKERS", 1))
+
+# Number of worker processes running the card pipeline stages [ property
+# extraction and layout generation ] and the timeout in seconds of each stage
+STAGE_EXECUTOR_WORKERS = int(os.environ.get("STAGE_EXECUTOR_WORKERS", 2))
+STAGE_TIMEOUTS = {
+    "properties": float(os.environ.get("PROPERTIES_STAGE_TIMEOUT", 60)),
+    "layout": float(os.environ.get("LAYOUT_STAGE_TIMEOUT", 30))
+}
+
+# Number of tesseract api handles kept per worker process, one for each of
+# the property extraction threads
+OCR_ENGINE_POOL_SIZE = int(os.environ.get(
+    "OCR_ENGINE_POOL_SIZE", max(PROPERTY_EXTRACTION_WORKERS, 1)))
+
 MODEL_REGISTRY = {
     "tf_faster_rcnn": "mystique.detect_objects.ObjectDetection",
-    "tfs_faster_rcnn": "mystique.detect_objects.TfsObjectDetection",
+    "tfs_faster_rcnn": "mystique.tfs_objects.TfsObjectDetection",
     # "pth_faster_rcnn": "mystique.obj_detect.PtObjectDetection",
     "pth_detr": "mystique.obj_detect.DetrOD",
-    "pth_detr_cpp": "mystique.obj_detect.DetrCppOD"
+    "pth_detr_cpp": "mystique.obj_detect.DetrCppOD",
+    "pth_detr_int8_dynamic": "mystique.obj_detect.DetrDynamicInt8OD",
+    "pth_detr_int8_static": "mystique.obj_detect.DetrStaticInt8OD",
+    "onnx_detr": "mystique.obj_detect.DetrOnnxOD",
+    "onnx_faster_rcnn": "mystique.obj_detect.FrcnnOnnxOD"
 }
 
 ACTIVE_MODEL_NAME = os.environ.get("ACTIVE_MODEL_NAME", "tf_faster_rcnn")
 
+# Micro-batching of the concurrent detection requests [ useful with the
+# threaded workers ], batches are formed upto the max batch size waiting
+# at most max wait ms for the requests to queue up.
+ENABLE_DETECTION_BATCHING = os.environ.get("ENABLE_DETECTION_BATCHING",
+                                           False)
+DETECTION_MAX_BATCH_SIZE = int(os.environ.get("DETECTION_MAX_BATCH_SIZE", 8))
+DETECTION_MAX_WAIT_MS = float(os.environ.get("DETECTION_MAX_WAIT_MS", 5))
+# seconds a request waits for its batched detection result
+DETECTION_TIMEOUT = float(os.environ.get("DETECTION_TIMEOUT", 60))
+
 # Noise objects removal IOU threshold
 IOU_THRESHOLD = 0.5
 
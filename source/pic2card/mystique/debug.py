@@ -9,6 +9,7 @@ from PIL import Image
 import numpy as np
 import matplotlib.pyplot as plt
 
+from mystique.ingest import CardImage
 from mystique.predict_card import PredictCard
 from mystique.image_extraction import ImageExtraction
 from mystique.utils import plot_results
@@ -92,13 +93,13 @@ class Debug:
         Handles the different components calling and returns the
         predicted card json to the API
 
-        @param image: input image path
+        @param pil_image: input PIL image or the ingested CardImage
 
         @return: predicted card json
         """
-        pil_image = pil_image.convert("RGB")
-        image_np = np.asarray(pil_image)
-        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        card_image = (pil_image if isinstance(pil_image, CardImage)
+                      else CardImage(pil_image))
+        image_np, pil_image = card_image.model_inputs(self.od_model)
         (boxes, classes, scores,
          output_dict) = self.get_boundary_boxes(image_np, pil_image)
         predict_card = PredictCard(self.od_model)
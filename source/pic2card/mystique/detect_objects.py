@@ -3,8 +3,7 @@
 from distutils.version import StrictVersion
 
 import numpy as np
-import tensorflow as tf
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 from PIL import Image
 
 from mystique.utils import id_to_label
@@ -12,9 +11,17 @@ from mystique.image_extraction import ImageExtraction
 from mystique.initial_setups import set_graph_and_tensors
 
 
-if StrictVersion(tf.__version__) < StrictVersion("1.9.0"):
-    raise ImportError(
-        "Please upgrade your TensorFlow installation to v1.9.* or later!")
+def import_tensorflow():
+    """
+    Imports tensorflow on the model load, so that importing the module
+    doesn't load it.
+    """
+    import tensorflow as tf
+
+    if StrictVersion(tf.__version__) < StrictVersion("1.9.0"):
+        raise ImportError(
+            "Please upgrade your TensorFlow installation to v1.9.* or later!")
+    return tf
 
 
 class ObjectDetection:
@@ -23,14 +30,27 @@ class ObjectDetection:
     graph and returning the ouput dict which consists of classes, scores,
     and object bounding boxes.
     """
+    input_layout = "bgr"
+
     def __init__(self):
         """
         Initialize the object detection using model loaded from forzen
         graph
         """
+        tf = import_tensorflow()
         det_g, tens_d = self._load_model_dump()
         self.detection_graph = det_g
         self.tensor_dict = tens_d
+        # The session lives as long as the instance, creating it per
+        # inference re-initializes the graph runtime on every request.
+        self.image_tensor = det_g.get_tensor_by_name("image_tensor:0")
+        self.session = tf.compat.v1.Session(graph=det_g)
+
+    def close(self):
+        """
+        Releases the inference session.
+        """
+        self.session.close()
 
     @staticmethod
     def _load_model_dump():
@@ -104,6 +124,44 @@ class ObjectDetection:
         """
         output_dict = self.run_inference_for_single_image(image_np)
         width, height = image.size
+        return self.renormalize_boxes(output_dict, width, height)
+
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image] = None) -> List[Dict]:
+        """
+        Returns the objects and coordiates detected for a batch of images,
+        images of the same size are stacked and run in a single inference.
+
+        @param images_np: list of image tensors, dimension should be HxWx3
+        @param images: list of PIL Image objects [ unused, kept for the
+                       get_objects parity ]
+
+        @return: list of ouput dict from the faster rcnn inference in the
+                 order of the input images
+        """
+        output_dicts = [None] * len(images_np)
+        shape_groups = {}
+        for position, image_np in enumerate(images_np):
+            shape_groups.setdefault(image_np.shape, []).append(position)
+        for shape, positions in shape_groups.items():
+            batch = np.stack([images_np[position] for position in positions])
+            results = self.run_inference(batch)
+            height, width = shape[:2]
+            for position, output_dict in zip(positions, results):
+                output_dicts[position] = self.renormalize_boxes(
+                    output_dict, width, height)
+        return output_dicts
+
+    @staticmethod
+    def renormalize_boxes(output_dict: Dict, width: int,
+                          height: int) -> Dict:
+        """
+        Renormalizes the model's box coordinates to the image size.
+        @param output_dict: output dict from the faster rcnn inference
+        @param width: image width
+        @param height: image height
+        @return: output dict with the renormalized boxes
+        """
         # format: ymin, xmin, ymax, xmax, renormalize the coords.
         bboxes = output_dict[
             "detection_boxes"] * [height, width, height, width]
@@ -115,38 +173,33 @@ class ObjectDetection:
         # renormalize the the box cooridinates
         return output_dict
 
-    def run_inference_for_single_image(self, image: np.array):
+    def run_inference(self, images: np.array) -> List[Dict]:
         """
-        Runs the inference graph for the given image
-        @param image: numpy array of input design image
-        @return: output dict of objects, classes and coordinates
+        Runs the inference graph for the batch of same sized images
+        @param images: numpy array of input design images, NxHxWx3
+        @return: list of output dict of objects, classes and coordinates
         """
-        # Run inference
-        detection_graph = self.detection_graph
-        with detection_graph.as_default():
-            image_tensor = detection_graph.get_tensor_by_name(
-                "image_tensor:0")
-            with tf.compat.v1.Session() as sess:
-                output_dict = sess.run(
-                    self.tensor_dict, feed_dict={
-                        image_tensor: np.expand_dims(
-                            image, 0)})
+        batch_output = self.session.run(
+            self.tensor_dict, feed_dict={self.image_tensor: images})
 
         # all outputs are float32 numpy arrays, so convert types as
         # appropriate
-        output_dict["detection_classes"] = output_dict[
-            "detection_classes"][0].astype(np.uint8)
-        output_dict["detection_boxes"] = output_dict[
-            "detection_boxes"][0]
-        output_dict["detection_scores"] = output_dict[
-            "detection_scores"][0]
+        output_dicts = []
+        for position in range(images.shape[0]):
+            output_dict = {}
+            output_dict["detection_classes"] = batch_output[
+                "detection_classes"][position].astype(np.uint8)
+            output_dict["detection_boxes"] = batch_output[
+                "detection_boxes"][position]
+            output_dict["detection_scores"] = batch_output[
+                "detection_scores"][position]
+            output_dicts.append(output_dict)
+        return output_dicts
 
-        return output_dict
-
-
-class TfsObjectDetection:
-    """
-    Do the object detection using Tensorflow Serving service.
-    """
-    def __init__(self):
-        pass
+    def run_inference_for_single_image(self, image: np.array):
+        """
+        Runs the inference graph for the given image
+        @param image: numpy array of input design image
+        @return: output dict of objects, classes and coordinates
+        """
+        return self.run_inference(np.expand_dims(image, 0))[0]
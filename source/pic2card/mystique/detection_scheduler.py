@@ -0,0 +1,169 @@
+"""Module for batching the concurrent object detection requests.
+
+`BatchingDetector` wraps any of the `MODEL_REGISTRY` backends, the images
+submitted by the concurrent requests are queued and a single worker thread
+runs them as batches through the backend's `get_objects_batch`.
+A batch is formed from the images already queued, waiting upto
+`DETECTION_MAX_WAIT_MS` for more images till `DETECTION_MAX_BATCH_SIZE`,
+so under low load a request is run almost immediately.
+A request waits upto `DETECTION_TIMEOUT` for its result, and if the worker
+thread dies the queued requests are failed and the next request starts a
+new worker.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+from mystique import config
+
+logger = logging.getLogger("mysitque")
+
+
+class BatchingDetector:
+    """
+    Micro-batching scheduler in front of an object detection model.
+    Other attributes are delegated to the wrapped model.
+    """
+
+    def __init__(self, od_model, max_batch_size: int = None,
+                 max_wait_ms: float = None, timeout: float = None):
+        self.od_model = od_model
+        self.max_batch_size = (max_batch_size
+                               or config.DETECTION_MAX_BATCH_SIZE)
+        self.max_wait = (config.DETECTION_MAX_WAIT_MS if max_wait_ms is None
+                         else max_wait_ms) / 1000
+        self.timeout = timeout or config.DETECTION_TIMEOUT
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def __getattr__(self, name):
+        if name == "od_model":
+            raise AttributeError(name)
+        return getattr(self.od_model, name)
+
+    def _submit(self, request: tuple):
+        """
+        Queues the request, starts the batching worker thread on the first
+        call of the process or after the worker has died.
+        @param request: image tensor, image and the result future
+        """
+        with self._lock:
+            if self._queue is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run_batches,
+                                 args=(self._queue,),
+                                 name="detection_scheduler",
+                                 daemon=True).start()
+            self._queue.put(request)
+
+    def get_objects(self, image_np: np.array, image: Image) -> Dict:
+        """
+        Queues the image for the batched inference and waits for its
+        result.
+
+        @param image_np: Image tensor, dimension should be HxWx3
+        @param image: PIL Image object
+
+        @return: ouput dict of the wrapped model
+        """
+        future = Future()
+        self._submit((image_np, image, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # a request still in the queue is dropped by the worker
+            future.cancel()
+            raise TimeoutError(
+                f"Object detection timed out after {self.timeout}s")
+
+    def _collect_batch(self, requests: queue.Queue) -> List:
+        """
+        Waits for a request and collects the batch of requests.
+        @param requests: request queue
+        @return: list of queued requests
+        """
+        batch = [requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # drain the already queued requests without waiting
+                batch.append(requests.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batches(self, requests: queue.Queue):
+        """
+        Worker loop running the batched inference and fanning the results
+        back to the waiting requests.
+        If the loop dies the queue is detached, so the next request starts
+        a new worker, and the queued requests are failed.
+        @param requests: request queue
+        """
+        batch = []
+        try:
+            while True:
+                batch = self._collect_batch(requests)
+                self._run_batch(batch)
+        except BaseException as ex:
+            logger.error(f"Detection scheduler worker died: {ex!r}")
+            with self._lock:
+                if self._queue is requests:
+                    self._queue = None
+            while True:
+                try:
+                    batch.append(requests.get_nowait())
+                except queue.Empty:
+                    break
+            error = RuntimeError(f"Object detection worker died: {ex!r}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _run_batch(self, batch: List):
+        """
+        Runs the batched inference and sets the results of the requests,
+        the requests cancelled on timeout are skipped.
+        @param batch: list of queued requests
+        """
+        batch = [request for request in batch
+                 if request[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        images_np = [image_np for image_np, _, _ in batch]
+        images = [image for _, image, _ in batch]
+        try:
+            if len(batch) == 1:
+                results = [self.od_model.get_objects(
+                    image_np=images_np[0], image=images[0])]
+            elif hasattr(self.od_model, "get_objects_batch"):
+                results = self.od_model.get_objects_batch(images_np, images)
+            else:
+                results = [self.od_model.get_objects(image_np=image_np,
+                                                     image=image)
+                           for image_np, image in zip(images_np, images)]
+        except Exception as ex:
+            logger.error(f"Batched object detection failed: {ex}")
+            for _, _, future in batch:
+                future.set_exception(ex)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
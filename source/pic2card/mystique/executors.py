@@ -0,0 +1,277 @@
+"""Module for the long-lived worker pools used by the card pipeline.
+
+The pools are created lazily once per process and reused across requests,
+a pool inherited through fork is discarded and created again as its workers
+doesn't exist in the child process. The http connection pools keep the
+connections to the model servers alive across requests.
+"""
+import http.client
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import (Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor,
+                                TimeoutError as FutureTimeoutError, wait)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+from mystique import config
+
+logger = logging.getLogger("mysitque")
+
+_THREAD_POOLS = {}
+_THREAD_POOLS_LOCK = threading.Lock()
+_STAGE_EXECUTOR = None
+_STAGE_EXECUTOR_LOCK = threading.Lock()
+_CONNECTION_POOLS = {}
+_CONNECTION_POOLS_LOCK = threading.Lock()
+
+
+def get_thread_pool(name: str,
+                    max_workers: int) -> Optional[ThreadPoolExecutor]:
+    """
+    Returns the named thread pool of the current process.
+    @param name: name of the pool
+    @param max_workers: number of worker threads
+    @return: thread pool or None if the pool size is less than 2
+    """
+    if max_workers < 2:
+        return None
+    with _THREAD_POOLS_LOCK:
+        pool, pid = _THREAD_POOLS.get(name, (None, None))
+        if pool is None or pid != os.getpid():
+            pool = ThreadPoolExecutor(max_workers=max_workers,
+                                      thread_name_prefix=name)
+            _THREAD_POOLS[name] = (pool, os.getpid())
+    return pool
+
+
+class StageExecutor:
+    """
+    Runs the card pipeline stages like property extraction and layout
+    generation in a persistent pool of worker processes.
+    Each stage's result is waited upto its configured timeout, a stage
+    exceeding it retires the pool: the new stages are submitted to a new
+    pool while the retired pool's other stages run to completion, then its
+    workers are terminated [ a hung worker can't be cancelled ].
+    """
+
+    def __init__(self, max_workers: int = None, timeouts: dict = None):
+        self.max_workers = max_workers or config.STAGE_EXECUTOR_WORKERS
+        self.timeouts = timeouts or config.STAGE_TIMEOUTS
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        # futures not done yet of each pool, current and retired, and the
+        # timed out ones among them
+        self._pending = {}
+        self._hung = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pool, self._pending, self._hung = None, {}, set()
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._pid = os.getpid()
+                self._pending[self._pool] = set()
+            return self._pool
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        pool = self._get_pool()
+        future = pool.submit(func, *args, **kwargs)
+        with self._lock:
+            self._pending.setdefault(pool, set()).add(future)
+        future.add_done_callback(
+            lambda done_future: self._discard(pool, done_future))
+        return future
+
+    def _discard(self, pool: ProcessPoolExecutor, future: Future):
+        with self._lock:
+            self._pending.get(pool, set()).discard(future)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submits the stage function to the worker pool.
+        @param func: picklable stage function
+        @return: future of the stage result
+        """
+        try:
+            return self._submit(func, *args, **kwargs)
+        except BrokenProcessPool:
+            # a worker died abruptly on an earlier call
+            self.restart()
+            return self._submit(func, *args, **kwargs)
+
+    def result(self, stage: str, future: Future):
+        """
+        Waits for the stage result, any exception raised by the stage is
+        re-raised here.
+        @param stage: name of the stage used to look up the timeout
+        @param future: future returned on submit
+        @return: stage result
+        """
+        timeout = self.timeouts.get(stage)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.error(f"Stage {stage} timed out after {timeout}s, "
+                         "retiring the stage workers")
+            self.retire(future)
+            raise TimeoutError(f"Stage {stage} timed out after {timeout}s")
+        except BrokenProcessPool:
+            self.restart()
+            raise
+
+    def retire(self, hung_future: Future):
+        """
+        Moves the new submits to a new pool and terminates the workers of
+        the hung stage's pool once its other stages are done or timed out.
+        @param hung_future: future of the timed out stage
+        """
+        with self._lock:
+            pool = next((pool for pool, pending in self._pending.items()
+                         if hung_future in pending), None)
+            if pool is None:
+                return
+            self._hung.add(hung_future)
+            if pool is not self._pool:
+                # already retired
+                return
+            self._pool = None
+
+        def terminate():
+            while True:
+                with self._lock:
+                    running = self._pending.get(pool, set()) - self._hung
+                if not running:
+                    break
+                wait(running, timeout=1)
+            self._terminate(pool)
+
+        threading.Thread(target=terminate, name="stage_pool_retire",
+                         daemon=True).start()
+
+    def _terminate(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            self._hung.difference_update(self._pending.pop(pool, ()))
+        # ProcessPoolExecutor doesn't support cancelling the running calls,
+        # so the worker processes are terminated directly.
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False)
+
+    def restart(self):
+        """
+        Terminates the workers of the current pool, a new pool is created
+        on the next submit.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self._terminate(pool)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def get_stage_executor() -> StageExecutor:
+    """
+    Returns the stage executor shared by the current process.
+    @return: stage executor instance
+    """
+    global _STAGE_EXECUTOR
+    with _STAGE_EXECUTOR_LOCK:
+        if _STAGE_EXECUTOR is None:
+            _STAGE_EXECUTOR = StageExecutor()
+    return _STAGE_EXECUTOR
+
+
+class ConnectionPool:
+    """
+    Pool of the kept-alive http connections of a host, a connection is used
+    by one request at a time.
+    """
+
+    def __init__(self, host_port: str, max_size: int = 8,
+                 timeout: float = None):
+        """
+        @param host_port: host and port of the server eg; localhost:8501
+        @param max_size: maximum number of idle connections kept
+        @param timeout: socket timeout of the connections in seconds
+        """
+        self.host_port = host_port
+        self.timeout = timeout
+        self._connections = queue.LifoQueue(maxsize=max_size)
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host_port,
+                                              timeout=self.timeout)
+
+    def _put_connection(self, connection: http.client.HTTPConnection):
+        try:
+            self._connections.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: Dict = None):
+        """
+        Sends the request on a pooled connection, a kept-alive connection
+        closed by the server is re-opened once.
+        @return: response status and body
+        """
+        for attempt in range(2):
+            connection = self._get_connection()
+            reused = connection.sock is not None
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError):
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._put_connection(connection)
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def get_connection_pool(host_port: str, max_size: int = 8,
+                        timeout: float = None) -> ConnectionPool:
+    """
+    Returns the connection pool of the host and socket timeout for the
+    current process, the connections inherited through fork are not reused.
+    @param host_port: host and port of the server
+    @param max_size: maximum number of idle connections kept
+    @param timeout: socket timeout of the pool's connections
+    """
+    key = (host_port, timeout)
+    with _CONNECTION_POOLS_LOCK:
+        pool, pid = _CONNECTION_POOLS.get(key, (None, None))
+        if pool is None or pid != os.getpid():
+            pool = ConnectionPool(host_port, max_size=max_size,
+                                  timeout=timeout)
+            _CONNECTION_POOLS[key] = (pool, os.getpid())
+    return pool
@@ -7,15 +7,18 @@ from typing import Tuple, Dict, List, Any, Union
 
 import numpy as np
 from PIL import Image
-from pytesseract import pytesseract, Output
 
 from mystique import config
+from mystique.colors import classify_actionset_styles, classify_font_colors
+from mystique.ocr import get_text_coords, get_text_from_data
+from mystique.ocr_engine import get_ocr_engine
 from mystique.utils import load_instance_with_class_path
 from mystique.extract_properties_abstract import (AbstractFontColor,
                                                   AbstractBaseExtractProperties)
 
 from mystique.card_layout.ds_helper import (ContainerDetailTemplate,
                                             DsHelper)
+from mystique.card_layout.layout_tree import LayoutTree
 
 
 class BaseExtractProperties(AbstractBaseExtractProperties):
@@ -23,6 +26,10 @@ class BaseExtractProperties(AbstractBaseExtractProperties):
     """
     Base Class for all design objects's common properties extraction.
     """
+    # uuid keyed ocr text and image data collected by the active ocr
+    # strategy, when absent the text is extracted from the object's crop.
+    ocr_results = None
+
     def get_alignment(self, image=None, xmin=None, xmax=None,
                       width=None) -> Union[str, None]:
         """
@@ -105,21 +112,19 @@ class BaseExtractProperties(AbstractBaseExtractProperties):
     def get_text(self, image: Image, coords: Tuple) -> Tuple[str, Any]:
         """
         Extract the text from the object coordinates
-        in the input deisgn image using pytesseract.
+        in the input deisgn image using the active ocr engine.
         @param image: input PIL image
         @param coords: tuple of coordinates from which
                        text should be extracted
         @return: ocr text, pytesseract image data
         """
-        coords = (coords[0] - 5, coords[1], coords[2] + 5, coords[3])
-        cropped_image = image.crop(coords)
+        if self.ocr_results and self.uuid in self.ocr_results:
+            return self.ocr_results[self.uuid]
+        cropped_image = image.crop(get_text_coords(coords))
         cropped_image = cropped_image.convert("LA")
 
-        img_data = pytesseract.image_to_data(
-            cropped_image, lang="eng", config="--psm 6",
-            output_type=Output.DICT)
-        text_list = filter(None, img_data['text'])
-        extracted_text = ' '.join(text_list).lstrip("#-_*~").strip()
+        img_data = get_ocr_engine().image_to_data(cropped_image, psm=6)
+        extracted_text = get_text_from_data(img_data)
         return extracted_text, img_data
 
 
@@ -128,6 +133,21 @@ class FontColor(AbstractFontColor):
     Class handles extraction of font color of respective design element.
     """
 
+    @staticmethod
+    def get_dominant_colors(image: Image, coords: Tuple) -> List[int]:
+        """
+        Quantaizes the image i.e [cropped to the coordiantes] into 2 colors
+        mainly background and foreground.
+        @param image: input PIL image
+        @param coords: coordinates from which color needs to be
+                       extracted
+        @return: background and foreground RGB values
+        """
+        cropped_image = image.crop(coords)
+        # get 2 dominant colors
+        quantized = cropped_image.quantize(colors=2, method=2)
+        return quantized.getpalette()[:6]
+
     def get_colors(self, image: Image, coords: Tuple) -> str:
         """
         Extract the text color by quantaizing the image i.e
@@ -140,79 +160,8 @@ class FontColor(AbstractFontColor):
 
         @return: foreground color name
         """
-        cropped_image = image.crop(coords)
-        # get 2 dominant colors
-        q = cropped_image.quantize(colors=2, method=2)
-        dominant_color = q.getpalette()[3:6]
-
-        colors = {
-            "Attention": [
-                (255, 0, 0),
-                (180, 8, 0),
-                (220, 54, 45),
-                (194, 25, 18),
-                (143, 7, 0)
-            ],
-            "Accent": [
-                (0, 0, 255),
-                (7, 47, 95),
-                (18, 97, 160),
-                (56, 149, 211)
-            ],
-            "Good": [
-                (0, 128, 0),
-                (145, 255, 0),
-                (30, 86, 49),
-                (164, 222, 2),
-                (118, 186, 27),
-                (76, 154, 42),
-                (104, 187, 89)
-            ],
-            "Dark": [
-                (0, 0, 0),
-                (76, 76, 76),
-                (51, 51, 51),
-                (102, 102, 102),
-                (153, 153, 153)
-            ],
-            "Light": [
-                (255, 255, 255)
-            ],
-            "Warning": [
-                (255, 255, 0),
-                (255, 170, 0),
-                (184, 134, 11),
-                (218, 165, 32),
-                (234, 186, 61),
-                (234, 162, 33)
-            ]
-        }
-        color = "Default"
-        found_colors = []
-        distances = []
-        # find the dominant text colors based on the RGB difference
-        for key, values in colors.items():
-            for value in values:
-                distance = np.sqrt(np.sum(
-                    (np.asarray(value) - np.asarray(dominant_color)) ** 2))
-                if distance <= 150:
-                    found_colors.append(key)
-                    distances.append(distance)
-        # If the color is predicted as LIGHT check for false cases
-        # where both dominan colors are White
-        if found_colors:
-            index = distances.index(min(distances))
-            color = found_colors[index]
-            if found_colors[index] == "Light":
-                background = q.getpalette()[:3]
-                foreground = q.getpalette()[3:6]
-                distance = np.sqrt(
-                    np.sum(
-                        (np.asarray(background) -
-                         np.asarray(foreground)) ** 2))
-                if distance < 150:
-                    color = "Default"
-        return color
+        return classify_font_colors(
+            [self.get_dominant_colors(image, coords)])[0]
 
 
 class ChoiceSetProperty(BaseExtractProperties):
@@ -272,7 +221,9 @@ class TextBoxProperty(BaseExtractProperties, FontColor):
             "image_data": image_data,
             "size": font_spec.get_size(image, coords, img_data=image_data),
             "weight": font_spec.get_weight(image, coords, img_data=image_data),
-            "color": self.get_colors(image, coords)
+            # dominant colors are classified for the whole card together
+            # by the colors.classify_colors
+            "color": self.get_dominant_colors(image, coords)
 
         }
 
@@ -291,45 +242,8 @@ class ActionSetProperty(BaseExtractProperties):
         @param coords: object's coordinate
         @return: style string of the actionset
         """
-        cropped_image = image.crop(coords)
-        # get 2 dominant colors
-        quantized = cropped_image.quantize(colors=2, method=2)
-        # extract the background color
-        background_color = quantized.getpalette()[:3]
-        colors = {
-            "destructive": [
-                (255, 0, 0),
-                (180, 8, 0),
-                (220, 54, 45),
-                (194, 25, 18),
-                (143, 7, 0)
-            ],
-            "positive": [
-                (0, 0, 255),
-                (7, 47, 95),
-                (18, 97, 160),
-                (56, 149, 211)
-            ]
-        }
-        style = "default"
-        found_colors = []
-        distances = []
-        # find the dominant background colors based on the RGB difference
-        for key, values in colors.items():
-            for value in values:
-                distance = np.sqrt(
-                    np.sum(
-                        (np.asarray(value) - np.asarray(
-                            background_color)) ** 2
-                    )
-                )
-                if distance <= 150:
-                    found_colors.append(key)
-                    distances.append(distance)
-        if found_colors:
-            index = distances.index(min(distances))
-            style = found_colors[index]
-        return style
+        background_color = FontColor.get_dominant_colors(image, coords)[:3]
+        return classify_actionset_styles([background_color])[0]
 
     def actionset(self, image: Image, coords: Tuple) -> Dict:
         """
@@ -345,7 +259,9 @@ class ActionSetProperty(BaseExtractProperties):
             ),
             "data": text_data[0],
             "image_data": text_data[1],
-            "style": self.get_actionset_type(image, coords)
+            # background color is classified for the whole card together
+            # by the colors.classify_colors
+            "style": FontColor.get_dominant_colors(image, coords)[:3]
         }
 
 
@@ -440,43 +356,45 @@ class ContainerProperties:
     def __init__(self, pil_image=None):
         self.pil_image = pil_image
 
-    def get_container_properties(self, design_object: Union[Dict, List[Dict]],
+    def get_container_properties(self, design_object: Union[LayoutTree,
+                                                            List[Dict]],
                                  pil_image,
                                  container_detail: ContainerDetailTemplate
-                                 ) -> List[Dict]:
+                                 ) -> Union[LayoutTree, List[Dict]]:
         """
         Method to extract the design properties of the containers objects.
-        @param design_object: the container object
+        @param design_object: card layout ds or its LayoutTree
         @param pil_image: input PIL image
         @returns: the property updated design element.
         @param container_detail: object of the ContainerDetailTemplate
         """
+        layout_tree = design_object
+        if not isinstance(design_object, LayoutTree):
+            layout_tree = LayoutTree.from_layout(design_object)
+        self.set_container_properties(layout_tree, LayoutTree.ROOT)
+        return design_object
 
+    def set_container_properties(self, layout_tree: LayoutTree,
+                                 index: int) -> None:
+        """
+        Extracts the container properties of the node's children.
+        @param layout_tree: LayoutTree of the card layout
+        @param index: index of the node whose children are updated
+        """
         # TODO: remove the choiceset removal part after the container
         #  alignment property is added
-        if isinstance(design_object, list):
-            for design_obj in design_object:
-                self.get_container_properties(design_obj, pil_image,
-                                              container_detail)
-
-        elif (isinstance(design_object, dict)
-              and design_object.get("object", "") in DsHelper.CONTAINERS[:-1]):
-
-            container_objects = getattr(container_detail,
-                                        design_object.get("object", ""))
+        nodes = layout_tree.nodes
+        for child in nodes[index].children:
+            node = nodes[child]
+            if node.object not in DsHelper.CONTAINERS[:-1]:
+                continue
             # TODO: This check will be removed after row-column optimization
-            if design_object.get("object") == "column":
-                container_property = None
-            else:
-                property_object = getattr(self, design_object.get("object", ""))
-                container_property = property_object(design_object)
-
-            if container_property:
-                design_object.update(container_property)
-            self.get_container_properties(container_objects(design_object),
-                                          pil_image,
-                                          container_detail)
-        return design_object
+            if node.object != "column":
+                property_object = getattr(self, node.object)
+                container_property = property_object(node.element)
+                if container_property:
+                    node.element.update(container_property)
+            self.set_container_properties(layout_tree, child)
 
     def get_column_width_keys(self, default_config: Dict, ratio: Tuple,
                               column_set: Dict,
@@ -4,7 +4,7 @@ used for providing modularity to the extract properties class.
 """
 
 import abc
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 from PIL import Image
 
 
@@ -46,6 +46,25 @@ class AbstractFontColor(metaclass=abc.ABCMeta):
         pass
 
 
+class AbstractOcrEngine(metaclass=abc.ABCMeta):
+    """
+    Abstract class for the OCR engine returning pytesseract style
+    image data.
+    """
+    @abc.abstractmethod
+    def image_to_data(self, image: Image, psm: int) -> Dict:
+        pass
+
+
+class AbstractOcrStrategy(metaclass=abc.ABCMeta):
+    """
+    Abstract class for collecting the ocr results of the design objects.
+    """
+    @abc.abstractmethod
+    def extract(self, image: Image, design_objects: List[Dict]) -> Dict:
+        pass
+
+
 class AbstractChoiceExtraction(AbstractBaseExtractProperties):
     """
     Abstract class for extracting the property related to Choice buttons.
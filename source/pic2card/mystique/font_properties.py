@@ -4,6 +4,8 @@ can switch for different implementation to obtain font properties
 """
 
 from typing import Tuple, Dict, List
+import threading
+import weakref
 import numpy as np
 import cv2
 import statistics
@@ -190,3 +192,86 @@ class FontPropMorph(FontPropBoundingBox):
         # width of line = area of the line / length of the line
         thickness = round(area_of_img/area_of_skel, 2)
         return {img_data['uuid']: thickness}
+
+
+class FontPropDistance(FontPropMorph):
+    """
+    Class handles extraction of font weight property using the distance
+    transform of the text strokes.
+    The morphological skeleton of `FontPropMorph` is the set of text pixels
+    whose city-block distance to the background is a local maxima over the
+    cross neighbourhood, so the skeleton is found in a single pass instead
+    of eroding the crop till it vanishes and gives the same thickness.
+    The binary [ thresholded grayscale ] buffer is computed once for the
+    whole card and shared by all the textboxes.
+    """
+    _binary_cache = {}
+    _binary_cache_lock = threading.Lock()
+    _cache_size = 4
+    kernel = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+
+    @staticmethod
+    def get_binary_image(image: np.ndarray) -> np.ndarray:
+        """
+        Returns the inverse binary format of the image, text pixels being
+        white.
+        @param image: input image array
+        @return: binary image array
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        _, img = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+        return img
+
+    def get_card_binary_image(self, image: Image) -> np.ndarray:
+        """
+        Returns the binary format of the whole card, cached for the image
+        object being processed.
+        @param image : input PIL image
+        @return: binary image array
+        """
+        with self._binary_cache_lock:
+            cached = self._binary_cache.get(id(image))
+            if cached and cached[0]() is image:
+                return cached[1]
+            img = self.get_binary_image(np.asarray(image))
+            if len(self._binary_cache) >= self._cache_size:
+                self._binary_cache.clear()
+            self._binary_cache[id(image)] = (weakref.ref(image), img)
+            return img
+
+    def get_thickness(self, img: np.ndarray) -> float:
+        """
+        Returns the stroke thickness of the binary text image.
+        @param img: binary image array
+        @return: thickness
+        """
+        area_of_img = np.count_nonzero(img)
+        distances = cv2.distanceTransform(img, cv2.DIST_L1, 3)
+        # skeleton pixels are the local maximas of the distances
+        skel = (distances > 0) & (cv2.dilate(distances, self.kernel)
+                                  == distances)
+        # length of the lines in text
+        area_of_skel = np.float64(np.count_nonzero(skel))
+        # width of line = area of the line / length of the line
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return round(area_of_img / area_of_skel, 2)
+
+    def get_weight(self, image: Image, coords: Tuple, img_data: None) -> str:
+        """
+        Extract the weight of the each words from the stroke thickness of
+        the text.
+
+        @param image : input PIL image
+        @param coords: list of coordinated from which
+                       text and height should be extracted
+        @return: weight
+        """
+        xmin, ymin, xmax, ymax = map(int, map(round, coords))
+        width, height = image.size
+        if 0 <= xmin <= xmax <= width and 0 <= ymin <= ymax <= height:
+            card_img = self.get_card_binary_image(image)
+            img = np.ascontiguousarray(card_img[ymin:ymax, xmin:xmax])
+        else:
+            # crops going out of the image are padded by PIL
+            img = self.get_binary_image(np.asarray(image.crop(coords)))
+        return {img_data['uuid']: self.get_thickness(img)}
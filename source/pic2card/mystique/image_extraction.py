@@ -12,6 +12,56 @@ from PIL import Image
 
 from mystique import config
 
+# Number of boxes compared together against the interval index
+PAIRS_CHUNK_SIZE = 256
+
+
+def find_overlapping_pairs(intervals1: np.ndarray,
+                           intervals2: np.ndarray) -> Tuple[np.ndarray,
+                                                            np.ndarray]:
+    """
+    Returns the index pairs of the overlapping x intervals of the 2 lists
+    of intervals.
+    The intervals2 are sorted by their start to form an interval index,
+    chunks of the x sorted intervals1 are compared only with the prefix
+    of the index starting before the chunk's end and ending after the
+    chunk's start.
+    @param intervals1: n x 2 array of interval start and end
+    @param intervals2: m x 2 array of interval start and end
+    @return: positions in intervals1, positions in intervals2
+    """
+    rows, cols = [], []
+    order1 = np.argsort(intervals1[:, 0], kind="stable")
+    order2 = np.argsort(intervals2[:, 0], kind="stable")
+    starts2 = intervals2[order2, 0]
+    ends2 = intervals2[order2, 1]
+    for chunk_start in range(0, len(order1), PAIRS_CHUNK_SIZE):
+        chunk = order1[chunk_start:chunk_start + PAIRS_CHUNK_SIZE]
+        starts1 = intervals1[chunk, 0]
+        ends1 = intervals1[chunk, 1]
+        prefix_end = np.searchsorted(starts2, ends1.max(), side="right")
+        candidates = np.nonzero(ends2[:prefix_end] >= starts1.min())[0]
+        if not len(candidates):
+            continue
+        overlaps = ((starts2[candidates][None, :] <= ends1[:, None])
+                    & (ends2[candidates][None, :] >= starts1[:, None]))
+        chunk_rows, chunk_cols = np.nonzero(overlaps)
+        rows.append(chunk[chunk_rows])
+        cols.append(order2[candidates[chunk_cols]])
+    if not rows:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _get_x_intervals(boxes: np.ndarray) -> np.ndarray:
+    """
+    Returns the x extent of the boxes as intervals.
+    @param boxes: n x 4 array of boxes
+    @return: n x 2 array of intervals
+    """
+    return np.stack([np.minimum(boxes[:, 0], boxes[:, 2]),
+                     np.maximum(boxes[:, 0], boxes[:, 2])], axis=1)
+
 
 class ImageExtraction:
     """
@@ -81,41 +131,75 @@ class ImageExtraction:
         else:
             return contains
 
+    @staticmethod
+    def find_points_pairs(boxes1: np.ndarray, boxes2: np.ndarray,
+                          for_image=True) -> np.ndarray:
+        """
+        Vectorized `find_points` with for_image over the box pairs.
+        @param boxes1: n x 4 array of 1st object's coordinates
+        @param boxes2: n x 4 array of 2nd object's coordinates
+        @return: array of True/False
+        """
+        x5 = np.maximum(boxes1[:, 0], boxes2[:, 0])
+        y5 = np.maximum(boxes1[:, 1], boxes2[:, 1])
+        x6 = np.minimum(boxes1[:, 2], boxes2[:, 2])
+        y6 = np.minimum(boxes1[:, 3], boxes2[:, 3])
+        return (x5 <= x6) & (y5 <= y6)
+
+    @staticmethod
+    def check_contains_pairs(boxes1: np.ndarray, boxes2: np.ndarray,
+                             between_models=False) -> np.ndarray:
+        """
+        Vectorized `check_contains` over the box pairs.
+        @param boxes1: n x 4 array of 1st object's coordinates
+        @param boxes2: n x 4 array of 2nd object's coordinates
+        @param between_models: A Boolean for check within image objects or
+                               between the RCNN and image model.
+        @return: array of True/False
+        """
+        x_min = np.minimum(boxes2[:, 0], boxes2[:, 2])
+        x_max = np.maximum(boxes2[:, 0], boxes2[:, 2])
+        y_min = np.minimum(boxes2[:, 1], boxes2[:, 3])
+        y_max = np.maximum(boxes2[:, 1], boxes2[:, 3])
+        contains = ((x_min <= boxes1[:, 0]) & (boxes1[:, 0] <= x_max)
+                    & (x_min <= boxes2[:, 2]) & (boxes2[:, 2] <= x_max)
+                    & (y_min <= boxes1[:, 1]) & (boxes1[:, 1] <= y_max)
+                    & (y_min <= boxes2[:, 3]) & (boxes2[:, 3] <= y_max))
+        if between_models:
+            contains |= ((boxes2[:, 0] <= boxes1[:, 0] + 5)
+                         & (boxes1[:, 0] + 5 <= boxes2[:, 2])
+                         & (boxes2[:, 1] <= boxes1[:, 1] + 5)
+                         & (boxes1[:, 1] + 5 <= boxes2[:, 3]))
+        return contains
+
     def remove_noise_objects(self, points: List[Tuple]):
         """
         Removes all noisy objects by eliminating all smaller and intersecting
                 objects within / with the bigger objects.
+        An object is removed if any bigger object intersects or contains it,
+        only the x overlapping pairs from the interval index are compared.
 
         @param points: list of detected object's coordinates.
 
         @return points: list of filtered objects coordinates
         """
-        positions_to_delete = []
-        intersection_combination = []
-        for i in range(len(points)):
-            for j in range(len(points)):
-                if j < len(points) and i < len(points) and i != j:
-                    box1 = [float(c) for c in points[i]]
-                    box2 = [float(c) for c in points[j]]
-                    intersection = self.find_points(box1, box2, for_image=True)
-                    contain = self.check_contains(box1, box2)
-                    if intersection or contain:
-                        if (i, j) not in intersection_combination:
-                            # remove the smallest box
-                            box1_area = (
-                                box1[2] - box1[0]) * (box1[3] - box1[1])
-                            box2_area = (box2[2] - box2[0]) * (
-                                box2[3] - box2[1])
-                            if (box1_area > box2_area and j
-                                    not in positions_to_delete):
-                                positions_to_delete.append(j)
-                                intersection_combination.append((i, j))
-                            elif (box1_area < box1_area and i
-                                  not in positions_to_delete):
-                                positions_to_delete.append(i)
-                                intersection_combination.append((i, j))
+        if len(points) < 2:
+            return list(points)
+        boxes = np.asarray(points, dtype=np.float64).reshape(-1, 4)
+        intervals = _get_x_intervals(boxes)
+        rows, cols = find_overlapping_pairs(intervals, intervals)
+        different = rows != cols
+        rows, cols = rows[different], cols[different]
+        boxes1, boxes2 = boxes[rows], boxes[cols]
+        overlaps = (self.find_points_pairs(boxes1, boxes2)
+                    | self.check_contains_pairs(boxes1, boxes2))
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        # remove the smallest box
+        smaller = overlaps & (areas[rows] > areas[cols])
+        positions_to_delete = np.zeros(len(points), dtype=bool)
+        positions_to_delete[cols[smaller]] = True
         points = [p for ctr, p in enumerate(
-            points) if ctr not in positions_to_delete]
+            points) if not positions_to_delete[ctr]]
         return points
 
     def image_edge_detection(self, image: Image):
@@ -166,20 +250,24 @@ class ImageExtraction:
                             among points1 and points2
         """
 
-        for point1_ctr, point1 in enumerate(points1):
-            for point2_ctr, point2 in enumerate(points2):
-                if not image_first:
-                    intersection = self.find_points(
-                        point1, point2, for_image=True)
-                else:
-                    intersection = False
-                contains = self.check_contains(
-                    point1, point2, between_models=True)
-                if contains or intersection:
-                    if image_first:
-                        included_points_positions[point1_ctr] = 1
-                    else:
-                        included_points_positions[point2_ctr] = 1
+        if not len(points1) or not len(points2):
+            return
+        boxes1 = np.asarray(points1, dtype=np.float64).reshape(-1, 4)
+        boxes2 = np.asarray(points2, dtype=np.float64).reshape(-1, 4)
+        # points1's start is shifted by 5px in the between models
+        # containment check
+        intervals1 = _get_x_intervals(boxes1)
+        intervals1[:, 1] = np.maximum(intervals1[:, 1], boxes1[:, 0] + 5)
+        rows, cols = find_overlapping_pairs(intervals1,
+                                            _get_x_intervals(boxes2))
+        pairs1, pairs2 = boxes1[rows], boxes2[cols]
+        overlaps = self.check_contains_pairs(pairs1, pairs2,
+                                             between_models=True)
+        if not image_first:
+            overlaps |= self.find_points_pairs(pairs1, pairs2)
+        positions = rows[overlaps] if image_first else cols[overlaps]
+        for position in np.unique(positions):
+            included_points_positions[position] = 1
 
     def get_image_with_boundary_boxes(self, image=None, detected_coords=None,
                                       pil_image=None, faster_rcnn_image=None):
@@ -207,7 +295,7 @@ class ImageExtraction:
         for ctr, point in enumerate(image_points):
             if included_points_positions[ctr] != 1:
                 image_points1.append(point)
-        image_points = sorted(set(image_points1), key=image_points1.index)
+        image_points = list(dict.fromkeys(image_points1))
 
         # If the design boundary is detected as image object remove it
         width, height = pil_image.size
@@ -252,7 +340,7 @@ class ImageExtraction:
         for ctr, point in enumerate(image_points):
             if included_points_positions[ctr] != 1:
                 image_points1.append(point)
-        image_points = sorted(set(image_points1), key=image_points1.index)
+        image_points = list(dict.fromkeys(image_points1))
 
         # If the design boundary is detected as image object remove it
         width, height = pil_image.size
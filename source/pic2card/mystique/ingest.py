@@ -0,0 +1,233 @@
+"""Module for ingesting the uploaded card image.
+
+The upload is decoded once into a `CardImage`, which hands out the views of
+the image the pipeline stages consume [ PIL image, RGB / BGR / grayscale
+arrays ]. The array views are computed on their first use and cached, so a
+request only pays for the conversions its detection model and stages need.
+Detection models declare the view they consume with `input_layout`.
+
+The upload's dimensions are validated from the image header before it is
+decoded, and oversize images are downscaled while decoding [ in the DCT
+domain for JPEGs, using the PIL draft mode ].
+"""
+import base64
+import binascii
+import io
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from mystique import config
+
+# base64 characters decoded to read the image header [ multiple of 4 ]
+HEADER_BASE64_CHARS = 64 * 1024
+
+# image layouts of the detection model's `image_np` input, pil models only
+# use the PIL image and get no array, encoded models get the png / jpeg bytes.
+INPUT_LAYOUTS = ("pil", "rgb", "bgr", "gray", "encoded")
+DEFAULT_INPUT_LAYOUT = "bgr"
+
+
+class ImageRejected(ValueError):
+    """
+    Upload rejected from its header, before the image is decoded.
+    """
+
+
+def open_image(image_data: bytes) -> Image:
+    """
+    Opens the encoded image without decoding it, PIL only parses the header
+    on open.
+    """
+    try:
+        return Image.open(io.BytesIO(image_data))
+    except Image.DecompressionBombError as ex:
+        raise ImageRejected(str(ex))
+
+
+def read_image_size(image_data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Returns the image size from the header of the encoded image, the data
+    can be truncated after the header.
+    @param image_data: encoded image or its leading bytes
+    @return: width and height, None if the header couldn't be read
+    """
+    try:
+        with open_image(image_data) as image:
+            return image.size
+    except ImageRejected:
+        raise
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def validate_image_size(size: Tuple[int, int]):
+    """
+    Raises ImageRejected if the image dimensions are over the limits.
+    @param size: width and height
+    """
+    width, height = size
+    if (max(width, height) > config.IMG_MAX_DIMENSION
+            or width * height > config.IMG_MAX_PIXELS):
+        raise ImageRejected(
+            f"Upload images of dimensions <= {config.IMG_MAX_DIMENSION}px"
+            f" and <= {config.IMG_MAX_PIXELS / 1e6:g} megapixels.")
+
+
+def get_decode_size(size: Tuple[int, int],
+                    max_side: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the downscaled size of the image keeping the aspect ratio, None
+    if the image is within the max side.
+    """
+    if not max_side or max(size) <= max_side:
+        return None
+    scale = max_side / max(size)
+    return tuple(max(1, round(side * scale)) for side in size)
+
+
+def decode_image(image_data: bytes, max_side: int = None) -> Image:
+    """
+    Decodes the image after validating its dimensions, oversize images are
+    downscaled to the max side.
+    @param image_data: png / jpeg encoded image
+    @param max_side: maximum width / height, defaults to IMG_MAX_DECODE_SIDE
+    @return: decoded RGB PIL image
+    """
+    max_side = config.IMG_MAX_DECODE_SIDE if max_side is None else max_side
+    image = open_image(image_data)
+    validate_image_size(image.size)
+    decode_size = get_decode_size(image.size, max_side)
+    if decode_size and image.format == "JPEG":
+        # decodes at the smallest DCT scale larger than the decode size
+        image.draft("RGB", decode_size)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if decode_size and image.size != decode_size:
+        image = image.resize(decode_size, Image.LANCZOS)
+    return image
+
+
+class CardImage:
+    """
+    Decoded card image with the lazily computed and cached views.
+    """
+
+    def __init__(self, image: Image, encoded: bytes = None):
+        """
+        @param image: decoded PIL image, converted to RGB if needed
+        @param encoded: the encoded image, if the decoded image is of the
+                        same resolution
+        """
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        self.pil = image
+        self._encoded = encoded
+        self._views = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_bytes(cls, image_data: bytes, max_side: int = None):
+        """
+        Decodes the encoded image.
+        @param image_data: png / jpeg encoded image
+        @param max_side: maximum width / height of the decoded image
+        @return: CardImage instance
+        """
+        image = decode_image(image_data, max_side=max_side)
+        # a downscaled image has to be encoded again
+        encoded = image_data if image.size == read_image_size(
+            image_data) else None
+        return cls(image, encoded=encoded)
+
+    @classmethod
+    def from_base64(cls, bs64_img: str, max_side: int = None):
+        """
+        Decodes the base64 encoded image, the dimensions are validated from
+        the leading characters before the whole string is decoded.
+        @param bs64_img: base64 string of the image
+        @param max_side: maximum width / height of the decoded image
+        @return: CardImage instance
+        """
+        if len(bs64_img) > HEADER_BASE64_CHARS:
+            try:
+                size = read_image_size(
+                    base64.b64decode(bs64_img[:HEADER_BASE64_CHARS]))
+            except binascii.Error:
+                size = None
+            if size:
+                validate_image_size(size)
+        return cls.from_bytes(base64.b64decode(bs64_img), max_side=max_side)
+
+    @property
+    def size(self):
+        return self.pil.size
+
+    def _get_view(self, layout: str, convert) -> np.ndarray:
+        with self._lock:
+            if layout not in self._views:
+                view = convert()
+                # the views are shared by the stages, read only
+                view.flags.writeable = False
+                self._views[layout] = view
+            return self._views[layout]
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """
+        HxWx3 RGB array of the image.
+        """
+        return self._get_view("rgb", lambda: np.asarray(self.pil))
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """
+        HxWx3 BGR array of the image, the opencv layout.
+        """
+        return self._get_view(
+            "bgr", lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR))
+
+    @property
+    def gray(self) -> np.ndarray:
+        """
+        HxW grayscale array of the image.
+        """
+        return self._get_view(
+            "gray", lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY))
+
+    @property
+    def encoded(self) -> bytes:
+        """
+        Encoded image, the upload itself or the png of the decoded image.
+        """
+        with self._lock:
+            if self._encoded is None:
+                buffer = io.BytesIO()
+                self.pil.save(buffer, format="PNG")
+                self._encoded = buffer.getvalue()
+            return self._encoded
+
+    def view(self, layout: str):
+        """
+        Returns the view of the image in the given layout.
+        @param layout: one of the INPUT_LAYOUTS
+        @return: PIL image, numpy array or the encoded bytes
+        """
+        if layout not in INPUT_LAYOUTS:
+            raise ValueError(f"Unknown image layout {layout}")
+        return getattr(self, layout)
+
+    def model_inputs(self, od_model):
+        """
+        Returns the `image_np` and `image` inputs of the detection model's
+        `get_objects`, as per the model's input layout.
+        @param od_model: object detection model instance
+        @return: image array [ None for the pil layout, bytes for the
+                 encoded layout ] and the PIL image
+        """
+        layout = getattr(od_model, "input_layout", DEFAULT_INPUT_LAYOUT)
+        image_np = None if layout == "pil" else self.view(layout)
+        return image_np, self.pil
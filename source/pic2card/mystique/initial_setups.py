@@ -1,7 +1,6 @@
 """ Module for setting up the tensorflow graphs and tensors for faster
     rcnn object detection
 """
-import tensorflow as tf
 from mystique import config
 
 
@@ -14,6 +13,8 @@ def set_graph_and_tensors(tensors=("detection_boxes", "detection_scores",
 
     :return: detection_graph, category_index, tensor_dict
     """
+    import tensorflow as tf
+
     tensor_dict = dict()
     detection_graph = tf.Graph()
     # setting up default graph with graphs from inference graph
@@ -0,0 +1,130 @@
+"""Module to calculate the PASCAL VOC mAP of the detection model from the
+ground truth and predicted label files generated by `commands.map_score`.
+
+Ground truth lines are `class xmin ymin xmax ymax` and prediction lines
+are `class score xmin ymin xmax ymax`, one file per image with the same
+name in both the directories. The matching follows
+https://github.com/Cartucho/mAP [ all point interpolated AP ].
+"""
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def read_label_file(path: str, with_score=False) -> List[Tuple]:
+    """
+    Reads the space separated label file, class names shouldn't have
+    spaces.
+    @param path: label file path
+    @param with_score: True for the prediction files
+    @return: list of class, [ score, ] and the box coordinates
+    """
+    labels = []
+    with open(path) as label_file:
+        for line in label_file:
+            values = line.split()
+            if not values:
+                continue
+            labels.append((values[0], *map(float, values[1:])))
+    if with_score:
+        return [(label, score, box) for label, score, *box in labels]
+    return [(label, box) for label, *box in labels]
+
+
+def box_iou(box: List[float], boxes: np.ndarray) -> np.ndarray:
+    """
+    IOU of the box with each of the boxes, in pixel coordinates [ the
+    max coordinate is inclusive ].
+    """
+    width = (np.minimum(box[2], boxes[:, 2])
+             - np.maximum(box[0], boxes[:, 0]) + 1)
+    height = (np.minimum(box[3], boxes[:, 3])
+              - np.maximum(box[1], boxes[:, 1]) + 1)
+    intersection = np.where((width > 0) & (height > 0), width * height, 0)
+    union = ((box[2] - box[0] + 1) * (box[3] - box[1] + 1)
+             + (boxes[:, 2] - boxes[:, 0] + 1)
+             * (boxes[:, 3] - boxes[:, 1] + 1)
+             - intersection)
+    return intersection / union
+
+
+def voc_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    """
+    Area under the precision recall curve, with the precision made
+    monotonically decreasing.
+    """
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[0.0], precision, [0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    changes = np.nonzero(recall[1:] != recall[:-1])[0] + 1
+    return float(np.sum((recall[changes] - recall[changes - 1])
+                        * precision[changes]))
+
+
+def average_precisions(ground_truths: Dict[str, List],
+                       predictions: Dict[str, List],
+                       iou_threshold=0.5) -> Dict[str, float]:
+    """
+    Returns the AP of each ground truth class.
+    @param ground_truths: image name to the list of class and box
+    @param predictions: image name to the list of class, score and box
+    @param iou_threshold: minimum IOU of a true positive
+    @return: class to AP dict
+    """
+    classes = sorted({label for labels in ground_truths.values()
+                      for label, _ in labels})
+    class_aps = {}
+    for class_name in classes:
+        gt_boxes = {}
+        for image, labels in ground_truths.items():
+            boxes = [box for label, box in labels if label == class_name]
+            gt_boxes[image] = np.array(boxes, dtype=float).reshape(-1, 4)
+        matched = {image: np.zeros(len(boxes), dtype=bool)
+                   for image, boxes in gt_boxes.items()}
+        detections = sorted(
+            ((score, image, box)
+             for image, labels in predictions.items()
+             for label, score, box in labels if label == class_name),
+            key=lambda detection: -detection[0])
+        true_positives = np.zeros(len(detections))
+        for position, (_, image, box) in enumerate(detections):
+            boxes = gt_boxes.get(image)
+            if boxes is None or not len(boxes):
+                continue
+            ious = box_iou(box, boxes)
+            best = int(np.argmax(ious))
+            if ious[best] >= iou_threshold and not matched[image][best]:
+                matched[image][best] = True
+                true_positives[position] = 1
+        n_ground_truths = sum(len(boxes) for boxes in gt_boxes.values())
+        tp_cumsum = np.cumsum(true_positives)
+        recall = tp_cumsum / n_ground_truths
+        precision = tp_cumsum / np.arange(1, len(detections) + 1)
+        class_aps[class_name] = voc_ap(recall, precision)
+    return class_aps
+
+
+def mean_average_precision(ground_truth_dir: str, pred_dir: str,
+                           iou_threshold=0.5) -> Tuple[float,
+                                                       Dict[str, float]]:
+    """
+    Returns the mAP and the per class AP of the label files.
+    @param ground_truth_dir: ground truth label files directory
+    @param pred_dir: prediction label files directory
+    @param iou_threshold: minimum IOU of a true positive
+    @return: mAP, class to AP dict
+    """
+    ground_truths, predictions = {}, {}
+    for file_name in os.listdir(ground_truth_dir):
+        ground_truths[file_name] = read_label_file(
+            os.path.join(ground_truth_dir, file_name))
+        pred_path = os.path.join(pred_dir, file_name)
+        if os.path.exists(pred_path):
+            predictions[file_name] = read_label_file(pred_path,
+                                                     with_score=True)
+    class_aps = average_precisions(ground_truths, predictions,
+                                   iou_threshold=iou_threshold)
+    if not class_aps:
+        return 0.0, class_aps
+    return float(np.mean(list(class_aps.values()))), class_aps
@@ -2,7 +2,7 @@
 Inference APIs for the trained models.
 """
 
-from typing import Callable
+from typing import Callable, List
 import torch
 import torchvision.transforms as T
 from PIL import Image
@@ -55,3 +55,25 @@ def detect(image: Image, model: Callable,
     # bboxes = box_cxcywh_to_xyxy(outputs['pred_boxes'][0, keep])
 
     return probas[keep], bboxes_scaled
+
+
+def detect_batch(images: List[Image.Image], model: Callable,
+                 transform: Callable, threshold=0.8):
+    """
+    Batched `detect` for the images of the same size.
+    @param images: list of PIL Images of the same size
+    @param model: A Serialized callable, exported using torchscript.
+    @param transform: Data transformer function.
+    @param threshold: Confidence of bbox prediction.
+    @return: list of scores and scaled boxes of each image
+    """
+    image_tnsr = torch.stack([transform(image) for image in images])
+    outputs = model(image_tnsr)
+    probas = outputs['pred_logits'].softmax(-1)[:, :, :-1]
+    results = []
+    for position, image in enumerate(images):
+        keep = probas[position].max(-1).values > threshold
+        bboxes_scaled = rescale_bboxes(
+            outputs['pred_boxes'][position, keep], image.size)
+        results.append((probas[position, keep], bboxes_scaled))
+    return results
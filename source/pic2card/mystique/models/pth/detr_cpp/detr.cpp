@@ -1,5 +1,9 @@
 #include <torch/extension.h>
 #include <torch/script.h>
+#include <ATen/Parallel.h>
+
+#include <algorithm>
+#include <map>
 
 #include "detr.hpp"
 
@@ -76,55 +80,198 @@ struct Detr
         return {newW, newH};
     }
 
-    const std::vector<cv::Mat> predict(cv::Mat &image)
+    /**
+     * Mean-std normalised 1x3xHxW input tensor of the RGB image, resized
+     * with `getNewSize`. The caller's image buffer is left untouched, it is
+     * the numpy array shared zero-copy from python.
+     **/
+    torch::Tensor preprocess(const cv::Mat &image)
     {
-        cv::cvtColor(image, image, cv::COLOR_BGR2RGB);
-        image.convertTo(image, CV_32FC3, 1.0f / 255.0f);
+        cv::Mat rgbImage;
+        image.convertTo(rgbImage, CV_32FC3, 1.0f / 255.0f);
 
         // (width, height)
-        std::vector<uint> imsize = getNewSize(image.cols, image.rows, 800, 1333);
+        std::vector<uint> imsize = getNewSize(rgbImage.cols, rgbImage.rows, 800, 1333);
 
         // Resize the image.
         cv::Size scale(imsize[0], imsize[1]);
-        cv::resize(image, image, scale);
+        cv::resize(rgbImage, rgbImage, scale);
 
+        // from_blob doesn't own the resized image, the normalisation below
+        // makes the tensor owning its data.
         torch::Tensor imTensor = torch::from_blob(
-            image.data,
-            {1,
-             imsize[1], // height
-             imsize[0], // width
-             3});
-
-        // BGR -> RGB
-        imTensor = imTensor.permute({0, 3, 1, 2});
+                                     rgbImage.data,
+                                     {1,
+                                      imsize[1], // height
+                                      imsize[0], // width
+                                      3})
+                                     .permute({0, 3, 1, 2});
 
         // Imagenet normalisation
-        imTensor[0][0] = imTensor[0][0].sub_(0.485).div_(0.229);
-        imTensor[0][1] = imTensor[0][1].sub_(0.456).div_(0.224);
-        imTensor[0][2] = imTensor[0][2].sub_(0.406).div_(0.225);
+        torch::Tensor mean = torch::tensor({0.485f, 0.456f, 0.406f}).view({1, 3, 1, 1});
+        torch::Tensor stdDev = torch::tensor({0.229f, 0.224f, 0.225f}).view({1, 3, 1, 1});
+        return imTensor.sub(mean).div(stdDev).contiguous();
+    }
 
+    /**
+     * Runs the model on the NxCxHxW batch and returns the class probabilities
+     * [ with the no-object class ] and the normalised cxcywh boxes of the
+     * queries of each image.
+     **/
+    std::vector<torch::Tensor> runModel(const torch::Tensor &batch)
+    {
+        torch::NoGradGuard noGrad;
         std::vector<torch::jit::IValue> inputs;
-        inputs.push_back(imTensor);
+        inputs.push_back(batch);
         auto outDict = model.forward(inputs).toGenericDict();
 
         torch::Tensor predLogits = outDict.at("pred_logits")
                                        .toTensor()
-                                       .squeeze()
-                                       .softmax(-1);
+                                       .softmax(-1)
+                                       .to(torch::kCPU)
+                                       .to(torch::kF32);
+        torch::Tensor predBoxes = outDict.at("pred_boxes")
+                                      .toTensor()
+                                      .to(torch::kCPU)
+                                      .to(torch::kF32);
+        return {predLogits, predBoxes};
+    }
+
+    std::vector<torch::Tensor> forward(const cv::Mat &image)
+    {
+        torch::NoGradGuard noGrad;
+        std::vector<torch::Tensor> outputs = runModel(preprocess(image));
+        return {outputs[0].squeeze(0), outputs[1].squeeze(0)};
+    }
+
+    /**
+     * Map the torch::Tensor to cv::Mat, helps to avoid torch package
+     * dependency at python side.
+     **/
+    static cv::Mat toMat(const torch::Tensor &tensor, int type)
+    {
+        torch::Tensor data = tensor.contiguous();
+        int cols = data.dim() > 1 ? data.size(1) : 1;
+        cv::Mat mat(data.size(0), cols, type);
+        if (data.numel() > 0)
+        {
+            std::memcpy((void *)mat.data, data.data_ptr(), data.element_size() * data.numel());
+        }
+        return mat;
+    }
+
+    const std::vector<cv::Mat> predict(const cv::Mat &image)
+    {
+        std::vector<torch::Tensor> outputs = forward(image);
+        return {toMat(outputs[0], CV_32F), toMat(outputs[1], CV_32F)};
+    }
+
+    /**
+     * Detections above the threshold from the outputs of an image, the
+     * normalised boxes are converted to xmin, ymin, xmax, ymax and scaled by
+     * the width and height.
+     *
+     * Returns the classes, scores and boxes.
+     **/
+    static std::vector<cv::Mat> postprocess(const torch::Tensor &predLogits,
+                                            const torch::Tensor &predBoxes,
+                                            float threshold, float width,
+                                            float height)
+    {
+        // Skip the default background class added at train time.
+        torch::Tensor probas = predLogits.narrow(1, 0, predLogits.size(1) - 1);
+        auto maxProbas = probas.max(-1);
+        torch::Tensor keep = std::get<0>(maxProbas) > threshold;
 
-        // predLogits = predLogits.narrow(1, 0, predLogits.size(1) - 1);
-        torch::Tensor predBoxes = outDict.at("pred_boxes").toTensor().squeeze();
+        torch::Tensor scores = std::get<0>(maxProbas).masked_select(keep);
+        torch::Tensor classes = std::get<1>(maxProbas).masked_select(keep).to(torch::kInt32);
+        torch::Tensor boxes = predBoxes.index_select(0, keep.nonzero().view(-1));
+
+        // cxcywh -> xyxy, rescaled to the target size.
+        torch::Tensor center = boxes.narrow(1, 0, 2);
+        torch::Tensor halfSize = boxes.narrow(1, 2, 2).mul(0.5);
+        boxes = torch::cat({center - halfSize, center + halfSize}, 1)
+                    .mul(torch::tensor({width, height, width, height}));
+
+        return {toMat(classes, CV_32S), toMat(scores, CV_32F), toMat(boxes, CV_32F)};
+    }
 
-        // // Map the torch::Tensor to cv::Mat, helps to avoid torch package dependency at python side.
-        predLogits = predLogits.to(torch::kCPU).to(torch::kF32);
-        cv::Mat cvMatLogits(predLogits.size(0), predLogits.size(1), CV_32F);
-        std::memcpy((void *)cvMatLogits.data, predLogits.data_ptr(), sizeof(float) * predLogits.numel());
+    /**
+     * Detections above the threshold with the boxes in xmin, ymin, xmax, ymax
+     * of the target size [ width, height ], the image size if not given.
+     *
+     * Returns the classes, scores and boxes.
+     **/
+    const std::vector<cv::Mat> detect(const cv::Mat &image, float threshold,
+                                      const std::vector<int> &targetSize)
+    {
+        float width = targetSize.size() == 2 ? targetSize[0] : image.cols;
+        float height = targetSize.size() == 2 ? targetSize[1] : image.rows;
 
-        predBoxes = predBoxes.to(torch::kCPU).to(torch::kF32);
-        cv::Mat cvMatBoxes(predBoxes.size(0), predBoxes.size(1), CV_32F);
-        std::memcpy((void *)cvMatBoxes.data, predBoxes.data_ptr(), sizeof(float) * predBoxes.numel());
+        std::vector<torch::Tensor> outputs = forward(image);
+        return postprocess(outputs[0], outputs[1], threshold, width, height);
+    }
 
-        return {cvMatLogits, cvMatBoxes};
+    /**
+     * Batched `detect`, the images are resized in parallel on the ATen
+     * thread pool and the images of the same resized shape are stacked into
+     * a single forward pass.
+     *
+     * The traced model takes only the image tensor and no padding mask, so
+     * the differently shaped images are not padded into one batch, which
+     * would make an image's detections depend on the other images of the
+     * batch. Each shape runs in its own forward pass.
+     *
+     * Returns the classes, scores and boxes of each image.
+     **/
+    const std::vector<std::vector<cv::Mat>> predictBatch(
+        const std::vector<cv::Mat> &images, float threshold,
+        const std::vector<std::vector<int>> &targetSizes)
+    {
+        torch::NoGradGuard noGrad;
+        int64_t batchSize = images.size();
+        if (batchSize == 0)
+        {
+            return {};
+        }
+
+        std::vector<torch::Tensor> tensors(batchSize);
+        at::parallel_for(0, batchSize, 1, [&](int64_t begin, int64_t end) {
+            for (int64_t i = begin; i < end; i++)
+            {
+                tensors[i] = preprocess(images[i]).squeeze(0);
+            }
+        });
+
+        // image indices of each resized shape [ height, width ]
+        std::map<std::pair<int64_t, int64_t>, std::vector<int64_t>> shapes;
+        for (int64_t i = 0; i < batchSize; i++)
+        {
+            shapes[{tensors[i].size(1), tensors[i].size(2)}].push_back(i);
+        }
+
+        std::vector<std::vector<cv::Mat>> results(batchSize);
+        for (const auto &shape : shapes)
+        {
+            const std::vector<int64_t> &indices = shape.second;
+            std::vector<torch::Tensor> group;
+            for (int64_t i : indices)
+            {
+                group.push_back(tensors[i]);
+            }
+            std::vector<torch::Tensor> outputs = runModel(torch::stack(group));
+
+            for (int64_t j = 0; j < (int64_t)indices.size(); j++)
+            {
+                int64_t i = indices[j];
+                bool hasSize = i < (int64_t)targetSizes.size() && targetSizes[i].size() == 2;
+                float width = hasSize ? targetSizes[i][0] : images[i].cols;
+                float height = hasSize ? targetSizes[i][1] : images[i].rows;
+                results[i] = postprocess(outputs[0][j], outputs[1][j], threshold,
+                                         width, height);
+            }
+        }
+        return results;
     }
 };
 
@@ -138,6 +285,17 @@ PYBIND11_MODULE(TORCH_EXTENSION_NAME, m)
         .def_readonly("model_path", &Detr::model_path)
         // .def("load", &Detr::loadModel)
         .def("get_new_size", &Detr::getNewSize)
-        .def("predict", &Detr::predict)
+        // The GIL is released during the inference, so that the python
+        // threads can run the detections concurrently.
+        .def("predict", &Detr::predict,
+             py::call_guard<py::gil_scoped_release>())
+        .def("detect", &Detr::detect,
+             py::arg("image"), py::arg("threshold") = 0.8f,
+             py::arg("target_size") = std::vector<int>{},
+             py::call_guard<py::gil_scoped_release>())
+        .def("predict_batch", &Detr::predictBatch,
+             py::arg("images"), py::arg("threshold") = 0.8f,
+             py::arg("target_sizes") = std::vector<std::vector<int>>{},
+             py::call_guard<py::gil_scoped_release>())
         .def_readonly("model", &Detr::model);
 }
@@ -1,4 +1,5 @@
 import os
+import threading
 import detr
 import numpy as np
 from PIL import Image
@@ -35,6 +36,78 @@ class TestDetrLib(unittest.TestCase):
         self.assertEqual(pred_logits.shape, (60, 7))
         self.assertEqual(pred_boxes.shape, (60, 4))
 
+    def test_detect(self):
+        "Check the post-processed detections are in the image coordinates"
+        model = detr.Detr(self.model_path)
+        img_np = self.img_np[:, :, :3].copy()
+        original = img_np.copy()
+        classes, scores, boxes = model.detect(img_np, 0.8)
+
+        # input buffer isn't modified in place.
+        self.assertTrue(np.all(img_np == original))
+        self.assertEqual(classes.shape[0], scores.shape[0])
+        self.assertEqual(boxes.shape, (scores.shape[0], 4))
+        self.assertTrue(np.all(scores > 0.8))
+        height, width = img_np.shape[:2]
+        self.assertTrue(np.all(boxes[:, [0, 2]] <= width + 1))
+        self.assertTrue(np.all(boxes[:, [1, 3]] <= height + 1))
+
+        # same detections as the python side post-processing.
+        pred_logits, pred_boxes = model.predict(img_np)
+        probas = pred_logits[:, :-1]
+        keep = probas.max(-1) > 0.8
+        self.assertTrue(np.all(classes.ravel() == probas[keep].argmax(-1)))
+
+        _, _, scaled_boxes = model.detect(img_np, 0.8,
+                                          [width * 2, height * 2])
+        self.assertTrue(np.allclose(scaled_boxes, boxes * 2, rtol=1e-4))
+
+    def test_detect_threads(self):
+        "Check the concurrent detections of the threads"
+        model = detr.Detr(self.model_path)
+        img_np = self.img_np[:, :, :3].copy()
+        expected = model.detect(img_np, 0.8)[2]
+        results = []
+
+        def detect():
+            results.append(model.detect(img_np, 0.8)[2])
+        threads = [threading.Thread(target=detect) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        for boxes in results:
+            self.assertTrue(np.allclose(boxes, expected))
+
+    def test_predict_batch(self):
+        "Check the batched detections of the differently sized images"
+        model = detr.Detr(self.model_path)
+        img_np = self.img_np[:, :, :3].copy()
+        height, width = img_np.shape[:2]
+        # same image with white padding at the right
+        padded_np = np.full((height, width * 2, 3), 255, dtype=np.uint8)
+        padded_np[:, :width] = img_np
+
+        results = model.predict_batch([img_np, padded_np, img_np], 0.8)
+        self.assertEqual(len(results), 3)
+        # each image's detections don't depend on the other images of the
+        # batch.
+        for image, result in zip([img_np, padded_np, img_np], results):
+            classes, scores, boxes = result
+            exp_classes, exp_scores, exp_boxes = model.detect(image, 0.8)
+            self.assertTrue(np.all(classes == exp_classes))
+            self.assertTrue(np.allclose(scores, exp_scores, atol=1e-4))
+            self.assertTrue(np.allclose(boxes, exp_boxes, atol=1e-3))
+            self.assertTrue(np.all(scores > 0.8))
+
+        # batch of one is same as detect.
+        classes, scores, boxes = model.predict_batch([img_np], 0.8)[0]
+        exp_classes, exp_scores, exp_boxes = model.detect(img_np, 0.8)
+        self.assertTrue(np.all(classes == exp_classes))
+        self.assertTrue(np.allclose(boxes, exp_boxes, atol=1e-3))
+        self.assertEqual(model.predict_batch([], 0.8), [])
+
     def test_image_resizing(self):
         model = detr.Detr(self.model_path)
         self.assertEqual(
@@ -1,6 +1,29 @@
+"""
+Object detection backends, the backend modules are imported on the first
+access of their class [ PEP 562 ], so that only the framework of the selected
+backend [ torch, onnx runtime or the detr_cpp extension ] is loaded.
+"""
+from importlib import import_module
+
 # from .detect_objects_pth import PtObjectDetection
-from .detr_objects import DetrOD
-from .detr_cpp_objects import DetrCppOD
+_BACKEND_MODULES = {
+    "DetrOD": ".detr_objects",
+    "DetrDynamicInt8OD": ".detr_objects",
+    "DetrStaticInt8OD": ".detr_objects",
+    "DetrCppOD": ".detr_cpp_objects",
+    "DetrOnnxOD": ".onnx_objects",
+    "FrcnnOnnxOD": ".onnx_objects"
+}
+
+
+def __getattr__(name):
+    if name not in _BACKEND_MODULES:
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+    return getattr(import_module(_BACKEND_MODULES[name], __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_BACKEND_MODULES))
 
 
-__all__ = [DetrOD, DetrCppOD]
+__all__ = list(_BACKEND_MODULES)
@@ -1,41 +1,29 @@
 """
 Doing Detr inference using c++ binding, quick checks shows >3x improvements
-with the inference time.
+with the inference time. The post-processing runs in c++ too and the GIL is
+released during the inference, so the detections of the concurrent threads
+run in parallel.
 """
 import detr
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List
 from PIL import Image
 
 from .od_base import AbstractObjectDetection
 from mystique import config
 
 
-# for output bounding box post-processing
-# TODO: Move these tensor works too into c++ side, as this comes in
-# inference path.
-def box_cxcywh_to_xyxy(x: np.ndarray):
-    x_c, y_c, w, h = [i[:, 0] for i in np.split(x, [1, 2, 3], axis=1)]
-    b = [(x_c - 0.5 * w), (y_c - 0.5 * h),
-         (x_c + 0.5 * w), (y_c + 0.5 * h)]
-    return np.stack(b, axis=1)
-
-
-def rescale_bboxes(out_bbox: np.ndarray, size: Tuple[int, int]):
-    img_w, img_h = size
-    b = box_cxcywh_to_xyxy(out_bbox)
-    b = b * [img_w, img_h, img_w, img_h]
-    return b
-
-
 class DetrCppOD(AbstractObjectDetection):
     """
     Do the inference in c++ code and return the result. This class wraps uses
     detr cpp python extension to do the inference.
     """
-    def __init__(self, pt_path="./detr_trace.pt", threshold=0.8):
+    input_layout = "rgb"
+
+    def __init__(self, pt_path="./detr_trace.pt", threshold=None):
         self.model = detr.Detr(self.model_path)
-        self.threshold = threshold
+        self.threshold = (config.MODEL_CONFIDENCE / 100 if threshold is None
+                          else threshold)
 
     @property
     def model_path(self):
@@ -55,16 +43,27 @@ class DetrCppOD(AbstractObjectDetection):
              "detection_boxes": []
              },
         """
-        pred_logits, pred_boxes = self.model.predict(image_np)
-        pred_logits = pred_logits[:, :-1]
-        # TODO: Use the threshold from config
-        mask = pred_logits.max(-1) > 0.8
+        classes, scores, boxes = self.model.detect(image_np, self.threshold,
+                                                   image.size)
+        return self.get_response(classes, scores, boxes)
+
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image]) -> List[Dict]:
+        """
+        Do model inference for a batch of images, the images of the same
+        resized shape are stacked into a single forward pass in c++.
+        """
+        results = self.model.predict_batch(
+            images_np, self.threshold, [image.size for image in images])
+        return [self.get_response(classes, scores, boxes)
+                for classes, scores, boxes in results]
 
-        scores = pred_logits[mask]
-        boxes = rescale_bboxes(pred_boxes[mask], image.size)
+    @staticmethod
+    def get_response(classes: np.ndarray, scores: np.ndarray,
+                     boxes: np.ndarray) -> Dict:
         return {
-            "detection_classes": scores.argmax(-1),
-            "detection_scores": scores.max(-1),
+            "detection_classes": classes.ravel(),
+            "detection_scores": scores.ravel(),
             "detection_boxes": boxes
         }
 
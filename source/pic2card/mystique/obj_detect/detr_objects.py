@@ -3,12 +3,12 @@ Find the objects from card and its attributes using DETR object detection
 model.
 """
 import numpy as np
-from typing import Dict
+from typing import Dict, List
 from PIL import Image
 import torch
 
 from .od_base import AbstractObjectDetection
-from mystique.models.pth.detr.predict import detect, transform
+from mystique.models.pth.detr.predict import detect, detect_batch, transform
 from mystique import config
 
 
@@ -16,8 +16,12 @@ class DetrOD(AbstractObjectDetection):
     """
     Load the DETR torchscript model and does the inference on PIL images.
     """
-    def __init__(self, pt_path="./detr_trace.pt"):
+    input_layout = "pil"
+
+    def __init__(self, pt_path="./detr_trace.pt", threshold=None):
         self.model = torch.jit.load(self.model_path)
+        self.threshold = (config.MODEL_CONFIDENCE / 100 if threshold is None
+                          else threshold)
 
     @property
     def model_path(self):
@@ -37,8 +41,30 @@ class DetrOD(AbstractObjectDetection):
              "detection_boxes": []
              },
         """
-        # TODO: Use the threshold from config
-        scores, boxes = detect(image, self.model, transform, threshold=0.8)
+        scores, boxes = detect(image, self.model, transform,
+                               threshold=self.threshold)
+        return self.get_response(scores, boxes)
+
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image]) -> List[Dict]:
+        """
+        Do model inference for a batch of images, the images of same size
+        are run together in a single forward pass.
+        """
+        responses = [None] * len(images)
+        size_groups = {}
+        for position, image in enumerate(images):
+            size_groups.setdefault(image.size, []).append(position)
+        for positions in size_groups.values():
+            batch = [images[position] for position in positions]
+            results = detect_batch(batch, self.model, transform,
+                                   threshold=self.threshold)
+            for position, (scores, boxes) in zip(positions, results):
+                responses[position] = self.get_response(scores, boxes)
+        return responses
+
+    @staticmethod
+    def get_response(scores: torch.Tensor, boxes: torch.Tensor) -> Dict:
         ss_ = scores.max(-1)
         return {
             "detection_classes": ss_.indices.detach().numpy(),
@@ -48,3 +74,23 @@ class DetrOD(AbstractObjectDetection):
 
     def get_bboxes(self):
         pass
+
+
+class DetrDynamicInt8OD(DetrOD):
+    """
+    DETR with the INT8 weights and dynamically quantized activations of the
+    linear layers.
+    """
+    @property
+    def model_path(self):
+        return config.DETR_DYNAMIC_INT8_MODEL_PATH
+
+
+class DetrStaticInt8OD(DetrOD):
+    """
+    DETR with the INT8 weights and activations, calibrated on the training
+    images.
+    """
+    @property
+    def model_path(self):
+        return config.DETR_STATIC_INT8_MODEL_PATH
@@ -4,10 +4,14 @@
 import abc
 import numpy as np
 from PIL import Image
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List
 
 
 class AbstractObjectDetection(metaclass=abc.ABCMeta):
+    # layout of the `image_np` input [ one of mystique.ingest.INPUT_LAYOUTS ],
+    # models using only the PIL image get no array.
+    input_layout = "bgr"
+
     @abc.abstractmethod
     def get_objects(self, image_np: np.array,
                     image: Image) -> Tuple[Dict, object]:
@@ -26,6 +30,18 @@ class AbstractObjectDetection(metaclass=abc.ABCMeta):
         """
         pass
 
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image]) -> List[Dict]:
+        """
+        Return the object detection data for a batch of images, in the
+        order of the input images.
+
+        The default implementation runs the images one by one, models
+        supporting batched inference should override it.
+        """
+        return [self.get_objects(image_np=image_np, image=image)
+                for image_np, image in zip(images_np, images)]
+
     @abc.abstractmethod
     def get_bboxes(self, image_path: str, img_pipeline=None):
         """
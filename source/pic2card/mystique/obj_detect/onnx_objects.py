@@ -0,0 +1,181 @@
+"""
+Object detection using the ONNX exports of the DETR and faster rcnn models,
+the inference runs on the onnx runtime CPU provider and doesn't need torch
+or tensorflow at serving time.
+
+The models are exported with `python -m commands.export_onnx`.
+"""
+from typing import Dict, List
+
+import numpy as np
+import onnxruntime as ort
+from PIL import Image
+
+from .od_base import AbstractObjectDetection
+from .postprocess import (detr_transform, detr_response, renormalize_boxes,
+                          softmax)
+from mystique import config
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+}
+
+
+def create_session(model_path: str) -> ort.InferenceSession:
+    """
+    Creates the CPU inference session with the configured thread counts and
+    graph optimization level.
+    @param model_path: path of the onnx model
+    @return: onnx runtime inference session
+    """
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config.ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = config.ONNX_INTER_OP_THREADS
+    options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL
+                              if config.ONNX_INTER_OP_THREADS > 1
+                              else ort.ExecutionMode.ORT_SEQUENTIAL)
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[
+        config.ONNX_GRAPH_OPTIMIZATION_LEVEL]
+    return ort.InferenceSession(model_path, sess_options=options,
+                                providers=["CPUExecutionProvider"])
+
+
+class DetrOnnxOD(AbstractObjectDetection):
+    """
+    Runs the ONNX export of the DETR model, the response is same as
+    `DetrOD`.
+    """
+    input_layout = "pil"
+
+    def __init__(self, model_path=None, threshold=None):
+        self.session = create_session(model_path or self.model_path)
+        self.input_name = self.session.get_inputs()[0].name
+        self.threshold = (config.MODEL_CONFIDENCE / 100 if threshold is None
+                          else threshold)
+
+    @property
+    def model_path(self):
+        return config.ONNX_DETR_MODEL_PATH
+
+    def run_inference(self, images: List[Image.Image]) -> List[Dict]:
+        """
+        Runs the model for the batch of same sized images.
+        @param images: list of PIL Images of the same size
+        @return: list of standard responses in the order of the images
+        """
+        batch = np.stack([detr_transform(image) for image in images])
+        pred_logits, pred_boxes = self.session.run(
+            ["pred_logits", "pred_boxes"], {self.input_name: batch})
+        # Skip the default background class added at train time.
+        probas = softmax(pred_logits)[:, :, :-1]
+        return [detr_response(probas[position], pred_boxes[position],
+                              image.size, self.threshold)
+                for position, image in enumerate(images)]
+
+    def get_objects(self, image_np: np.array, image: Image) -> Dict:
+        """
+        Do model inference using the onnx session and return standard
+        response.
+
+        Response:
+            {
+            "detection_classes": [],
+             "detection_scores": [],
+             "detection_boxes": []
+             },
+        """
+        return self.run_inference([image])[0]
+
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image]) -> List[Dict]:
+        """
+        Do model inference for a batch of images, the images of same size
+        are run together in a single session run.
+        """
+        responses = [None] * len(images)
+        size_groups = {}
+        for position, image in enumerate(images):
+            size_groups.setdefault(image.size, []).append(position)
+        for positions in size_groups.values():
+            results = self.run_inference(
+                [images[position] for position in positions])
+            for position, response in zip(positions, results):
+                responses[position] = response
+        return responses
+
+    def get_bboxes(self):
+        pass
+
+
+class FrcnnOnnxOD(AbstractObjectDetection):
+    """
+    Runs the ONNX conversion of the faster rcnn frozen graph, the response
+    is same as `mystique.detect_objects.ObjectDetection`.
+    """
+    input_layout = "bgr"
+    tensors = ("detection_boxes", "detection_scores", "detection_classes")
+
+    def __init__(self, model_path=None):
+        self.session = create_session(model_path or self.model_path)
+        self.input_name = self.session.get_inputs()[0].name
+        # tf2onnx keeps the tensorflow tensor names [ with the :0 suffix ]
+        output_names = {output.name for output in self.session.get_outputs()}
+        self.output_names = [name if name in output_names else f"{name}:0"
+                             for name in self.tensors]
+
+    @property
+    def model_path(self):
+        return config.ONNX_FRCNN_MODEL_PATH
+
+    def run_inference(self, images: np.array) -> List[Dict]:
+        """
+        Runs the model for the batch of same sized images
+        @param images: numpy array of input design images, NxHxWx3
+        @return: list of output dict of objects, classes and coordinates
+        """
+        boxes, scores, classes = self.session.run(
+            self.output_names, {self.input_name: images.astype(np.uint8)})
+        return [{
+            "detection_classes": classes[position].astype(np.uint8),
+            "detection_boxes": boxes[position],
+            "detection_scores": scores[position]
+        } for position in range(images.shape[0])]
+
+    def get_objects(self, image_np: np.array, image: Image) -> Dict:
+        """
+        Returns the objects and coordiates detected
+        from the faster rcnn detected boxes]
+
+        @param image_np: Image tensor, dimension should be HxWx3
+        @param image: PIL Image object
+
+        @return: ouput dict from the faster rcnn inference
+        """
+        output_dict = self.run_inference(np.expand_dims(image_np, 0))[0]
+        width, height = image.size
+        return renormalize_boxes(output_dict, width, height)
+
+    def get_objects_batch(self, images_np: List[np.array],
+                          images: List[Image.Image] = None) -> List[Dict]:
+        """
+        Returns the objects and coordiates detected for a batch of images,
+        images of the same size are stacked and run in a single inference.
+        """
+        output_dicts = [None] * len(images_np)
+        shape_groups = {}
+        for position, image_np in enumerate(images_np):
+            shape_groups.setdefault(image_np.shape, []).append(position)
+        for shape, positions in shape_groups.items():
+            batch = np.stack([images_np[position] for position in positions])
+            height, width = shape[:2]
+            for position, output_dict in zip(positions,
+                                             self.run_inference(batch)):
+                output_dicts[position] = renormalize_boxes(
+                    output_dict, width, height)
+        return output_dicts
+
+    def get_bboxes(self):
+        pass
@@ -0,0 +1,103 @@
+"""
+Numpy pre and post processing of the detection models, for the backends
+which doesn't run on torch or tensorflow [ onnx runtime ].
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+# DETR input transform, same as `mystique.models.pth.detr.predict.transform`
+DETR_MIN_SIZE = 800
+DETR_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+DETR_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def detr_transform(image: Image) -> np.ndarray:
+    """
+    Resizes the smaller edge of the image to `DETR_MIN_SIZE` and mean-std
+    normalizes it.
+    @param image: PIL Image
+    @return: 3xHxW float32 array
+    """
+    width, height = image.size
+    if width <= height and width != DETR_MIN_SIZE:
+        size = (DETR_MIN_SIZE, int(DETR_MIN_SIZE * height / width))
+        image = image.resize(size, Image.BILINEAR)
+    elif height < width and height != DETR_MIN_SIZE:
+        size = (int(DETR_MIN_SIZE * width / height), DETR_MIN_SIZE)
+        image = image.resize(size, Image.BILINEAR)
+    image_np = np.asarray(image.convert("RGB"), dtype=np.float32) / 255
+    image_np = (image_np - DETR_MEAN) / DETR_STD
+    return image_np.transpose(2, 0, 1)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """
+    Softmax over the last axis.
+    """
+    exps = np.exp(logits - logits.max(-1, keepdims=True))
+    return exps / exps.sum(-1, keepdims=True)
+
+
+def box_cxcywh_to_xyxy(x: np.ndarray) -> np.ndarray:
+    """
+    Converts the center x, center y, width, height boxes to xmin, ymin,
+    xmax, ymax.
+    """
+    x_c, y_c, w, h = [i[:, 0] for i in np.split(x, [1, 2, 3], axis=1)]
+    b = [(x_c - 0.5 * w), (y_c - 0.5 * h),
+         (x_c + 0.5 * w), (y_c + 0.5 * h)]
+    return np.stack(b, axis=1)
+
+
+def rescale_bboxes(out_bbox: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Converts the normalized center format boxes to the image's xmin, ymin,
+    xmax, ymax coordinates.
+    @param out_bbox: Nx4 normalized boxes
+    @param size: image width and height
+    """
+    img_w, img_h = size
+    b = box_cxcywh_to_xyxy(out_bbox)
+    b = b * [img_w, img_h, img_w, img_h]
+    return b
+
+
+def detr_response(probas: np.ndarray, pred_boxes: np.ndarray,
+                  size: Tuple[int, int], threshold: float) -> Dict:
+    """
+    Builds the standard detection response from the DETR outputs of an
+    image.
+    @param probas: Nx(classes) class probabilities without the background
+                   [ no-object ] class
+    @param pred_boxes: Nx4 normalized center format boxes
+    @param size: image width and height
+    @param threshold: minimum confidence of the kept predictions
+    @return: detection_classes, detection_scores and detection_boxes dict
+    """
+    keep = probas.max(-1) > threshold
+    scores = probas[keep]
+    return {
+        "detection_classes": scores.argmax(-1),
+        "detection_scores": scores.max(-1),
+        "detection_boxes": rescale_bboxes(pred_boxes[keep], size)
+    }
+
+
+def renormalize_boxes(output_dict: Dict, width: int, height: int) -> Dict:
+    """
+    Renormalizes the faster rcnn's box coordinates to the image size.
+    @param output_dict: output dict from the faster rcnn inference
+    @param width: image width
+    @param height: image height
+    @return: output dict with the renormalized boxes
+    """
+    # format: ymin, xmin, ymax, xmax, renormalize the coords.
+    bboxes = output_dict[
+        "detection_boxes"] * [height, width, height, width]
+
+    # format: xmin, ymin, xmax, ymax
+    bboxes = bboxes[:, [1, 0, 3, 2]]
+    output_dict["detection_boxes"] = bboxes
+    return output_dict
@@ -0,0 +1,293 @@
+"""Module for the card level OCR strategies.
+
+The per crop strategy runs tesseract for every text bearing design object
+from `BaseExtractProperties.get_text`, where as the batched strategies run it
+once for the whole card [ or a montage of the text crops ] and hand every
+design object its text and pytesseract style `image_data` from that single
+result.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from mystique import config
+from mystique.extract_properties_abstract import AbstractOcrStrategy
+from mystique.ocr_engine import IMAGE_DATA_KEYS, get_ocr_engine
+
+# Design objects which carry an ocr text as their data property
+TEXT_OBJECTS = ("textbox", "checkbox", "radiobutton", "actionset")
+
+
+def get_text_coords(coords: Tuple) -> Tuple:
+    """
+    Returns the coordinates of the region to be OCR-ed for a design object,
+    the object is padded x-way to avoid clipping the first and last
+    characters.
+    @param coords: design object's coordinates
+    @return: padded coordinates
+    """
+    return (coords[0] - config.TEXTBOX_PADDING, coords[1],
+            coords[2] + config.TEXTBOX_PADDING, coords[3])
+
+
+def get_text_from_data(img_data: Dict) -> str:
+    """
+    Joins the words of the pytesseract image data into the design
+    object's text.
+    @param img_data: pytesseract image_to_data output
+    @return: extracted text
+    """
+    text_list = filter(None, img_data['text'])
+    return ' '.join(text_list).lstrip("#-_*~").strip()
+
+
+def _append_row(img_data: Dict, level: int, block_num: int, par_num: int,
+                line_num: int, word_num: int, box: Tuple, conf, text: str):
+    """
+    Appends one tesseract result row to the image data dict.
+    @param img_data: image data dict to be updated
+    @param box: left, top, width and height of the row
+    """
+    row = (level, 1, block_num, par_num, line_num, word_num) + tuple(box) + (
+        conf, text)
+    for key, value in zip(IMAGE_DATA_KEYS, row):
+        img_data[key].append(value)
+
+
+class WordIndex:
+    """
+    Uniform grid index over the word boxes of a pytesseract image_to_data
+    output, helps to look up the words which falls inside a design object
+    without scanning all the words of the card.
+    """
+
+    def __init__(self, img_data: Dict, cell_size=64):
+        self.img_data = img_data
+        self.cell_size = cell_size
+        self.centers = {}
+        self.cells = defaultdict(list)
+        for position, text in enumerate(img_data.get("text", [])):
+            if img_data["level"][position] != 5 or not str(text).strip():
+                continue
+            center_x = (img_data["left"][position]
+                        + img_data["width"][position] / 2)
+            center_y = (img_data["top"][position]
+                        + img_data["height"][position] / 2)
+            self.centers[position] = (center_x, center_y)
+            self.cells[self._get_cell(center_x, center_y)].append(position)
+
+    def _get_cell(self, x_value: float, y_value: float) -> Tuple[int, int]:
+        """
+        Returns the grid cell of the given point.
+        """
+        return (int(x_value // self.cell_size),
+                int(y_value // self.cell_size))
+
+    def query(self, coords: Tuple) -> List[int]:
+        """
+        Returns the positions of the words whose center lies inside the
+        given coordinates, in the tesseract reading order.
+        @param coords: xmin, ymin, xmax, ymax of the region
+        @return: list of word positions in the image data
+        """
+        xmin, ymin, xmax, ymax = coords
+        cell_xmin, cell_ymin = self._get_cell(xmin, ymin)
+        cell_xmax, cell_ymax = self._get_cell(xmax, ymax)
+        positions = []
+        for cell_x in range(cell_xmin, cell_xmax + 1):
+            for cell_y in range(cell_ymin, cell_ymax + 1):
+                for position in self.cells.get((cell_x, cell_y), []):
+                    center_x, center_y = self.centers[position]
+                    if (xmin <= center_x <= xmax
+                            and ymin <= center_y <= ymax):
+                        positions.append(position)
+        return sorted(positions)
+
+    def image_data(self, positions: List[int], coords: Tuple) -> Dict:
+        """
+        Builds the pytesseract style image data for the given words relative
+        to the given region, so that the output reads as if the region was
+        OCR-ed on its own [ lines are renumbered from 1 and the boxes are
+        shifted to the region's origin ].
+        @param positions: word positions returned by the query
+        @param coords: xmin, ymin, xmax, ymax of the region
+        @return: image data dict
+        """
+        origin_x, origin_y = int(round(coords[0])), int(round(coords[1]))
+        width = int(round(coords[2])) - origin_x
+        height = int(round(coords[3])) - origin_y
+        img_data = {key: [] for key in IMAGE_DATA_KEYS}
+        _append_row(img_data, 1, 0, 0, 0, 0, (0, 0, width, height), "-1", "")
+
+        lines = {}
+        boxes = {}
+        for position in positions:
+            line_key = (self.img_data["block_num"][position],
+                        self.img_data["par_num"][position],
+                        self.img_data["line_num"][position])
+            lines.setdefault(line_key, []).append(position)
+            boxes[position] = (
+                self.img_data["left"][position] - origin_x,
+                self.img_data["top"][position] - origin_y,
+                self.img_data["width"][position],
+                self.img_data["height"][position])
+        if not lines:
+            return img_data
+
+        block_box = self._get_union_box(list(boxes.values()))
+        _append_row(img_data, 2, 1, 0, 0, 0, block_box, "-1", "")
+        _append_row(img_data, 3, 1, 1, 0, 0, block_box, "-1", "")
+        for line_num, line_positions in enumerate(lines.values(), 1):
+            line_box = self._get_union_box(
+                [boxes[position] for position in line_positions])
+            _append_row(img_data, 4, 1, 1, line_num, 0, line_box, "-1", "")
+            for word_num, position in enumerate(line_positions, 1):
+                _append_row(img_data, 5, 1, 1, line_num, word_num,
+                            boxes[position],
+                            self.img_data["conf"][position],
+                            self.img_data["text"][position])
+        return img_data
+
+    @staticmethod
+    def _get_union_box(boxes: List[Tuple]) -> Tuple:
+        """
+        Returns the left, top, width, height box enclosing the given boxes.
+        """
+        left = min(box[0] for box in boxes)
+        top = min(box[1] for box in boxes)
+        right = max(box[0] + box[2] for box in boxes)
+        bottom = max(box[1] + box[3] for box in boxes)
+        return left, top, right - left, bottom - top
+
+
+def get_text_objects(design_objects: List[Dict]) -> List[Dict]:
+    """
+    Returns the design objects which needs to be OCR-ed.
+    @param design_objects: list of design objects
+    @return: list of text bearing design objects
+    """
+    return [design_object for design_object in design_objects
+            if design_object.get("object") in TEXT_OBJECTS]
+
+
+class CropOcr(AbstractOcrStrategy):
+    """
+    Default strategy, tesseract runs for each of the design object's crop
+    lazily from `get_text`, so nothing is collected up-front.
+    """
+
+    def extract(self, image: Image, design_objects: List[Dict]) -> Dict:
+        return {}
+
+
+class PageOcr(AbstractOcrStrategy):
+    """
+    Runs tesseract once over the whole card and assigns the recognized words
+    to the design objects using a spatial index over the word boxes.
+    """
+
+    def extract(self, image: Image, design_objects: List[Dict]) -> Dict:
+        """
+        Returns the ocr text and image data of all the text bearing
+        design objects.
+        @param image: input PIL image
+        @param design_objects: list of design objects
+        @return: dict of uuid and (text, image data) of the design objects
+        """
+        text_objects = get_text_objects(design_objects)
+        if not text_objects:
+            return {}
+        img_data = get_ocr_engine().image_to_data(image.convert("LA"),
+                                                  config.PAGE_OCR_PSM)
+        word_index = WordIndex(img_data)
+        ocr_results = {}
+        for design_object in text_objects:
+            coords = get_text_coords(design_object.get("coords"))
+            image_data = word_index.image_data(word_index.query(coords),
+                                               coords)
+            ocr_results[design_object.get("uuid")] = (
+                get_text_from_data(image_data), image_data)
+        return ocr_results
+
+
+class MontageOcr(AbstractOcrStrategy):
+    """
+    Pastes the crops of all the text bearing design objects one below the
+    other into a padded montage image, runs tesseract once over the montage
+    and maps the words back to the design objects using the recorded offset
+    of each crop.
+    """
+
+    def get_montages(self, image: Image,
+                     text_objects: List[Dict]) -> List[Tuple[Image, Dict]]:
+        """
+        Packs the design object's crops into montage images, a new montage
+        is started once the height crosses the configured limit.
+        @param image: input PIL image
+        @param text_objects: list of text bearing design objects
+        @return: list of montage image and its offset table of uuid and
+                 the crop's region inside the montage
+        """
+        padding = config.MONTAGE_OCR_PADDING
+        crops = []
+        for design_object in text_objects:
+            cropped_image = image.crop(
+                get_text_coords(design_object.get("coords")))
+            crops.append((design_object.get("uuid"),
+                          cropped_image.convert("LA")))
+
+        montages = []
+        batch = []
+        top = padding
+        max_height = config.MONTAGE_OCR_MAX_HEIGHT
+        for uuid, cropped_image in crops:
+            width, height = cropped_image.size
+            if batch and top + height + padding > max_height:
+                montages.append(self._paste_crops(batch, top))
+                batch = []
+                top = padding
+            batch.append((uuid, cropped_image, (padding, top, padding + width,
+                                                top + height)))
+            top += height + padding
+        if batch:
+            montages.append(self._paste_crops(batch, top))
+        return montages
+
+    @staticmethod
+    def _paste_crops(batch: List[Tuple], height: int) -> Tuple[Image, Dict]:
+        """
+        Pastes the crops into a white montage image.
+        @param batch: list of uuid, crop and the crop's region in the montage
+        @param height: montage height
+        @return: montage image and its offset table
+        """
+        width = max(region[2] for _, _, region in batch)
+        width += config.MONTAGE_OCR_PADDING
+        montage = Image.new("LA", (width, height), (255, 255))
+        offsets = {}
+        for uuid, cropped_image, region in batch:
+            montage.paste(cropped_image, region[:2])
+            offsets[uuid] = region
+        return montage, offsets
+
+    def extract(self, image: Image, design_objects: List[Dict]) -> Dict:
+        """
+        Returns the ocr text and image data of all the text bearing
+        design objects.
+        @param image: input PIL image
+        @param design_objects: list of design objects
+        @return: dict of uuid and (text, image data) of the design objects
+        """
+        text_objects = get_text_objects(design_objects)
+        ocr_results = {}
+        for montage, offsets in self.get_montages(image, text_objects):
+            img_data = get_ocr_engine().image_to_data(montage,
+                                                      config.MONTAGE_OCR_PSM)
+            word_index = WordIndex(img_data)
+            for uuid, region in offsets.items():
+                image_data = word_index.image_data(word_index.query(region),
+                                                   region)
+                ocr_results[uuid] = (get_text_from_data(image_data),
+                                     image_data)
+        return ocr_results
@@ -0,0 +1,140 @@
+"""Module for the OCR engines used to read the text from the card images.
+
+The engine is created once per worker process and reused for every design
+object, `get_ocr_engine` returns the active engine selected from the
+`OCR_ENGINE_REGISTRY`.
+"""
+import os
+import queue
+import threading
+from typing import Dict
+
+from PIL import Image
+
+from mystique import config
+from mystique.extract_properties_abstract import AbstractOcrEngine
+from mystique.utils import load_instance_with_class_path
+
+# pytesseract image_to_data keys in the order of the tesseract tsv output
+IMAGE_DATA_KEYS = ("level", "page_num", "block_num", "par_num", "line_num",
+                   "word_num", "left", "top", "width", "height", "conf",
+                   "text")
+
+_ENGINE = None
+_ENGINE_PID = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def tsv_to_dict(tsv: str) -> Dict:
+    """
+    Converts the tesseract tsv rows into the pytesseract image_to_data dict,
+    the numeric cells are converted the same way as pytesseract does
+    [ i.e conf of -1 is kept as string ].
+    @param tsv: tesseract tsv output without the header row
+    @return: image data dict
+    """
+    img_data = {key: [] for key in IMAGE_DATA_KEYS}
+    for row in tsv.strip("\n").split("\n"):
+        if not row:
+            continue
+        cells = row.split("\t")
+        cells += [""] * (len(IMAGE_DATA_KEYS) - len(cells))
+        for key, cell in zip(IMAGE_DATA_KEYS, cells):
+            if key != "text" and cell.isdigit():
+                cell = int(cell)
+            img_data[key].append(cell)
+    return img_data
+
+
+class TesseractCliEngine(AbstractOcrEngine):
+    """
+    Runs the tesseract binary through pytesseract for each call.
+    """
+
+    def __init__(self):
+        # pytesseract imports pandas, loaded only when the engine is used.
+        from pytesseract import pytesseract, Output
+
+        self._pytesseract = pytesseract
+        self._output_type = Output.DICT
+
+    def image_to_data(self, image: Image, psm: int) -> Dict:
+        return self._pytesseract.image_to_data(
+            image, lang="eng", config=f"--psm {psm}",
+            output_type=self._output_type)
+
+
+class TesserocrEngine(AbstractOcrEngine):
+    """
+    Keeps a pool of tesseract api handles with the eng traineddata loaded,
+    images are handed over in-memory, which avoids the process spawn, temp
+    file i/o and the language model loading of each call.
+    The handles are created lazily upto the configured pool size and are
+    re-created in a forked worker process.
+    """
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or config.OCR_ENGINE_POOL_SIZE
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pool = queue.Queue()
+        self._created = 0
+
+    def _acquire(self):
+        """
+        Returns a free api handle, creates a new one if the pool is not
+        full else waits for a handle to be released.
+        @return: tesseract api handle
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                if self._created < self.pool_size:
+                    from tesserocr import PyTessBaseAPI
+
+                    self._created += 1
+                    return PyTessBaseAPI(lang="eng")
+        return self._pool.get()
+
+    def _release(self, api):
+        api.Clear()
+        if self._pid == os.getpid():
+            self._pool.put(api)
+
+    def image_to_data(self, image: Image, psm: int) -> Dict:
+        # tesserocr hands over the image as bmp buffer, the transparent
+        # pixels are composited onto a white background like pytesseract
+        # does.
+        if "A" in image.getbands():
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, (0, 0), image.getchannel("A"))
+            image = background
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            api.Recognize()
+            tsv = api.GetTSVText(0)
+        finally:
+            self._release(api)
+        return tsv_to_dict(tsv)
+
+
+def get_ocr_engine() -> AbstractOcrEngine:
+    """
+    Returns the active ocr engine of the current process.
+    @return: ocr engine instance
+    """
+    global _ENGINE, _ENGINE_PID
+    with _ENGINE_LOCK:
+        if _ENGINE is None or _ENGINE_PID != os.getpid():
+            _ENGINE = load_instance_with_class_path(
+                config.OCR_ENGINE_REGISTRY[config.ACTIVE_OCR_ENGINE])
+            _ENGINE_PID = os.getpid()
+    return _ENGINE
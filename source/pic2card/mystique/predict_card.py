@@ -1,18 +1,21 @@
 """Module to  get the predicted adaptive card json"""
 
-import base64
-import io
 import uuid
+from functools import partial
 from typing import Dict, List
 
-import cv2
 import numpy as np
 from PIL import Image
 from mystique import config
+from mystique.ingest import CardImage
 from mystique.ac_export.card_template_data import DataBinding
+from mystique.executors import get_thread_pool
 from mystique.extract_properties import CollectProperties
 from mystique.font_properties import classify_font_weights
-from mystique.utils import get_property_method, send_json_payload
+from mystique.colors import classify_colors
+from mystique.tfs_objects import TfsObjectDetection
+from mystique.utils import (get_property_method,
+                            load_instance_with_class_path)
 from mystique.card_layout import row_column_group
 from mystique.card_layout import bbox_utils
 from mystique.ac_export import adaptive_card_export
@@ -25,11 +28,23 @@ class PredictCard:
     and returning the predicted json objects.
     """
 
-    def __init__(self, od_model=None):
+    def __init__(self, od_model=None, stage_executor=None):
         """
         Find the card components using Object detection model
+        @param od_model: object detection model instance
+        @param stage_executor: executor running the card pipeline stages
         """
         self.od_model = od_model
+        self.stage_executor = stage_executor
+
+    def __getstate__(self):
+        # The instance is pickled to the stage workers along with the
+        # property extraction method, which doesn't need the model or the
+        # executor.
+        state = self.__dict__.copy()
+        state["od_model"] = None
+        state["stage_executor"] = None
+        return state
 
     def collect_objects(self, output_dict=None, pil_image=None):
         """
@@ -73,42 +88,76 @@ class PredictCard:
 
         return json_object, detected_coords
 
+    @staticmethod
+    def extract_object_properties(design_object: Dict, pil_image: Image,
+                                  ocr_results: Dict = None) -> Dict:
+        """
+        Extract a single design object's properties.
+        @param design_object: design object collected from the model.
+        @param pil_image: Input PIL image
+        @param ocr_results: ocr results collected by the ocr strategy
+        @return: property object
+        """
+        # Each object gets its own Extract Property class instance as the
+        # instance keeps the uuid of the object being extracted.
+        collect_prop = CollectProperties()
+        collect_prop.ocr_results = ocr_results
+        collect_prop.uuid = design_object.get("uuid")
+        # Invoking the methods from dict according to the design object
+        property_object = get_property_method(collect_prop,
+                                              design_object.get("object"))
+        return property_object(pil_image, design_object.get("coords"))
+
     def get_object_properties(self, design_objects: List[Dict],
-                              pil_image: Image, queue=None) -> None:
+                              pil_image: Image, queue=None) -> List[Dict]:
         """
         Extract each design object's properties.
         @param design_objects: List of design objects collected from the model.
         @param pil_image: Input PIL image
         @param queue: Queue object of the calling process
+        @return: design objects with the properties
         """
-        # Creating an Extract Property class instance
-        collect_prop = CollectProperties()
-        for design_object in design_objects:
-            collect_prop.uuid = design_object.get("uuid")
-            # Invoking the methods from dict according to the design object
-            property_object = get_property_method(collect_prop,
-                                                  design_object.get("object"))
-            property_element = property_object(pil_image,
-                                               design_object.get("coords"))
+        # Loading the image data once, as the crops are taken
+        # concurrently by the property extraction workers.
+        pil_image.load()
+        ocr_strategy = load_instance_with_class_path(
+            config.OCR_STRATEGY_REGISTRY[config.ACTIVE_OCR_STRATEGY])
+        ocr_results = ocr_strategy.extract(pil_image, design_objects)
+        extract_properties = partial(self.extract_object_properties,
+                                     pil_image=pil_image,
+                                     ocr_results=ocr_results)
+        property_pool = get_thread_pool(
+            "property_extraction", config.PROPERTY_EXTRACTION_WORKERS)
+        if property_pool:
+            property_elements = property_pool.map(extract_properties,
+                                                  design_objects)
+        else:
+            property_elements = map(extract_properties, design_objects)
+        for design_object, property_element in zip(design_objects,
+                                                   property_elements):
             design_object.update(property_element)
+        # font weights are classified relative to all the textboxes of the
+        # card, so it runs once all the objects are extracted
         design_objects = classify_font_weights(design_objects)
+        design_objects = classify_colors(design_objects)
         # If any Queue object is passed , put the return value inside the
         # queue in-order to retrieve the value after the process finishes.
         if queue:
             queue.put(design_objects)
+        return design_objects
 
     def main(self, image=None, card_format=None):
         """
         Handles the different components calling and returns the
         predicted card json to the API
-        @param labels_path: faster rcnn model's label path
-        @param forzen_graph_path: faster rcnn model path
-        @param image: input image path
+        @param image: input PIL image or the ingested CardImage
+        @param card_format: format specification for template data binding
         @return: predicted card json
         """
-        image = image.convert("RGB")
-        image_np = np.asarray(image)
-        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        card_image = (image if isinstance(image, CardImage)
+                      else CardImage(image))
+        # Only the image layout the model consumes is computed.
+        image_np, image = card_image.model_inputs(self.od_model)
         # Extract the design objects from faster rcnn model
         output_dict = self.od_model.get_objects(
             image_np=image_np, image=image
@@ -116,38 +165,30 @@ class PredictCard:
         return self.generate_card(output_dict, image, image_np, card_format)
 
     def tf_serving_main(self, bs64_img: str, tf_server: str, model_name: str,
-                        card_format: str = None) -> Dict:
+                        card_format: str = None,
+                        card_image: CardImage = None,
+                        protocol: str = None) -> Dict:
         """
         Do model inference using TF-Serve service.
+        @param bs64_img: base64 string of the image, sent to the service
+        @param tf_server: tf-serving host and port, defaults to the
+                          configured url of the protocol
+        @param model_name: served model name
+        @param card_format: format specification for template data binding
+        @param card_image: ingested image, decoded from bs64_img if not given
+        @param protocol: rest or grpc, defaults to the configured protocol
         """
 
-        api_path = "v1/models/{model_name}:predict"
-        payloads = {
-            "signature_name": "serving_default",
-            "instances": [
-                {"b64": bs64_img}
-            ]
-        }
-        # Hit the tf-serving and get the prediction
-        response = send_json_payload(api_path,
-                                     body=payloads,
-                                     host_port=tf_server)
-
-        pred_res = response["predictions"][0]
-
-        filtered_res = {}
-        for key_col in ["detection_boxes", "detection_scores",
-                        "detection_classes"]:
-            filtered_res[key_col] = np.array(pred_res[key_col])
+        od_model = TfsObjectDetection(
+            url=tf_server, model_name=model_name, protocol=protocol,
+            input_type="encoded_image_string_tensor")
+        card_image = card_image or CardImage.from_base64(bs64_img)
+        # the upload is sent as is, unless it was downscaled at decode.
+        image_np, image = card_image.model_inputs(od_model)
+        output_dict = od_model.get_objects(image_np=image_np, image=image)
 
         # Prepare the card from object detection.
-        imgdata = base64.b64decode(bs64_img)
-        image = Image.open(io.BytesIO(imgdata))
-        image = image.convert("RGB")
-        image_np = np.asarray(image)
-        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        card = self.generate_card(filtered_res,
-                                  image, image_np, card_format)
+        card = self.generate_card(output_dict, image, None, card_format)
         return card
 
     def generate_card(self, prediction: Dict, image: Image,
@@ -157,7 +198,8 @@ class PredictCard:
         card object.
         @param prediction: Prediction result from rcnn model
         @param image: PIL Image object to crop the regions.
-        @param image_np: Array representation of the image.
+        @param image_np: Array representation of the image [ model input
+                         layout, can be None ].
         @param card_format: format specification for template data binding
         """
         # TODO: Remove the reduendant usage of image and image_np
@@ -178,9 +220,9 @@ class PredictCard:
             "$schema": "http://adaptivecards.io/schemas/adaptive-card.json"
         }
 
-        card_layout = row_column_group.generate_card_layout(json_objects,
-                                                            image, self)
-        body = adaptive_card_export.export_to_card(card_layout, image)
+        layout_tree = row_column_group.generate_layout_tree(
+            json_objects, image, self, stage_executor=self.stage_executor)
+        body = adaptive_card_export.export_to_card(layout_tree, image)
 
         # if format==template - generate template data json
         return_dict["card_json"] = {}.fromkeys(["data", "card"], {})
@@ -0,0 +1,169 @@
+"""Module for handing over the decoded card image to the stage workers.
+
+The image pixels are pasted once into a shared memory block and only a small
+picklable reference travels to the worker processes, which map the same
+block as a PIL image [ `Image.frombuffer` ] instead of unpickling a copy of
+the image. PIL maps a buffer directly only for the raw modes of 1 or 4
+bytes per pixel, so the RGB pixels are laid out as RGBX in the block.
+`multiprocessing.shared_memory` is used when available [ python >= 3.8 ],
+else the block is a memory mapped file under /dev/shm.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    resource_tracker = shared_memory = None
+
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# pixel layout of the shared block for each image mode PIL maps directly
+BLOCK_MODES = {"RGB": "RGBX", "RGBA": "RGBA", "L": "L"}
+SHAREABLE_MODES = tuple(BLOCK_MODES)
+
+# pid of the process which started a resource tracker of its own to attach
+# the shared blocks
+_separate_tracker_pid = None
+
+
+class SharedImageRef(NamedTuple):
+    """
+    Picklable reference of the shared image.
+    """
+    name: str
+    size: Tuple
+    mode: str
+
+
+class SharedBlockImage(Image.Image):
+    """
+    PIL image mapped over the shared block. The crops are returned in the
+    mode of the shared image, as the RGB block is mapped in the RGBX mode.
+    """
+
+    def __init__(self, image: Image, mode: str):
+        super().__init__()
+        self.__dict__.update(image.__dict__)
+        self.shared_mode = mode
+
+    def crop(self, box=None) -> Image:
+        cropped = super().crop(box)
+        if cropped.mode != self.shared_mode:
+            cropped = cropped.convert(self.shared_mode)
+        return cropped
+
+
+def _uses_separate_tracker() -> bool:
+    """
+    Checks if the blocks attached by this process are tracked by a resource
+    tracker of its own, instead of the owner's tracker shared by the forked
+    or spawned workers. Unregistering a block from the shared tracker drops
+    the owner's registration.
+    @return: True for a tracker started by this process to attach the blocks
+    """
+    global _separate_tracker_pid
+    if resource_tracker is None:
+        return False
+    if getattr(resource_tracker._resource_tracker, "_fd", None) is None:
+        # no tracker is inherited, the attach starts one of its own
+        _separate_tracker_pid = os.getpid()
+    return _separate_tracker_pid == os.getpid()
+
+
+def _map_block(ref: SharedImageRef, create=False):
+    """
+    Maps the shared block of the reference as a PIL image.
+    @param ref: shared image reference
+    @param create: creates the block when True
+    @return: image mapped over the block and the handle keeping the block
+             mapped
+    """
+    block_mode = BLOCK_MODES[ref.mode]
+    nbytes = ref.size[0] * ref.size[1] * Image.getmodebands(block_mode)
+    if shared_memory:
+        separate_tracker = not create and _uses_separate_tracker()
+        handle = shared_memory.SharedMemory(name=ref.name, create=create,
+                                            size=nbytes if create else 0)
+        if separate_tracker:
+            # The owner unlinks the block, a tracker started by the worker
+            # shouldn't unlink it again on the worker's exit.
+            resource_tracker.unregister(handle._name, "shared_memory")
+        buffer = handle.buf
+    else:
+        handle = None
+        buffer = np.memmap(os.path.join(SHM_DIR, ref.name), dtype=np.uint8,
+                           mode="w+" if create else "r", shape=(nbytes,))
+    # stride 0 and orientation 1 makes PIL map the buffer without a copy
+    block = Image.frombuffer(ref.mode, ref.size, buffer, "raw", block_mode,
+                             0, 1)
+    return block, handle
+
+
+class SharedImage:
+    """
+    Owner side of the shared image, the block lives until `close` is called
+    [ or the context manager exits ].
+    """
+
+    def __init__(self, image: Image):
+        self.ref = SharedImageRef(name=f"mystique_{uuid.uuid4().hex}",
+                                  size=image.size,
+                                  mode=image.mode)
+        block, self._handle = _map_block(self.ref, create=True)
+        image.load()
+        # The pixels are pasted straight into the block, the core paste
+        # takes the RGB pixels as they are laid out as RGBX in PIL.
+        block.im.paste(image.im, (0, 0) + image.size)
+        del block
+
+    def close(self):
+        """
+        Releases and removes the shared block.
+        """
+        if self._handle is not None:
+            self._handle.close()
+            self._handle.unlink()
+            self._handle = None
+        else:
+            try:
+                os.remove(os.path.join(SHM_DIR, self.ref.name))
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+@contextmanager
+def attach_shared_image(ref: SharedImageRef):
+    """
+    Worker side of the shared image, yields the PIL image mapped over the
+    shared block.
+    @param ref: shared image reference
+    """
+    block, handle = _map_block(ref)
+    image = SharedBlockImage(block, ref.mode)
+    # The image keeps the handle alive for as long as it maps the block.
+    image.shared_handle = handle
+    del block
+    try:
+        yield image
+    finally:
+        del image
+        if handle is not None:
+            try:
+                handle.close()
+            except BufferError:
+                # the caller still holds the image, the block is unmapped
+                # once the image is released
+                pass
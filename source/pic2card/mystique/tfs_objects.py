@@ -0,0 +1,263 @@
+"""Object detection using the faster rcnn model hosted in Tensorflow Serving.
+
+The REST client uses the process's pool of kept-alive connections of the
+host [ `mystique.executors.get_connection_pool` ], so a prediction doesn't pay
+a TCP handshake, and the threads of a worker get their own connection for the
+concurrent in-flight requests. The gRPC client sends
+the image as a binary tensor over a single multiplexed channel, it needs the
+optional `tensorflow-serving-api` and `grpcio` packages.
+Failed requests [ connection errors, unavailable service ] are retried upto
+`TF_SERVING_RETRIES` times.
+"""
+import base64
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+from PIL import Image
+
+from mystique import config
+from mystique.executors import get_connection_pool, get_thread_pool
+from mystique.obj_detect.od_base import AbstractObjectDetection
+from mystique.obj_detect.postprocess import renormalize_boxes
+
+logger = logging.getLogger("mysitque")
+
+OUTPUT_KEYS = ("detection_boxes", "detection_scores", "detection_classes")
+
+# http statuses of the transient tf-serving failures
+RETRY_STATUSES = (502, 503, 504)
+RETRY_BACKOFF = 0.1
+
+
+class TfServingError(Exception):
+    """
+    Prediction request failed.
+    """
+
+    def __init__(self, msg: str, retry=False):
+        super().__init__(msg)
+        self.retry = retry
+
+
+def get_host_port(url: str) -> str:
+    """
+    Returns the host:port of the url, the scheme is optional.
+    """
+    return urlparse(url if "//" in url else f"//{url}").netloc
+
+
+def with_retries(predict, retries: int):
+    """
+    Calls the predict function, retrying the transient failures with a
+    growing backoff.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return predict()
+        except (TfServingError, ConnectionError, socket.timeout,
+                http.client.HTTPException) as ex:
+            retry = getattr(ex, "retry", True)
+            if not retry or attempt == retries:
+                raise
+            logger.warning(f"tf-serving request failed, retrying: {ex}")
+            time.sleep(RETRY_BACKOFF * (attempt + 1))
+
+
+class TfsRestClient:
+    """
+    Prediction client of the tf-serving REST api.
+    """
+
+    def __init__(self, url: str = None, model_name: str = None,
+                 input_type: str = None):
+        self.host_port = get_host_port(url or config.TF_SERVING_URL)
+        self.model_name = model_name or config.TF_SERVING_MODEL_NAME
+        self.input_type = input_type or config.TF_SERVING_INPUT_TYPE
+        self.path = f"/v1/models/{self.model_name}:predict"
+
+    def predict(self, image_input) -> Dict:
+        """
+        @param image_input: encoded image bytes or the uint8 image array
+        @return: dict of the output arrays of the image
+        """
+        if self.input_type == "encoded_image_string_tensor":
+            instance = {"b64": base64.b64encode(image_input).decode()}
+        else:
+            instance = np.asarray(image_input).tolist()
+        body = json.dumps({
+            "signature_name": config.TF_SERVING_SIGNATURE_NAME,
+            "instances": [instance]
+        })
+        pool = get_connection_pool(self.host_port,
+                                   max_size=config.TF_SERVING_POOL_SIZE,
+                                   timeout=config.TF_SERVING_TIMEOUT)
+        status, data = pool.request("POST", self.path, body,
+                                    {"Content-Type": "application/json"})
+        if status != 200:
+            raise TfServingError(f"tf-serving responded {status}: {data}",
+                                 retry=status in RETRY_STATUSES)
+        prediction = json.loads(data)["predictions"][0]
+        return {key: np.array(prediction[key]) for key in OUTPUT_KEYS}
+
+
+class TfsGrpcClient:
+    """
+    Prediction client of the tf-serving gRPC PredictionService, the image is
+    sent as a binary string or uint8 tensor.
+    """
+
+    def __init__(self, url: str = None, model_name: str = None,
+                 input_type: str = None):
+        import grpc
+        from tensorflow_serving.apis import prediction_service_pb2_grpc
+        self.grpc = grpc
+        self.target = get_host_port(url or config.TF_SERVING_GRPC_URL)
+        self.model_name = model_name or config.TF_SERVING_MODEL_NAME
+        self.input_type = input_type or config.TF_SERVING_INPUT_TYPE
+        self._lock = threading.Lock()
+        self._stub = None
+        self._pid = None
+        self._stub_class = prediction_service_pb2_grpc.PredictionServiceStub
+
+    def _get_stub(self):
+        """
+        Returns the stub of the process's channel, the channel multiplexes
+        the concurrent requests over one kept-alive connection.
+        """
+        with self._lock:
+            if self._stub is None or self._pid != os.getpid():
+                channel = self.grpc.insecure_channel(self.target, options=[
+                    ("grpc.keepalive_time_ms", 30000),
+                    ("grpc.max_receive_message_length", 64 * 2 ** 20),
+                    ("grpc.max_send_message_length", 64 * 2 ** 20)
+                ])
+                self._stub = self._stub_class(channel)
+                self._pid = os.getpid()
+            return self._stub
+
+    def make_request(self, image_input):
+        """
+        Builds the PredictRequest of the image without tensorflow's
+        make_tensor_proto.
+        """
+        from tensorflow_serving.apis import predict_pb2
+        from tensorflow.core.framework import (tensor_pb2, tensor_shape_pb2,
+                                               types_pb2)
+        if self.input_type == "encoded_image_string_tensor":
+            tensor = tensor_pb2.TensorProto(
+                dtype=types_pb2.DT_STRING,
+                tensor_shape=tensor_shape_pb2.TensorShapeProto(
+                    dim=[tensor_shape_pb2.TensorShapeProto.Dim(size=1)]),
+                string_val=[image_input])
+        else:
+            image_np = np.ascontiguousarray(image_input, dtype=np.uint8)
+            tensor = tensor_pb2.TensorProto(
+                dtype=types_pb2.DT_UINT8,
+                tensor_shape=tensor_shape_pb2.TensorShapeProto(
+                    dim=[tensor_shape_pb2.TensorShapeProto.Dim(size=size)
+                         for size in (1, *image_np.shape)]),
+                tensor_content=image_np.tobytes())
+        request = predict_pb2.PredictRequest()
+        request.model_spec.name = self.model_name
+        request.model_spec.signature_name = config.TF_SERVING_SIGNATURE_NAME
+        request.inputs["inputs"].CopyFrom(tensor)
+        request.output_filter.extend(OUTPUT_KEYS)
+        return request
+
+    @staticmethod
+    def tensor_to_array(tensor) -> np.ndarray:
+        """
+        Converts the float output tensor proto to an array of the image.
+        """
+        shape = [dim.size for dim in tensor.tensor_shape.dim]
+        if tensor.tensor_content:
+            array = np.frombuffer(tensor.tensor_content, dtype=np.float32)
+        else:
+            array = np.array(tensor.float_val, dtype=np.float32)
+        return array.reshape(shape)[0]
+
+    def predict(self, image_input) -> Dict:
+        """
+        @param image_input: encoded image bytes or the uint8 image array
+        @return: dict of the output arrays of the image
+        """
+        try:
+            response = self._get_stub().Predict(
+                self.make_request(image_input),
+                timeout=config.TF_SERVING_TIMEOUT)
+        except self.grpc.RpcError as ex:
+            retry = ex.code() in (self.grpc.StatusCode.UNAVAILABLE,
+                                  self.grpc.StatusCode.DEADLINE_EXCEEDED)
+            raise TfServingError(f"tf-serving rpc failed: {ex.details()}",
+                                 retry=retry)
+        return {key: self.tensor_to_array(response.outputs[key])
+                for key in OUTPUT_KEYS}
+
+
+TFS_CLIENTS = {
+    "rest": TfsRestClient,
+    "grpc": TfsGrpcClient
+}
+
+
+class TfsObjectDetection(AbstractObjectDetection):
+    """
+    Do the object detection using Tensorflow Serving service.
+    """
+
+    def __init__(self, url: str = None, model_name: str = None,
+                 protocol: str = None, input_type: str = None):
+        """
+        @param url: tf-serving host and port, defaults to the configured
+                    url of the protocol
+        @param model_name: served model name
+        @param protocol: rest or grpc
+        @param input_type: input type of the served model's signature
+        """
+        input_type = input_type or config.TF_SERVING_INPUT_TYPE
+        self.client = TFS_CLIENTS[protocol or config.TF_SERVING_PROTOCOL](
+            url=url, model_name=model_name, input_type=input_type)
+        self.retries = config.TF_SERVING_RETRIES
+        # same image layout as the frozen graph model
+        self.input_layout = ("encoded"
+                             if input_type == "encoded_image_string_tensor"
+                             else "bgr")
+
+    def get_objects(self, image_np, image: Image) -> Dict:
+        """
+        Returns the objects and coordiates detected by the served faster
+        rcnn model.
+
+        @param image_np: encoded image or the image tensor, as per the
+                         input layout
+        @param image: PIL Image object
+
+        @return: ouput dict from the faster rcnn inference
+        """
+        output_dict = with_retries(lambda: self.client.predict(image_np),
+                                   self.retries)
+        output_dict["detection_classes"] = output_dict[
+            "detection_classes"].astype(np.uint8)
+        width, height = image.size
+        return renormalize_boxes(output_dict, width, height)
+
+    def get_objects_batch(self, images_np: List,
+                          images: List[Image.Image]) -> List[Dict]:
+        """
+        Sends the images as concurrent in-flight requests.
+        """
+        pool = get_thread_pool("tfs_requests", config.TF_SERVING_POOL_SIZE)
+        if not pool:
+            return super().get_objects_batch(images_np, images)
+        return list(pool.map(self.get_objects, images_np, images))
+
+    def get_bboxes(self, image_path: str, img_pipeline=None):
+        pass
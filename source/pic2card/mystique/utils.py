@@ -2,20 +2,21 @@ import time
 import io
 import re
 import json
-import http.client
 import urllib
-from typing import Optional, Dict
+from typing import Optional, Dict, TYPE_CHECKING
 import glob
 import xml.etree.ElementTree as Et
 from contextlib import contextmanager
 from importlib import import_module
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 from PIL import Image
 
 from mystique import config
+from mystique.executors import get_connection_pool
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Colro map used for the plotting.
 COLORS = [
@@ -42,7 +43,7 @@ def timeit(name="code-block"):
         print(f"Execution block: {name} finishes in : {end} sec.")
 
 
-def xml_to_csv(labelmg_dir: str) -> pd.DataFrame:
+def xml_to_csv(labelmg_dir: str) -> "pd.DataFrame":
     """
     Maps the xml labels of each object
     to the image file
@@ -51,6 +52,9 @@ def xml_to_csv(labelmg_dir: str) -> pd.DataFrame:
 
     @return: xml dataframe
     """
+    # pandas is only needed by the commands, not imported by the service.
+    import pandas as pd
+
     xml_list = []
     for xml_file in glob.glob(labelmg_dir + "/*.xml"):
         tree = Et.parse(xml_file)
@@ -89,6 +93,9 @@ def plot_results(pil_img: Image,
     Returns binary representation of the image with bounding box drawn, Use
     `Image.open` to render the image.
     """
+    # matplotlib is only needed by the debug endpoint and commands.
+    import matplotlib.pyplot as plt
+
     label_map = label_map or config.ID_TO_LABEL
     plt.imshow(pil_img)
     plt.margins(0, 0)
@@ -127,6 +134,9 @@ def load_od_instance():
     module_path, class_name = ".".join(p_split[:-1]), p_split[-1]
     module = import_module(module_path)
     od_obj = getattr(module, class_name)()
+    if config.ENABLE_DETECTION_BATCHING:
+        from mystique.detection_scheduler import BatchingDetector
+        od_obj = BatchingDetector(od_obj)
     return od_obj
 
 
@@ -193,7 +203,7 @@ def send_json_payload(path: str, body: Dict, host_port: str,
     headers = {"Content-Type": "application/json"}
     if url_params:
         path += "?" + urllib.parse.urlencode(url_params)
-    conn = http.client.HTTPConnection(host_port)
-    conn.request(method, path, json.dumps(body), headers)
-    response = json.loads(conn.getresponse().read())
-    return response
+    # kept-alive connection of the process's pool
+    _, data = get_connection_pool(host_port).request(
+        method, path, json.dumps(body), headers)
+    return json.loads(data)
@@ -3,8 +3,6 @@ import unittest
 import time
 import json
 from typing import Dict, List
-import numpy as np
-import cv2
 from PIL import Image
 
 from tests.utils import (
@@ -18,6 +16,7 @@ from tests.utils import (
 )
 
 from app.api import app
+from mystique.ingest import CardImage
 from mystique.predict_card import PredictCard
 from mystique.extract_properties import CollectProperties
 from mystique.utils import load_od_instance
@@ -65,9 +64,8 @@ class TestUtil:
         @param model_instance: model instance object
         @return: dict of design objects
         """
-        image = image.convert("RGB")
-        image_np = np.asarray(image)
-        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        image_np, image = CardImage(image).model_inputs(
+            model_instance.od_model)
         output_dict = model_instance.od_model.get_objects(
             image_np=image_np, image=image
         )
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from mystique.metrics.average_precision import (average_precisions,
+                                                mean_average_precision)
+
+
+class TestAveragePrecision(unittest.TestCase):
+    """ Tests for the VOC mAP of the detection labels """
+
+    def test_average_precisions(self):
+        """
+        Tests the interpolated AP with a false positive ranked between the
+        true positives and a duplicate detection
+        """
+        ground_truths = {
+            "1.txt": [("textbox", [0, 0, 99, 19]),
+                      ("textbox", [0, 50, 99, 69]),
+                      ("image", [200, 0, 299, 99])]
+        }
+        predictions = {
+            "1.txt": [("textbox", 0.9, [0, 0, 99, 19]),
+                      ("textbox", 0.8, [300, 300, 350, 350]),
+                      ("textbox", 0.7, [0, 51, 99, 70]),
+                      ("image", 0.9, [200, 0, 299, 99]),
+                      ("image", 0.8, [201, 0, 299, 99])]
+        }
+        class_aps = average_precisions(ground_truths, predictions)
+        self.assertAlmostEqual(class_aps["textbox"], 0.5 + 0.5 * 2 / 3)
+        self.assertAlmostEqual(class_aps["image"], 1.0)
+
+    def test_mean_average_precision(self):
+        """
+        Tests the mAP from the map_score label files, images without
+        predictions are counted as misses
+        """
+        with tempfile.TemporaryDirectory() as out_dir:
+            gt_dir = os.path.join(out_dir, "gt")
+            pred_dir = os.path.join(out_dir, "pred")
+            os.makedirs(gt_dir)
+            os.makedirs(pred_dir)
+            with open(os.path.join(gt_dir, "1.txt"), "w") as label_file:
+                label_file.write("checkbox 10 10 20 20\n")
+            with open(os.path.join(gt_dir, "2.txt"), "w") as label_file:
+                label_file.write("checkbox 10 10 20 20\n")
+            with open(os.path.join(pred_dir, "1.txt"), "w") as label_file:
+                label_file.write("checkbox 0.95 10 10 20 20\n")
+            m_ap, class_aps = mean_average_precision(gt_dir, pred_dir)
+        self.assertAlmostEqual(m_ap, 0.5)
+        self.assertEqual(list(class_aps), ["checkbox"])
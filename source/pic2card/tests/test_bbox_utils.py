@@ -0,0 +1,50 @@
+import unittest
+
+from mystique.card_layout import bbox_utils
+
+
+def _remove_noise(objects):
+    json_objects = {"objects": [{"object": name, "coords": coords}
+                                for name, coords in objects]}
+    bbox_utils.remove_noise_objects(json_objects)
+    return [(design_object["object"], design_object["coords"])
+            for design_object in json_objects["objects"]]
+
+
+class TestRemoveNoiseObjects(unittest.TestCase):
+    """ Tests for the matrix based noise objects removal """
+
+    def test_smaller_object_removed(self):
+        """
+        Tests if the smaller of the overlapping objects is removed
+        """
+        objects = [("image", (0, 0, 100, 100)),
+                   ("image", (10, 10, 60, 60)),
+                   ("textbox", (200, 200, 260, 220))]
+        self.assertEqual(_remove_noise(objects), [objects[0], objects[2]])
+
+    def test_textbox_inside_actionset(self):
+        """
+        Tests if the textbox detected inside an actionset is removed
+        """
+        objects = [("image", (300, 300, 400, 400)),
+                   ("actionset", (0, 0, 100, 40)),
+                   ("textbox", (10, 5, 90, 35))]
+        self.assertEqual(_remove_noise(objects), objects[:2])
+
+    def test_first_textbox_falls_back_to_iou(self):
+        """
+        Tests if the textbox at the first position is checked with the
+        iou and the smaller actionset is removed
+        """
+        objects = [("textbox", (0, 0, 100, 40)),
+                   ("actionset", (10, 5, 90, 35))]
+        self.assertEqual(_remove_noise(objects), objects[:1])
+
+    def test_same_coords_survives(self):
+        """
+        Tests if the objects sharing a surviving object's coords are kept
+        """
+        objects = [("image", (0, 0, 100, 100)),
+                   ("image", (0, 0, 100, 100))]
+        self.assertEqual(_remove_noise(objects), objects)
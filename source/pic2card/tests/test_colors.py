@@ -0,0 +1,46 @@
+import unittest
+
+from mystique.colors import (classify_actionset_styles, classify_colors,
+                             classify_font_colors)
+
+
+class TestColorClassification(unittest.TestCase):
+    """ Tests for the batched color classification """
+
+    def test_font_colors(self):
+        """
+        Tests the font color names of background and foreground pairs
+        """
+        palettes = [
+            [255, 255, 255, 10, 10, 10],
+            [255, 255, 255, 200, 20, 20],
+            [0, 0, 0, 250, 250, 250],
+            [255, 255, 255, 250, 250, 250],
+            [120, 60, 200, 255, 0, 255]
+        ]
+        self.assertEqual(classify_font_colors(palettes),
+                         ["Dark", "Attention", "Light", "Default",
+                          "Default"])
+
+    def test_actionset_styles(self):
+        """
+        Tests the actionset styles of the background colors
+        """
+        self.assertEqual(
+            classify_actionset_styles([[250, 5, 5], [10, 90, 170],
+                                       [255, 255, 255]]),
+            ["destructive", "positive", "default"])
+
+    def test_classify_colors(self):
+        """
+        Tests if only the textbox and actionset objects are classified
+        """
+        design_objects = [
+            {"object": "textbox", "color": [255, 255, 255, 0, 0, 255]},
+            {"object": "actionset", "style": [0, 128, 0]},
+            {"object": "image"}
+        ]
+        classify_colors(design_objects)
+        self.assertEqual(design_objects[0]["color"], "Accent")
+        self.assertEqual(design_objects[1]["style"], "positive")
+        self.assertNotIn("color", design_objects[2])
@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+
+from mystique.detection_scheduler import BatchingDetector
+
+
+class CountingModel:
+    """ Detection model recording the batch sizes it has run """
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.name = "counting"
+
+    def get_objects(self, image_np, image):
+        self.batch_sizes.append(1)
+        return {"image": image}
+
+    def get_objects_batch(self, images_np, images):
+        time.sleep(0.01)
+        self.batch_sizes.append(len(images))
+        return [{"image": image} for image in images]
+
+
+class FailingModel:
+
+    def get_objects(self, image_np, image):
+        raise RuntimeError("inference failed")
+
+
+class SlowModel:
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.images = []
+
+    def get_objects(self, image_np, image):
+        self.images.append(image)
+        time.sleep(self.delay)
+        return {"image": image}
+
+
+class WorkerStop(BaseException):
+    pass
+
+
+class StoppingModel:
+    """ Detection model stopping the worker thread on the first call """
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_objects(self, image_np, image):
+        self.calls += 1
+        if self.calls == 1:
+            raise WorkerStop()
+        return {"image": image}
+
+
+class TestBatchingDetector(unittest.TestCase):
+    """ Tests for the detection micro-batching scheduler """
+
+    def test_results_fanned_back(self):
+        """
+        Tests if the concurrent requests are batched and each request gets
+        its own result
+        """
+        model = CountingModel()
+        detector = BatchingDetector(model, max_batch_size=4,
+                                    max_wait_ms=50)
+        results = {}
+
+        def request(position):
+            results[position] = detector.get_objects(None, position)
+
+        threads = [threading.Thread(target=request, args=(position,))
+                   for position in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {position: {"image": position}
+                                   for position in range(8)})
+        self.assertLess(len(model.batch_sizes), 8)
+        self.assertLessEqual(max(model.batch_sizes), 4)
+        self.assertEqual(detector.name, "counting")
+
+    def test_error_propagation(self):
+        """
+        Tests if the model failure is raised to the request
+        """
+        detector = BatchingDetector(FailingModel(), max_wait_ms=0)
+        self.assertRaises(RuntimeError, detector.get_objects, None, None)
+
+    def test_timeout(self):
+        """
+        Tests if a request times out on a slow model and the timed out
+        request still in the queue is dropped
+        """
+        model = SlowModel(0.3)
+        detector = BatchingDetector(model, max_batch_size=1, max_wait_ms=0,
+                                    timeout=0.1)
+        errors = []
+
+        def request():
+            try:
+                detector.get_objects(None, "first")
+            except TimeoutError as ex:
+                errors.append(ex)
+
+        slow = threading.Thread(target=request)
+        slow.start()
+        time.sleep(0.05)
+        self.assertRaises(TimeoutError, detector.get_objects, None, "queued")
+        slow.join()
+        time.sleep(0.4)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(model.images, ["first"])
+
+    def test_worker_restart(self):
+        """
+        Tests if the requests of a dead worker fail and the next request
+        starts a new worker
+        """
+        model = StoppingModel()
+        detector = BatchingDetector(model, max_wait_ms=0, timeout=5)
+        self.assertRaises(RuntimeError, detector.get_objects, None, 1)
+        self.assertEqual(detector.get_objects(None, 2), {"image": 2})
@@ -0,0 +1,80 @@
+import time
+import unittest
+
+from mystique.executors import StageExecutor
+
+
+def _add(value_1, value_2):
+    return value_1 + value_2
+
+
+def _fail():
+    raise ValueError("stage failed")
+
+
+def _hang(seconds):
+    time.sleep(seconds)
+
+
+def _slow_add(value_1, value_2):
+    time.sleep(1)
+    return value_1 + value_2
+
+
+class TestStageExecutor(unittest.TestCase):
+    """ Tests for the persistent pipeline stage executor """
+
+    def setUp(self):
+        self.executor = StageExecutor(max_workers=2,
+                                      timeouts={"slow": 0.5})
+
+    def tearDown(self):
+        self.executor.restart()
+
+    def test_result(self):
+        """
+        Tests if the stage result is returned and the pool is reused
+        """
+        future = self.executor.submit(_add, 1, 2)
+        self.assertEqual(self.executor.result("fast", future), 3)
+        pool = self.executor._pool
+        future = self.executor.submit(_add, 2, 2)
+        self.assertEqual(self.executor.result("fast", future), 4)
+        self.assertIs(self.executor._pool, pool)
+
+    def test_error_propagation(self):
+        """
+        Tests if the stage exception is raised to the caller
+        """
+        future = self.executor.submit(_fail)
+        self.assertRaises(ValueError, self.executor.result, "fast", future)
+
+    def test_timeout(self):
+        """
+        Tests if a hung stage times out and the executor recovers
+        """
+        future = self.executor.submit(_hang, 30)
+        self.assertRaises(TimeoutError, self.executor.result, "slow", future)
+        self.assertIsNone(self.executor._pool)
+        future = self.executor.submit(_add, 1, 1)
+        self.assertEqual(self.executor.result("slow", future), 2)
+
+    def test_timeout_concurrent_stage(self):
+        """
+        Tests if a hung stage leaves the other request's stage running on
+        the retired pool, whose workers are terminated afterwards
+        """
+        hung_future = self.executor.submit(_hang, 30)
+        future = self.executor.submit(_slow_add, 2, 3)
+        pool = self.executor._pool
+        processes = list(pool._processes.values())
+        self.assertRaises(TimeoutError, self.executor.result, "slow",
+                          hung_future)
+        new_future = self.executor.submit(_add, 1, 1)
+        self.assertIsNot(self.executor._pool, pool)
+        self.assertEqual(self.executor.result("fast", future), 5)
+        self.assertEqual(self.executor.result("fast", new_future), 2)
+        for process in processes:
+            process.join(timeout=5)
+            self.assertFalse(process.is_alive())
+        self.assertNotIn(pool, self.executor._pending)
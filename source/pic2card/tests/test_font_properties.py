@@ -1,6 +1,11 @@
+import unittest
+
+from PIL import Image, ImageDraw
+
 from tests.base_test_class import BaseSetUpClass
 from tests.variables import mock_desing_obj, mock_desing_obj_eq_weight
-from mystique.font_properties import classify_font_weights
+from mystique.font_properties import (classify_font_weights, FontPropMorph,
+                                      FontPropDistance)
 
 
 class TestClassifyFont(BaseSetUpClass):
@@ -45,3 +50,25 @@ class TestClassifyFont(BaseSetUpClass):
         value = classify_font_weights(design_objects)
         self.assertEqual(value[0]["weight"], "Lighter")
         self.assertEqual(value[1]["weight"], "Lighter")
+
+
+class TestFontWeightDistance(unittest.TestCase):
+    """ Tests for the distance transform based font weight """
+
+    def test_same_weights_as_morph(self):
+        """
+        Tests if the weights matches the morphological skeleton weights
+        including the crops going out of the image
+        """
+        image = Image.new("RGB", (300, 120), (255, 255, 255))
+        draw = ImageDraw.Draw(image)
+        draw.text((10, 10), "Sample Text", fill=(0, 0, 0))
+        draw.line([(10, 60), (280, 70)], fill=(20, 20, 20), width=5)
+        draw.rectangle([(150, 80), (200, 110)], fill=(40, 40, 40))
+        morph, distance = FontPropMorph(), FontPropDistance()
+        for coords in [(5, 5, 120, 30), (0, 50, 300, 80),
+                       (140.4, 75.6, 210.5, 115.2), (-4, 2, 60, 40)]:
+            img_data = {"uuid": "uuid"}
+            self.assertEqual(
+                distance.get_weight(image, coords, img_data),
+                morph.get_weight(image, coords, img_data))
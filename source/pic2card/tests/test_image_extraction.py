@@ -0,0 +1,36 @@
+import unittest
+
+from mystique.image_extraction import ImageExtraction
+
+
+class TestImageExtraction(unittest.TestCase):
+    """ Tests for the custom image pipeline's de-duplication """
+
+    def setUp(self):
+        self.image_extraction = ImageExtraction()
+
+    def test_remove_noise_objects(self):
+        """
+        Tests if the smaller intersecting or contained boxes are removed
+        """
+        points = [(0, 0, 100, 100), (10, 10, 20, 20), (90, 90, 150, 120),
+                  (300, 300, 340, 340), (300, 300, 340, 340)]
+        self.assertEqual(self.image_extraction.remove_noise_objects(points),
+                         [(0, 0, 100, 100), (300, 300, 340, 340),
+                          (300, 300, 340, 340)])
+
+    def test_remove_model_intersection(self):
+        """
+        Tests if the image points overlapping the model objects are marked
+        """
+        image_points = [(10, 10, 50, 50), (200, 200, 260, 260),
+                        (400, 10, 420, 30)]
+        model_points = [(5, 5, 60, 60), (395, 5, 500, 100)]
+        included = [0] * len(image_points)
+        self.image_extraction.remove_model_intersection(
+            image_points, model_points, included, True)
+        self.assertEqual(included, [1, 0, 1])
+        included = [0] * len(image_points)
+        self.image_extraction.remove_model_intersection(
+            [(190, 190, 210, 210)], image_points, included, False)
+        self.assertEqual(included, [0, 1, 0])
@@ -0,0 +1,102 @@
+import base64
+import io
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from mystique import config
+from mystique.ingest import CardImage, ImageRejected, read_image_size
+
+
+def encode_image(image, image_format="PNG"):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class PilModel:
+    input_layout = "pil"
+
+
+class LegacyModel:
+    """ Model without the input layout declaration """
+
+
+class TestCardImage(unittest.TestCase):
+    """ Tests for the ingested card image views """
+
+    def setUp(self):
+        image = Image.new("RGBA", (40, 20), (10, 20, 30, 255))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        self.bs64_img = base64.b64encode(buffer.getvalue()).decode()
+
+    def test_views(self):
+        """
+        Tests if the views are in their layouts and computed once
+        """
+        card_image = CardImage.from_base64(self.bs64_img)
+        self.assertEqual(card_image.pil.mode, "RGB")
+        self.assertEqual(card_image.size, (40, 20))
+        self.assertEqual(card_image.rgb[0, 0].tolist(), [10, 20, 30])
+        self.assertEqual(card_image.bgr[0, 0].tolist(), [30, 20, 10])
+        self.assertEqual(card_image.gray.shape, (20, 40))
+        self.assertIs(card_image.bgr, card_image.view("bgr"))
+        self.assertFalse(card_image.bgr.flags.writeable)
+        with self.assertRaises(ValueError):
+            card_image.view("hsv")
+
+    def test_model_inputs(self):
+        """
+        Tests if the model gets the array of its input layout
+        """
+        card_image = CardImage.from_base64(self.bs64_img)
+        image_np, image = card_image.model_inputs(PilModel())
+        self.assertIsNone(image_np)
+        self.assertIs(image, card_image.pil)
+        self.assertNotIn("bgr", card_image._views)
+
+        image_np, _ = card_image.model_inputs(LegacyModel())
+        self.assertTrue(np.array_equal(image_np, card_image.rgb[:, :, ::-1]))
+
+
+class TestImageDecode(unittest.TestCase):
+    """ Tests for the header validation and the downscaling decode """
+
+    def test_header_rejection(self):
+        """
+        Tests if the oversize images are rejected from the header
+        """
+        image_data = encode_image(
+            Image.new("L", (config.IMG_MAX_DIMENSION + 1, 10)))
+        self.assertEqual(read_image_size(image_data[:64]),
+                         (config.IMG_MAX_DIMENSION + 1, 10))
+        with self.assertRaises(ImageRejected):
+            CardImage.from_bytes(image_data)
+
+    def test_base64_header_rejection(self):
+        """
+        Tests if the image is rejected from the leading base64 characters,
+        the rest of the string is not decoded
+        """
+        noise = np.random.RandomState(0).randint(
+            0, 255, (200, config.IMG_MAX_DIMENSION + 1), dtype=np.uint8)
+        bs64_img = base64.b64encode(
+            encode_image(Image.fromarray(noise))).decode()
+        with self.assertRaises(ImageRejected):
+            CardImage.from_base64(bs64_img[:-8] + "!corrupt")
+
+    def test_downscale(self):
+        """
+        Tests if the oversize images are downscaled keeping the aspect
+        ratio
+        """
+        image = Image.new("RGB", (3000, 600), (200, 30, 30))
+        for image_format in ("PNG", "JPEG"):
+            card_image = CardImage.from_bytes(
+                encode_image(image, image_format), max_side=1000)
+            self.assertEqual(card_image.size, (1000, 200))
+            self.assertEqual(card_image.pil.mode, "RGB")
+        card_image = CardImage.from_bytes(encode_image(image), max_side=0)
+        self.assertEqual(card_image.size, (3000, 600))
@@ -0,0 +1,140 @@
+import copy
+import unittest
+
+from PIL import Image
+
+from mystique.ac_export.adaptive_card_export import (AdaptiveCardExport,
+                                                     export_to_card)
+from mystique.card_layout.layout_tree import LayoutTree
+
+
+def item(name, uuid, coords, **properties):
+    design_object = {"object": name, "data": f"text {uuid}", "class": 1,
+                     "uuid": uuid, "coordinates": coords}
+    design_object.update(properties)
+    return design_object
+
+
+class TestLayoutTree(unittest.TestCase):
+    """ Tests for the layout tree and its dict form adapters """
+
+    def setUp(self):
+        # a columnset of a textbox and an imageset column, then a textbox
+        self.card_layout = [
+            {"object": "columnset", "coordinates": (10, 10, 500, 80),
+             "row": [
+                 {"column": {"items": [
+                     item("textbox", "a", (10, 10, 200, 30))]},
+                  "object": "column", "coordinates": (10, 10, 200, 30)},
+                 {"column": {"items": [
+                     {"imageset": {"items": [
+                         item("image", "b", (300, 10, 380, 80),
+                              size="Small"),
+                         item("image", "c", (400, 10, 500, 80),
+                              size="Small")]},
+                      "object": "imageset",
+                      "coordinates": (300, 10, 500, 80)}]},
+                  "object": "column", "coordinates": (300, 10, 500, 80)}]},
+            item("textbox", "d", (10, 120, 500, 140)),
+        ]
+
+    def test_from_layout(self):
+        """
+        Tests the nodes, their parents and the layout order walk
+        """
+        layout_tree = LayoutTree.from_layout(self.card_layout)
+        self.assertEqual(len(layout_tree.nodes), 9)
+        self.assertEqual([node.object for node in layout_tree.walk()],
+                         ["columnset", "column", "textbox", "column",
+                          "imageset", "image", "image", "textbox"])
+        images = [node for node in layout_tree.walk()
+                  if node.object == "image"]
+        imageset = layout_tree.nodes[images[0].parent]
+        self.assertEqual(imageset.object, "imageset")
+        self.assertEqual(layout_tree.child_elements(imageset.index),
+                         [node.element for node in images])
+        self.assertIs(layout_tree.child_elements(LayoutTree.ROOT)[1],
+                      self.card_layout[1])
+
+    def test_to_layout(self):
+        """
+        Tests the dict form built back from the tree
+        """
+        expected = copy.deepcopy(self.card_layout)
+        layout_tree = LayoutTree.from_layout(self.card_layout)
+        self.assertEqual(layout_tree.to_layout(), expected)
+
+        layout_tree = LayoutTree()
+        columnset = layout_tree.add_node({"object": "columnset"},
+                                         LayoutTree.ROOT)
+        column = layout_tree.add_node({"object": "column"}, columnset)
+        layout_tree.add_node(item("textbox", "a", (10, 10, 200, 30)),
+                             column)
+        card_layout = layout_tree.to_layout()
+        self.assertEqual(
+            card_layout[0]["row"][0]["column"]["items"][0]["uuid"], "a")
+
+    def test_node_updates(self):
+        """
+        Tests the moves, removals and sorts keep the dict form in step with
+        the tree
+        """
+        layout_tree = LayoutTree.from_layout(self.card_layout)
+        columns = layout_tree.nodes[1].children
+        textbox = layout_tree.nodes[columns[0]].children[0]
+        layout_tree.move_node(textbox, columns[1])
+        self.assertEqual([element["object"] for element in
+                          self.card_layout[0]["row"][1]["column"]["items"]],
+                         ["imageset", "textbox"])
+        self.assertEqual(self.card_layout[0]["row"][0]["column"]["items"],
+                         [])
+        layout_tree.sort_children(columns[1],
+                                  lambda element: element["coordinates"][0])
+        self.assertEqual(layout_tree.child_elements(columns[1]),
+                         self.card_layout[0]["row"][1]["column"]["items"])
+        self.assertEqual(layout_tree.child_elements(columns[1])[0]["uuid"],
+                         "a")
+        layout_tree.remove_node(columns[0])
+        self.assertEqual(len(self.card_layout[0]["row"]), 1)
+        self.assertEqual([node.object for node in layout_tree.walk()],
+                         ["columnset", "column", "textbox", "imageset",
+                          "image", "image", "textbox"])
+
+    def test_export(self):
+        """
+        Tests the export of the tree and of the dict form are the same
+        """
+        card_layout = copy.deepcopy(self.card_layout)
+        layout_tree = LayoutTree.from_layout(card_layout)
+        body = AdaptiveCardExport().build_adaptive_card(layout_tree)
+        self.assertEqual(
+            AdaptiveCardExport().build_adaptive_card(card_layout), body)
+        self.assertEqual([element["type"] for element in body],
+                         ["ColumnSet", "TextBlock"])
+        self.assertEqual(body[0]["columns"][1]["items"][0]["type"],
+                         "ImageSet")
+
+    def test_export_to_card(self):
+        """
+        Tests the property passes update the layout's own dicts
+        """
+        body = export_to_card(self.card_layout, Image.new("RGB", (520, 160)))
+        imageset = self.card_layout[0]["row"][1]["column"]["items"][0]
+        self.assertEqual(imageset["size"], "Small")
+        self.assertIn("width", self.card_layout[0]["row"][0])
+        self.assertTrue(all(node.element.get("horizontal_alignment")
+                            for node in LayoutTree.from_layout(
+                                self.card_layout).walk()))
+        self.assertEqual(body[0]["columns"][1]["items"][0]["imageSize"],
+                         "Small")
+
+    def test_export_layout_tree(self):
+        """
+        Tests the export walking a given tree is the same as exporting the
+        dict form
+        """
+        image = Image.new("RGB", (520, 160))
+        card_layout = copy.deepcopy(self.card_layout)
+        body = export_to_card(LayoutTree.from_layout(card_layout), image)
+        self.assertEqual(export_to_card(self.card_layout, image), body)
+        self.assertEqual(self.card_layout, card_layout)
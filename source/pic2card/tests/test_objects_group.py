@@ -0,0 +1,153 @@
+import copy
+import unittest
+
+from mystique.card_layout.container_group import ContainerGroup
+from mystique.card_layout.ds_helper import ObjectStore
+from mystique.card_layout.layout_tree import LayoutTree, merge_properties
+from mystique.card_layout.objects_group import ObjectIndex, RowColumnGrouping
+from mystique.card_layout.row_column_group import (RowColumnGroup,
+                                                   get_layout_structure)
+
+
+def design_object(name, uuid, coords):
+    xmin, ymin, xmax, ymax = coords
+    return {"object": name, "xmin": xmin, "ymin": ymin, "xmax": xmax,
+            "ymax": ymax, "coords": coords, "uuid": uuid, "class": 1}
+
+
+class TestIndexGrouping(unittest.TestCase):
+    """ Tests for the index based row / column grouping """
+
+    def setUp(self):
+        # two side by side textboxes followed by a full width textbox
+        self.design_objects = [
+            design_object("textbox", "a", (10, 10, 200, 30)),
+            design_object("textbox", "b", (300, 12, 500, 32)),
+            design_object("textbox", "c", (10, 80, 500, 100)),
+        ]
+        self.object_index = ObjectIndex(self.design_objects)
+        self.grouping = RowColumnGrouping()
+
+    def test_sort(self):
+        """
+        Tests the x-way sort and the ties keeping the given order
+        """
+        self.assertEqual(self.object_index.sort([2, 1, 0], 0), [2, 0, 1])
+        self.assertEqual(self.object_index.sort([1, 0, 2], 1), [0, 1, 2])
+
+    def test_row_grouping(self):
+        """
+        Tests if the objects in the same row are grouped together
+        """
+        rows = self.grouping.index_grouping(self.object_index, [0, 1, 2],
+                                            self.grouping.row_condition)
+        self.assertEqual(rows, [[0, 1], [2]])
+        columns = self.grouping.index_grouping(
+            self.object_index, rows[0], self.grouping.column_condition)
+        self.assertEqual(columns, [[0], [1]])
+
+    def test_object_grouping(self):
+        """
+        Tests if the object grouping returns the same object instances
+        """
+        rows = self.grouping.object_grouping(self.design_objects,
+                                             self.grouping.row_condition)
+        self.assertEqual([len(row) for row in rows], [2, 1])
+        self.assertIs(rows[0][1], self.design_objects[1])
+
+    def test_layout_structure(self):
+        """
+        Tests the columnset built for the row of the side by side objects
+        """
+        card_layout = get_layout_structure(self.design_objects).to_layout()
+        self.assertEqual([item["object"] for item in card_layout],
+                         ["columnset", "textbox"])
+        columns = card_layout[0]["row"]
+        self.assertEqual([column["column"]["items"][0]["uuid"]
+                          for column in columns], ["a", "b"])
+        self.assertEqual(card_layout[0]["coordinates"], (10, 10, 500, 32))
+
+    def test_nested_column_layout(self):
+        """
+        Tests the column of stacked objects laid out as a sub-layout and
+        the builder's work counters
+        """
+        # an image beside the two stacked textboxes
+        self.design_objects[0] = design_object("image", "a",
+                                               (10, 10, 200, 80))
+        self.design_objects[2] = design_object("textbox", "d",
+                                               (300, 40, 500, 60))
+        self.design_objects.append(design_object("textbox", "c",
+                                                 (10, 120, 500, 140)))
+        row_column_group = RowColumnGroup()
+        layout_tree = LayoutTree()
+        object_index = ObjectIndex(self.design_objects)
+        row_column_group.row_column_grouping([0, 1, 2, 3], layout_tree,
+                                             object_index)
+        columns = layout_tree.to_layout()[0]["row"]
+        self.assertEqual([item["uuid"] for item in
+                          columns[1]["column"]["items"]], ["b", "d"])
+        self.assertEqual(row_column_group.stats["max_depth"], 2)
+        self.assertEqual(row_column_group.stats["frames"], 2)
+        self.assertEqual(row_column_group.stats["objects"], 6)
+
+
+class TestObjectStore(unittest.TestCase):
+    """ Tests for the uuid keyed property merge """
+
+    def setUp(self):
+        self.design_objects = [
+            design_object("textbox", "a", (10, 10, 200, 30)),
+            design_object("textbox", "b", (300, 12, 500, 32)),
+            design_object("textbox", "c", (10, 80, 500, 100)),
+        ]
+        self.properties = [{"uuid": obj["uuid"], "coords": obj["coords"],
+                            "data": f"text {obj['uuid']}"}
+                           for obj in self.design_objects]
+
+    def test_lookup(self):
+        """
+        Tests the uuid lookup keeping the first of a repeated uuid
+        """
+        store = ObjectStore(self.properties + [{"uuid": "a"}])
+        self.assertEqual(len(store), 3)
+        self.assertIs(store["a"], self.properties[0])
+        self.assertIn("c", store)
+        self.assertIsNone(store.get("d"))
+
+    def test_merge_properties(self):
+        """
+        Tests the properties merged to the nested layout leaves
+        """
+        layout_tree = get_layout_structure(self.design_objects)
+        merge_properties(ObjectStore(self.properties), layout_tree)
+        card_layout = layout_tree.to_layout()
+        columns = card_layout[0]["row"]
+        self.assertEqual(columns[1]["column"]["items"][0]["data"], "text b")
+        self.assertEqual(card_layout[1]["data"], "text c")
+        with self.assertRaises(IndexError):
+            merge_properties(self.properties, LayoutTree.from_layout(
+                [{"object": "textbox", "uuid": "d"}]))
+
+    def test_merge_items(self):
+        """
+        Tests the side by side images merged to an imageset
+        """
+        images = [design_object("image", uuid, coords) for uuid, coords in
+                  [("a", (10, 10, 100, 60)), ("b", (120, 10, 210, 60))]]
+        for image in images:
+            image["class"] = 5
+        layout_tree = get_layout_structure(
+            images + self.design_objects[2:])
+        card_layout = layout_tree.to_layout()
+        self.assertEqual([item["object"] for item in card_layout],
+                         ["textbox", "imageset"])
+        self.assertEqual([item["uuid"] for item in
+                          card_layout[1]["imageset"]["items"]], ["a", "b"])
+        imageset = layout_tree.nodes[layout_tree.nodes[
+            LayoutTree.ROOT].children[1]]
+        self.assertEqual(layout_tree.child_elements(imageset.index),
+                         card_layout[1]["imageset"]["items"])
+        expected = copy.deepcopy(card_layout)
+        self.assertEqual(
+            ContainerGroup().merge_items(layout_tree).to_layout(), expected)
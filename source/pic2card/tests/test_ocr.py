@@ -0,0 +1,147 @@
+import unittest
+
+from PIL import Image
+
+from mystique import config
+from mystique.ocr import (MontageOcr, WordIndex, get_text_from_data,
+                          get_text_objects)
+from mystique.ocr_engine import TesserocrEngine, tsv_to_dict
+
+# image data of a card with 2 lines of text, first line having 2 words
+page_image_data = {
+    "level": [1, 2, 3, 4, 5, 5, 4, 5],
+    "page_num": [1, 1, 1, 1, 1, 1, 1, 1],
+    "block_num": [0, 1, 1, 1, 1, 1, 1, 1],
+    "par_num": [0, 0, 1, 1, 1, 1, 2, 2],
+    "line_num": [0, 0, 0, 1, 1, 1, 1, 1],
+    "word_num": [0, 0, 0, 0, 1, 2, 0, 1],
+    "left": [0, 10, 10, 10, 10, 60, 200, 200],
+    "top": [0, 10, 10, 10, 10, 12, 100, 100],
+    "width": [400, 300, 300, 90, 40, 40, 60, 60],
+    "height": [300, 110, 110, 20, 18, 18, 20, 20],
+    "conf": ["-1", "-1", "-1", "-1", 91, 89, "-1", 95],
+    "text": ["", "", "", "", "Hello", "World", "", "Submit"]
+}
+
+
+class TestWordIndex(unittest.TestCase):
+    """ Tests for the page level ocr word look up """
+
+    def setUp(self):
+        self.word_index = WordIndex(page_image_data)
+
+    def test_query(self):
+        """
+        Tests if only the words inside the region are returned
+        in the reading order
+        """
+        self.assertEqual(self.word_index.query((0, 0, 150, 50)), [4, 5])
+        self.assertEqual(self.word_index.query((190, 90, 270, 130)), [7])
+        self.assertEqual(self.word_index.query((300, 200, 400, 300)), [])
+
+    def test_image_data(self):
+        """
+        Tests if the image data is relative to the region and
+        the text matches the words inside the region
+        """
+        coords = (5, 5, 150, 50)
+        img_data = self.word_index.image_data(
+            self.word_index.query(coords), coords)
+        self.assertEqual(get_text_from_data(img_data), "Hello World")
+        self.assertEqual(img_data["line_num"].count(1), 3)
+        self.assertNotIn(2, img_data["line_num"])
+        word_position = img_data["text"].index("Hello")
+        self.assertEqual(img_data["left"][word_position], 5)
+        self.assertEqual(img_data["top"][word_position], 5)
+        self.assertEqual(img_data["conf"][word_position], 91)
+
+    def test_image_data_empty(self):
+        """
+        Tests if the region without any words results in empty text
+        """
+        coords = (300, 200, 400, 300)
+        img_data = self.word_index.image_data(
+            self.word_index.query(coords), coords)
+        self.assertEqual(get_text_from_data(img_data), "")
+        self.assertEqual(img_data["level"], [1])
+
+
+class TestMontageOcr(unittest.TestCase):
+    """ Tests for the montage packing of the text crops """
+
+    def test_get_montages(self):
+        """
+        Tests if the crops are stacked without overlap and the offset
+        table keeps the crop sizes
+        """
+        image = Image.new("RGB", (400, 300), (255, 255, 255))
+        design_objects = [
+            {"object": "textbox", "uuid": "a", "coords": (10, 10, 110, 40)},
+            {"object": "actionset", "uuid": "b",
+             "coords": (200, 100, 260, 130)},
+            {"object": "image", "uuid": "c", "coords": (0, 0, 50, 50)}
+        ]
+        montages = MontageOcr().get_montages(
+            image, get_text_objects(design_objects))
+        self.assertEqual(len(montages), 1)
+        montage, offsets = montages[0]
+        self.assertEqual(sorted(offsets), ["a", "b"])
+        region_a, region_b = offsets["a"], offsets["b"]
+        self.assertEqual(region_a[2] - region_a[0],
+                         110 - 10 + 2 * config.TEXTBOX_PADDING)
+        self.assertEqual(region_b[3] - region_b[1], 30)
+        self.assertGreater(region_b[1], region_a[3])
+        self.assertLessEqual(region_b[3], montage.size[1])
+
+
+class StandInApi:
+    """ Tesseract api handle recording the image it is given """
+
+    def SetPageSegMode(self, psm):
+        pass
+
+    def SetImage(self, image):
+        self.image = image
+
+    def Recognize(self):
+        pass
+
+    def GetTSVText(self, page):
+        return ""
+
+    def Clear(self):
+        pass
+
+
+class TestOcrEngine(unittest.TestCase):
+    """ Tests for the in-process engine's tsv parsing """
+
+    def test_tsv_to_dict(self):
+        """
+        Tests if the tsv rows are converted like pytesseract's image data
+        """
+        tsv = ("1\t1\t0\t0\t0\t0\t0\t0\t120\t30\t-1\t\n"
+               "5\t1\t1\t1\t1\t1\t4\t5\t50\t20\t91\tHello\n"
+               "5\t1\t1\t1\t1\t2\t60\t5\t50\t20\t88\t123\n")
+        img_data = tsv_to_dict(tsv)
+        self.assertEqual(img_data["level"], [1, 5, 5])
+        self.assertEqual(img_data["conf"], ["-1", 91, 88])
+        self.assertEqual(img_data["text"], ["", "Hello", "123"])
+        self.assertEqual(get_text_from_data(img_data), "Hello 123")
+
+    def test_transparent_image(self):
+        """
+        Tests if the transparent pixels are handed over as white, like
+        pytesseract does
+        """
+        engine = TesserocrEngine(pool_size=1)
+        api = StandInApi()
+        engine._pool.put(api)
+        for mode, color in [("LA", (0, 0)), ("RGBA", (0, 0, 0, 0))]:
+            image = Image.new(mode, (20, 10), color)
+            image.putpixel((3, 4), (0, 255) if mode == "LA" else
+                           (0, 0, 0, 255))
+            engine.image_to_data(image, 6)
+            self.assertEqual(api.image.mode, "RGB")
+            self.assertEqual(api.image.getpixel((0, 0)), (255, 255, 255))
+            self.assertEqual(api.image.getpixel((3, 4)), (0, 0, 0))
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# the onnx backend's packages are optional [ requirements-onnx.txt ]
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from onnx import TensorProto, helper  # noqa: E402
+from mystique.obj_detect.onnx_objects import DetrOnnxOD  # noqa: E402
+from mystique.obj_detect.postprocess import (detr_transform,  # noqa: E402
+                                             rescale_bboxes)
+
+
+def make_detr_stand_in(path, logits, boxes):
+    """
+    Saves an onnx model with the DETR input and outputs, which returns the
+    given logits and boxes for each image of the batch
+    """
+    queries, classes = logits.shape
+    # batch size from the input, used to tile the constant outputs
+    nodes = [
+        helper.make_node("Shape", ["image"], ["image_shape"]),
+        helper.make_node("Slice", ["image_shape", "zero", "one"],
+                         ["batch"]),
+        helper.make_node("Concat", ["batch", "one", "one"],
+                         ["repeats"], axis=0),
+        helper.make_node("Tile", ["logits", "repeats"], ["pred_logits"]),
+        helper.make_node("Tile", ["boxes", "repeats"], ["pred_boxes"]),
+    ]
+    initializers = [
+        helper.make_tensor("zero", TensorProto.INT64, [1], [0]),
+        helper.make_tensor("one", TensorProto.INT64, [1], [1]),
+        helper.make_tensor("logits", TensorProto.FLOAT,
+                           [1, queries, classes], logits.flatten()),
+        helper.make_tensor("boxes", TensorProto.FLOAT,
+                           [1, queries, 4], boxes.flatten()),
+    ]
+    graph = helper.make_graph(
+        nodes, "detr_stand_in",
+        [helper.make_tensor_value_info(
+            "image", TensorProto.FLOAT, ["batch", 3, "height", "width"])],
+        [helper.make_tensor_value_info(
+            "pred_logits", TensorProto.FLOAT, ["batch", queries, classes]),
+         helper.make_tensor_value_info(
+             "pred_boxes", TensorProto.FLOAT, ["batch", queries, 4])],
+        initializer=initializers)
+    # ir version of opset 11, loadable by the older runtimes
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 11)], ir_version=6)
+    onnx.save(model, path)
+
+
+class TestDetrOnnxOD(unittest.TestCase):
+    """ Tests for the onnx runtime DETR backend """
+
+    def setUp(self):
+        # 2nd query is below the threshold, last class is the no-object
+        logits = np.array([[0, 10, 0, 0],
+                           [1, 1, 1, 1],
+                           [0, 0, 12, 0]], dtype=np.float32)
+        self.boxes = np.array([[0.5, 0.5, 0.2, 0.2],
+                               [0.1, 0.1, 0.1, 0.1],
+                               [0.25, 0.75, 0.5, 0.1]], dtype=np.float32)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        model_path = os.path.join(self.tmp_dir.name, "detr.onnx")
+        make_detr_stand_in(model_path, logits, self.boxes)
+        self.od_model = DetrOnnxOD(model_path, threshold=0.8)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_objects(self):
+        """
+        Tests if the response has the confident objects with the boxes
+        rescaled to the image size
+        """
+        image = Image.new("RGB", (200, 100), "white")
+        response = self.od_model.get_objects(np.asarray(image), image)
+        self.assertEqual(response["detection_classes"].tolist(), [1, 2])
+        self.assertEqual(response["detection_scores"].shape, (2,))
+        self.assertTrue(np.all(response["detection_scores"] > 0.8))
+        np.testing.assert_allclose(response["detection_boxes"],
+                                   [[80, 40, 120, 60], [0, 70, 100, 80]],
+                                   atol=1e-4)
+
+    def test_get_objects_batch(self):
+        """
+        Tests if the batch responses are in the order of the input images
+        """
+        images = [Image.new("RGB", size, "white")
+                  for size in [(200, 100), (100, 100), (200, 100)]]
+        responses = self.od_model.get_objects_batch(
+            [np.asarray(image) for image in images], images)
+        for image, response in zip(images, responses):
+            expected = rescale_bboxes(self.boxes[[0, 2]], image.size)
+            np.testing.assert_allclose(response["detection_boxes"],
+                                       expected, atol=1e-4)
+
+    def test_detr_transform(self):
+        """
+        Tests if the smaller edge is resized to 800
+        """
+        image = Image.new("RGB", (400, 1000), "white")
+        self.assertEqual(detr_transform(image).shape, (3, 2000, 800))
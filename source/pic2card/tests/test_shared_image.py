@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from mystique.shared_image import SharedImage, attach_shared_image
+
+
+# owner handing the images to a forked pool, the resource tracker shared by
+# the workers writes to the stderr on a double unregister or a leak.
+FORKED_POOL_SCRIPT = """
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from mystique.shared_image import SharedImage, attach_shared_image
+
+
+def pixel_sum(ref):
+    with attach_shared_image(ref) as image:
+        return int(np.asarray(image.crop()).sum())
+
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        for _ in range(3):
+            with SharedImage(Image.new("RGB", (50, 40), (1, 2, 3))) as image:
+                print(executor.submit(pixel_sum, image.ref).result())
+"""
+
+
+class TestSharedImage(unittest.TestCase):
+    """ Tests for the shared memory image handoff """
+
+    def test_round_trip(self):
+        """
+        Tests if the image built from the shared block matches the
+        source image
+        """
+        for mode in ["RGB", "RGBA", "L"]:
+            image = Image.new(mode, (40, 30))
+            image.putpixel((5, 7), (255,) * len(mode))
+            with SharedImage(image) as shared_image:
+                with attach_shared_image(shared_image.ref) as shared:
+                    cropped = shared.crop((0, 0) + image.size)
+                    self.assertEqual(cropped.mode, mode)
+                    self.assertEqual(shared.size, image.size)
+                    np.testing.assert_array_equal(np.asarray(cropped),
+                                                  np.asarray(image))
+
+    def test_maps_block(self):
+        """
+        Tests if the worker's image maps the shared block instead of a copy
+        of it
+        """
+        with SharedImage(Image.new("RGB", (40, 30))) as shared_image:
+            with attach_shared_image(shared_image.ref) as shared:
+                shared.shared_handle.buf[0] = 200
+                self.assertEqual(shared.crop((0, 0, 1, 1)).getpixel((0, 0)),
+                                 (200, 0, 0))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"),
+                         "fork start method")
+    def test_forked_pool(self):
+        """
+        Tests the forked workers leave the owner's block registration to
+        the owner, i.e the shared resource tracker reports no errors
+        """
+        output = subprocess.run([sys.executable, "-c", FORKED_POOL_SCRIPT],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, timeout=60,
+                                cwd=os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+        self.assertEqual(output.stdout.decode().split(), ["12000"] * 3)
+        self.assertEqual(output.stderr.decode(), "")
@@ -0,0 +1,179 @@
+import base64
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from mystique import config
+from mystique.executors import get_connection_pool
+from mystique.tfs_objects import TfServingError, TfsObjectDetection
+
+PREDICTION = {
+    "detection_boxes": [[0.1, 0.2, 0.5, 0.6]],
+    "detection_scores": [0.9],
+    "detection_classes": [1.0]
+}
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # timed out clients close the connection before the response.
+        pass
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in of the tf-serving predict api, responds a fixed prediction.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(
+            int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests.append((self.path, body))
+            failure = (self.server.failures.pop(0)
+                       if self.server.failures else None)
+        time.sleep(self.server.delay)
+        if failure:
+            status, data = failure, b"{}"
+        else:
+            status = 200
+            data = json.dumps({"predictions": [PREDICTION]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTfsObjectDetection(unittest.TestCase):
+    """ Tests for the tf-serving client against a local stand-in server """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.failures = []
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_port
+        self.image = Image.new("RGB", (200, 100))
+        self.encoded = b"encoded image"
+
+    def tearDown(self):
+        get_connection_pool(self.url[len("http://"):],
+                            timeout=config.TF_SERVING_TIMEOUT).close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_model(self, **kwargs):
+        return TfsObjectDetection(url=self.url, model_name="mystique",
+                                  protocol="rest", **kwargs)
+
+    def test_get_objects(self):
+        """
+        Tests the request payload and the renormalized response
+        """
+        output_dict = self.get_model(
+            input_type="encoded_image_string_tensor").get_objects(
+                self.encoded, self.image)
+        path, body = self.server.requests[0]
+        self.assertEqual(path, "/v1/models/mystique:predict")
+        self.assertEqual(body["instances"],
+                         [{"b64": base64.b64encode(self.encoded).decode()}])
+        np.testing.assert_allclose(output_dict["detection_boxes"],
+                                   [[40, 10, 120, 50]])
+        self.assertEqual(output_dict["detection_classes"].dtype, np.uint8)
+
+    def test_image_tensor_input(self):
+        """
+        Tests if the image tensor models get the bgr array
+        """
+        od_model = self.get_model(input_type="image_tensor")
+        self.assertEqual(od_model.input_layout, "bgr")
+        od_model.get_objects(np.zeros((2, 3, 3), dtype=np.uint8), self.image)
+        self.assertEqual(np.array(self.server.requests[0][1]["instances"])
+                         .shape, (1, 2, 3, 3))
+
+    def test_keep_alive(self):
+        """
+        Tests if the sequential requests reuse the connection
+        """
+        od_model = self.get_model()
+        for _ in range(3):
+            od_model.get_objects(self.encoded, self.image)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_concurrent_requests(self):
+        """
+        Tests if the batch requests are in flight concurrently
+        """
+        self.server.delay = 0.3
+        start = time.time()
+        output_dicts = self.get_model().get_objects_batch(
+            [self.encoded] * 4, [self.image] * 4)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(len(output_dicts), 4)
+        self.assertEqual(self.server.connections, 4)
+
+    def test_retries(self):
+        """
+        Tests if the unavailable responses are retried and the client
+        errors are not
+        """
+        self.server.failures = [503]
+        output_dict = self.get_model().get_objects(self.encoded, self.image)
+        self.assertIn("detection_boxes", output_dict)
+        self.assertEqual(len(self.server.requests), 2)
+
+        self.server.failures = [400]
+        with self.assertRaises(TfServingError):
+            self.get_model().get_objects(self.encoded, self.image)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_timeout(self):
+        """
+        Tests if the slow responses time out after the retries
+        """
+        self.server.delay = 0.5
+        with mock.patch.object(config, "TF_SERVING_TIMEOUT", 0.1), \
+                mock.patch.object(config, "TF_SERVING_RETRIES", 1):
+            with self.assertRaises(OSError):
+                self.get_model().get_objects(self.encoded, self.image)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_pool_timeout(self):
+        """
+        Tests if the predictions time out on a host whose pool was first
+        made without a timeout
+        """
+        host_port = self.url[len("http://"):]
+        pool = get_connection_pool(host_port)
+        self.assertIs(get_connection_pool(host_port), pool)
+        self.server.delay = 0.5
+        with mock.patch.object(config, "TF_SERVING_TIMEOUT", 0.1), \
+                mock.patch.object(config, "TF_SERVING_RETRIES", 1):
+            with self.assertRaises(OSError):
+                self.get_model().get_objects(self.encoded, self.image)
+        self.assertIsNone(pool.timeout)
+        pool.close()